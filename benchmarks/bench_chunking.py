@@ -0,0 +1,77 @@
+"""This file contains a micro-benchmark of collecting sentences into chunks.
+
+Compares `plan_chunks`, which computes the size of every sentence once, with
+the previous loop of translate_extracted(), which encoded the growing chunk
+for every sentence and built chunks by string concatenation. Both run on
+about 1 MB of synthetic text, without tokenizer and translator backend.
+Run from the root of the repository: `python -m benchmarks.bench_chunking`
+"""
+import random
+import timeit
+
+from translation.auxiliary_extraction_translation import plan_chunks
+
+
+def synthetic_sentences(n_bytes, words_per_sentence, seed=0):
+    """Create sentences of German-looking words with about `n_bytes` bytes."""
+    rng = random.Random(seed)
+    words = ["Bank", "Zentralbank", "Währung", "über", "Kredit", "Straße", "Jahr"]
+    sentences = []
+    size = 0
+    while size < n_bytes:
+        n_words = rng.randint(1, 2 * words_per_sentence)
+        sentence = " ".join(rng.choice(words) for _ in range(n_words)) + "."
+        sentences.append(sentence)
+        size += len(sentence.encode("utf-8")) + 1
+
+    return sentences
+
+
+def concatenated_chunks(sentences, limit=5000):
+    """Collect chunks as the previous translate_extracted() did."""
+    chunks = []
+    source_text_chunk = ""
+    for sentence in sentences:
+        if (
+            len(sentence.encode("utf-8")) + len(source_text_chunk.encode("utf-8"))
+            < limit
+        ):
+            source_text_chunk += " " + sentence
+        else:
+            if source_text_chunk != "":
+                chunks.append(source_text_chunk)
+            if len(sentence.encode("utf-8")) < limit:
+                source_text_chunk = sentence
+            else:
+                chunks.append(sentence)
+                source_text_chunk = ""
+    chunks.append(source_text_chunk)
+
+    return [chunk.strip() for chunk in chunks if chunk]
+
+
+def planned_chunks(sentences, limit=5000):
+    """Collect chunks with plan_chunks() and join each chunk once."""
+    return [" ".join(sentences[chunk]) for chunk in plan_chunks(sentences, limit)]
+
+
+def main():
+    """Time both approaches and print megabytes per second."""
+    header = ["words/sentence", "sentences", "concat", "planned", "speed-up"]
+    print(f"{header[0]:>14} {header[1]:>9} {header[2]:>11} {header[3]:>11} {header[4]}")
+    for words_per_sentence in [8, 40, 200]:
+        sentences = synthetic_sentences(1024 * 1024, words_per_sentence)
+        n_megabytes = sum(len(s.encode("utf-8")) + 1 for s in sentences) / 1024**2
+
+        assert concatenated_chunks(sentences) == planned_chunks(sentences)
+        t_concat = min(timeit.repeat(lambda: concatenated_chunks(sentences), number=1))
+        t_planned = min(timeit.repeat(lambda: planned_chunks(sentences), number=1))
+        print(
+            f"{words_per_sentence:>14} {len(sentences):>9}"
+            f" {n_megabytes / t_concat:>7.1f}MB/s {n_megabytes / t_planned:>7.1f}MB/s"
+            f" {t_concat / t_planned:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
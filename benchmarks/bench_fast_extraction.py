@@ -0,0 +1,83 @@
+"""This file contains a benchmark of the fast extraction of table-free pages.
+
+Compares extract_page_fast() with extract_page() in pages/s on the example
+reports and on synthetic reports with and without tables, and checks that
+both extract identical text.
+Run from the root of the repository: `python -m benchmarks.bench_fast_extraction`
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+import pdfplumber
+
+from benchmarks.synthetic import synthetic_pdf
+from translation.auxiliary_extraction_translation import extract_page
+from translation.fast_extraction import extract_page_fast
+
+EXAMPLES = [
+    "examples/1978-geschaeftsbericht-data.pdf",
+    "examples/1978-geschaeftsbericht-data_subset.pdf",
+]
+
+
+def extract_all(pdf_path, extract):
+    """Extract all pages of a pdf, releasing every page after use.
+
+    Returns: list of (text, page_number) tuples, seconds and timings
+    """
+    timings = {}
+    start = time.perf_counter()
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = []
+        for page in pdf.pages:
+            pages.append(extract(page, timings=timings))
+            page.flush_cache()
+    return pages, time.perf_counter() - start, timings
+
+
+def main(args=None):
+    """Time both extraction paths and print pages per second."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as folder:
+        documents = [Path(example) for example in EXAMPLES if Path(example).exists()]
+        for table_every in [0, 4, 1]:
+            documents.append(
+                synthetic_pdf(
+                    Path(folder) / f"synthetic_tables_every_{table_every}.pdf",
+                    args.pages,
+                    table_every=table_every,
+                )
+            )
+
+        print(
+            f"{'document':<36} {'pages':>6} {'fast':>6}"
+            f" {'pdfplumber':>13} {'fast path':>13} speed-up"
+        )
+        for document in documents:
+            slow = min(
+                (extract_all(document, extract_page) for _ in range(args.repeat)),
+                key=lambda result: result[1],
+            )
+            fast = min(
+                (extract_all(document, extract_page_fast) for _ in range(args.repeat)),
+                key=lambda result: result[1],
+            )
+            assert fast[0] == slow[0], f"The fast path changed the text of {document}."
+
+            n_pages = len(slow[0])
+            print(
+                f"{document.stem[:36]:<36} {n_pages:>6}"
+                f" {fast[2].get('fast_pages', 0):>6}"
+                f" {n_pages / slow[1]:>11.1f}/s {n_pages / fast[1]:>11.1f}/s"
+                f" {slow[1] / fast[1]:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""This file contains a benchmark of the fuzzy translation memory.
+
+Simulates consecutive yearly reports: every year repeats the paragraphs of
+the previous year with new figures, some paragraphs with an edited word
+(which need to be translated anew), and adds new paragraphs. Reports the share of paragraphs reused from the memory,
+compared with the exact cache, and the latency of lookups as the memory
+grows.
+Run from the root of the repository:
+`python -m benchmarks.bench_memory [--paragraphs <int>] [--years <int>]`
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+from benchmarks.synthetic import synthetic_paragraph
+from benchmarks.synthetic import WORDS
+from translation.memory import TranslationMemory
+
+PAIR = "local:de:en"
+
+
+def with_figures(rng, paragraph):
+    """Insert figures and a year into a paragraph."""
+    sentences = paragraph.split(". ")
+    return ". ".join(
+        (
+            f"{sentence} um {rng.randint(1, 20)},{rng.randint(0, 9)} % im Jahr"
+            f" {rng.randint(1950, 1990)}"
+            if i % 2 == 0
+            else sentence
+        )
+        for i, sentence in enumerate(sentences)
+    )
+
+
+def yearly_reports(n_paragraphs, n_years, edited=0.1, new=0.1, seed=0):
+    """Create the paragraphs of consecutive reports.
+
+    Returns: list with list of paragraphs of each year
+    """
+    rng = random.Random(seed)
+    templates = [
+        synthetic_paragraph(rng, rng.randint(2, 5)) for _ in range(n_paragraphs)
+    ]
+    reports = []
+    for _ in range(n_years):
+        for i in range(n_paragraphs):
+            if rng.random() < new:
+                templates[i] = synthetic_paragraph(rng, rng.randint(2, 5))
+            elif rng.random() < edited:
+                words = templates[i].split(" ")
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+                templates[i] = " ".join(words)
+        reports.append([with_figures(rng, template) for template in templates])
+    return reports
+
+
+def main(args=None):
+    """Translate the reports year by year and print reuse and latency."""
+    parser = argparse.ArgumentParser(description="Benchmark the memory.")
+    parser.add_argument("--paragraphs", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args(args)
+
+    reports = yearly_reports(args.paragraphs, args.years)
+    exact = set()
+    print(
+        f"{'year':>4} {'memory':>7} {'exact':>6} {'reused':>7}"
+        f" {'mean ms':>8} {'p95 ms':>7} {'add ms':>7}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        memory = TranslationMemory(
+            Path(folder) / "memory.sqlite", threshold=args.threshold
+        )
+        for year, paragraphs in enumerate(reports):
+            size = len(memory)
+            latencies = []
+            reused = 0
+            missed = []
+            for paragraph in paragraphs:
+                start = time.perf_counter()
+                translation = memory.lookup(paragraph, PAIR)
+                latencies.append(time.perf_counter() - start)
+                if translation is not None:
+                    reused += 1
+                else:
+                    missed.append((paragraph, paragraph.upper()))
+
+            exact_hits = sum(paragraph in exact for paragraph in paragraphs)
+            exact.update(paragraphs)
+
+            start = time.perf_counter()
+            memory.add_many(missed, PAIR)
+            add_seconds = time.perf_counter() - start
+
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{year:>4} {size:>7} {exact_hits / len(paragraphs):>6.1%}"
+                f" {reused / len(paragraphs):>7.1%}"
+                f" {1000 * statistics.mean(latencies):>8.3f} {1000 * p95:>7.3f}"
+                f" {1000 * add_seconds / max(len(missed), 1):>7.3f}"
+            )
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
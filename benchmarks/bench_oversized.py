@@ -0,0 +1,73 @@
+"""This file contains a regression benchmark of translating oversized sentences.
+
+Counts the requests sent to the translator backend for pathological
+sentences above the upload limit, e.g. run-on lines of extracted tables.
+Compares translate_extracted() with the previous splitting into words, which
+sent one request per word, and with the lower bound ceil(bytes / limit).
+Run from the root of the repository: `python -m benchmarks.bench_oversized`
+"""
+import math
+import random
+
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.auxiliary_extraction_translation import translate_extracted
+from translation.backends import LocalBackend
+
+
+def pathological_inputs(seed=0):
+    """Create oversized sentences of different shapes.
+
+    Returns: dictionary mapping name to string
+    """
+    rng = random.Random(seed)
+    words = ["Bank", "Zentralbank", "Währung", "über", "Kredit", "Straße", "Jahr"]
+    return {
+        "table row": " ".join(
+            rng.choice(words) if rng.random() < 0.3 else f"{rng.randint(0, 99999)}"
+            for _ in range(8000)
+        ),
+        "clause list": ", ".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+            for _ in range(4000)
+        ),
+        "long clauses": "; ".join(
+            " ".join(rng.choice(words) for _ in range(600)) for _ in range(20)
+        ),
+        "long words": " ".join(
+            "".join(rng.choice(words) for _ in range(rng.randint(1, 50)))
+            for _ in range(1500)
+        ),
+    }
+
+
+def per_word_calls(sentence, limit=5000):
+    """Count the requests of the previous splitting into words."""
+    invalid_chars = ["", " ", "\n\n", "_", "-"]
+    return sum(
+        1
+        for word in sentence.split(" ")
+        if word not in invalid_chars and len(word.encode("utf-8")) < limit
+    )
+
+
+def main():
+    """Count requests for each input and print them."""
+    tokenizer = PunktSentenceTokenizer()
+    print(f"{'input':>12} {'bytes':>7} {'per word':>8} {'split':>6} {'ceil':>5}")
+    for name, sentence in pathological_inputs().items():
+        n_bytes = len(sentence.encode("utf-8"))
+        backend = LocalBackend()
+        translate_extracted(sentence, tokenizer, backend=backend)
+
+        calls = backend.stats()["calls"]
+        lower_bound = math.ceil(n_bytes / 5000)
+        print(
+            f"{name:>12} {n_bytes:>7} {per_word_calls(sentence):>8}"
+            f" {calls:>6} {lower_bound:>5}"
+        )
+        assert calls <= 2 * lower_bound
+
+
+if __name__ == "__main__":
+    main()
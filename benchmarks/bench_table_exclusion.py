@@ -0,0 +1,66 @@
+"""This file contains a micro-benchmark of excluding table objects from a page.
+
+Compares the grid index `BBoxIndex` with `partial(not_within_bboxes, ...)`
+on synthetic pages with many characters and many tables.
+Run from the root of the repository: `python -m benchmarks.bench_table_exclusion`
+"""
+import random
+import timeit
+from functools import partial
+
+from translation.auxiliary_extraction_translation import BBoxIndex
+from translation.auxiliary_extraction_translation import not_within_bboxes
+
+
+def synthetic_page(n_chars, n_tables, seed=0):
+    """Create character objects and table bounding boxes of an A4 page.
+
+    Tables are stacked in rows of four, characters are spread uniformly.
+    Returns: list of character dictionaries and list of bounding boxes
+    """
+    rng = random.Random(seed)
+    width, height = 595, 842
+    rows = -(-n_tables // 4)
+    bboxes = [
+        (
+            20 + (i % 4) * 140,
+            20 + (i // 4) * (800 / rows),
+            140 + (i % 4) * 140,
+            20 + (i // 4 + 0.8) * (800 / rows),
+        )
+        for i in range(n_tables)
+    ]
+
+    chars = []
+    for _ in range(n_chars):
+        x0, top = rng.uniform(0, width - 5), rng.uniform(0, height - 8)
+        chars.append({"x0": x0, "x1": x0 + 5, "top": top, "bottom": top + 8})
+
+    return chars, bboxes
+
+
+def main():
+    """Time both approaches and print characters per second."""
+    print(f"{'chars':>6} {'tables':>6} {'any() scan':>12} {'grid index':>12} speed-up")
+    for n_chars, n_tables in [(3000, 1), (3000, 8), (6000, 24), (6000, 64)]:
+        chars, bboxes = synthetic_page(n_chars, n_tables)
+
+        def scan():
+            test = partial(not_within_bboxes, bboxes=bboxes)
+            return [obj for obj in chars if test(obj)]
+
+        def index():
+            test = BBoxIndex(bboxes).not_within
+            return [obj for obj in chars if test(obj)]
+
+        assert scan() == index()
+        t_scan = min(timeit.repeat(scan, number=5, repeat=3)) / 5
+        t_index = min(timeit.repeat(index, number=5, repeat=3)) / 5
+        print(
+            f"{n_chars:>6} {n_tables:>6} {n_chars / t_scan:>10.0f}/s"
+            f" {n_chars / t_index:>10.0f}/s {t_scan / t_index:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
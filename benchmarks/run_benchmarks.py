@@ -0,0 +1,185 @@
+"""This file contains the benchmark suite of the translation pipeline.
+
+Measures the throughput of every stage without network access, using the
+local stand-in translator `LocalBackend`:
+- extraction: pages/s on the example reports and synthetic documents
+- chunking: sentences/s and chunks/s of `plan_chunks` on 1 MB of text
+- packing: requests per page with and without packing of paragraphs
+- writing: pages/s of `PDFWriter` and `StreamingPDFWriter`
+Results are saved as `benchmarks/results/<commit>.json`, such that a run can
+be compared with the results of an earlier commit.
+Run from the root of the repository:
+`python -m benchmarks.run_benchmarks [--compare <commit>] [--scale <int>]`
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from benchmarks.bench_chunking import synthetic_sentences
+from benchmarks.synthetic import synthetic_pages
+from benchmarks.synthetic import synthetic_pdf
+from translation.auxiliary_extraction_translation import plan_chunks
+from translation.auxiliary_extraction_translation import translate_page
+from translation.backends import LocalBackend
+from translation.extraction import extract_pages
+from translation.packing import translate_pages
+from translation.pdf_writer import PDFWriter
+from translation.pdf_writer import StreamingPDFWriter
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+EXAMPLES = [
+    "examples/1978-geschaeftsbericht-data.pdf",
+    "examples/1978-geschaeftsbericht-data_subset.pdf",
+]
+
+
+def best_of(function, repeat=3):
+    """Return the shortest wall time of several calls of a function."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def bench_extraction(folder, scale):
+    """Measure extraction throughput in pages/s."""
+    results = {}
+    documents = [Path(example) for example in EXAMPLES if Path(example).exists()]
+    for n_pages in [10 * scale, 50 * scale]:
+        documents.append(synthetic_pdf(folder / f"synthetic_{n_pages}.pdf", n_pages))
+
+    for document in documents:
+        n_pages = len(extract_pages(document))
+        seconds = best_of(lambda: extract_pages(document))
+        results[f"extract_pages_per_s[{document.stem}]"] = n_pages / seconds
+
+    return results
+
+
+def bench_chunking(scale):
+    """Measure chunking throughput in sentences/s and chunks/s."""
+    sentences = synthetic_sentences(scale * 1024 * 1024, words_per_sentence=20)
+    n_chunks = len(plan_chunks(sentences))
+    seconds = best_of(lambda: plan_chunks(sentences))
+    return {
+        "chunking_sentences_per_s": len(sentences) / seconds,
+        "chunking_chunks_per_s": n_chunks / seconds,
+    }
+
+
+def bench_packing(scale):
+    """Measure requests per page with and without packing."""
+    pages = synthetic_pages(20 * scale)
+    tokenizer = PunktSentenceTokenizer()
+
+    packed = LocalBackend()
+    translate_pages(pages, tokenizer, packed)
+    unpacked = LocalBackend()
+    for page in pages:
+        translate_page(page, tokenizer, backend=unpacked)
+
+    return {
+        "packing_requests_per_page": packed.stats()["calls"] / len(pages),
+        "unpacked_requests_per_page": unpacked.stats()["calls"] / len(pages),
+    }
+
+
+def bench_writing(folder, scale):
+    """Measure pdf writing throughput in pages/s."""
+    pages = synthetic_pages(50 * scale)
+    results = {}
+    for writer_class in [PDFWriter, StreamingPDFWriter]:
+
+        def write():
+            with writer_class(folder / "written.pdf", len(pages)) as writer:
+                for page_index, text in enumerate(pages):
+                    writer.add_page(page_index, text)
+
+        seconds = best_of(write)
+        results[f"write_pages_per_s[{writer_class.__name__}]"] = len(pages) / seconds
+
+    return results
+
+
+def current_commit():
+    """Return the short hash of the checked-out commit, marked if modified."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        modified = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return commit + "-modified" if modified else commit
+
+
+def compare(results, reference):
+    """Print results next to the results of a reference run."""
+    print(f"{'benchmark':<56} {'reference':>12} {'current':>12} {'ratio':>7}")
+    for name, value in results.items():
+        if name in reference:
+            ratio = value / reference[name] if reference[name] else float("nan")
+            print(f"{name:<56} {reference[name]:>12.2f} {value:>12.2f} {ratio:>7.2f}")
+        else:
+            print(f"{name:<56} {'':>12} {value:>12.2f}")
+
+
+def main(args=None):
+    """Run all benchmarks, save and print the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline.")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--compare", default=None, help="commit to compare with")
+    args = parser.parse_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        results.update(bench_extraction(Path(folder), args.scale))
+        results.update(bench_chunking(args.scale))
+        results.update(bench_packing(args.scale))
+        results.update(bench_writing(Path(folder), args.scale))
+
+    commit = current_commit()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / f"{commit}.json", "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "commit": commit,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "machine": platform.machine(),
+                "scale": args.scale,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+
+    if args.compare is not None:
+        with open(RESULTS_DIR / f"{args.compare}.json", encoding="utf-8") as file:
+            compare(results, json.load(file)["results"])
+    else:
+        for name, value in results.items():
+            print(f"{name:<56} {value:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""This file contains generators of synthetic documents for the benchmarks.
+
+The documents resemble the annual reports of central banks: pages of German
+paragraphs with a page number at the bottom, and every few pages a table
+drawn with ruling lines, such that the table detection of the extraction
+has something to find.
+"""
+import random
+from pathlib import Path  # for Windows/Unix compatibility
+
+from fpdf import FPDF
+
+WORDS = [
+    "Bank",
+    "Zentralbank",
+    "Währung",
+    "über",
+    "Kredit",
+    "Geldmenge",
+    "Zinsen",
+    "Jahr",
+    "die",
+    "der",
+    "und",
+    "hat",
+    "im",
+    "wurde",
+    "Wirtschaft",
+    "Preise",
+    "gestiegen",
+    "Bundesrepublik",
+]
+
+
+def synthetic_paragraph(rng, n_sentences):
+    """Create a paragraph of German-looking sentences."""
+    sentences = []
+    for _ in range(n_sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def synthetic_pages(n_pages, seed=0):
+    r"""Create the text of pages, each with a few paragraphs.
+
+    Returns: list of strings, paragraphs separated by "\n\n"
+    """
+    rng = random.Random(seed)
+    return [
+        "\n\n".join(
+            synthetic_paragraph(rng, rng.randint(2, 6))
+            for _ in range(rng.randint(2, 5))
+        )
+        for _ in range(n_pages)
+    ]
+
+
+def synthetic_pdf(path, n_pages, table_every=4, seed=0, max_chars=2500):
+    """Write a synthetic report as pdf.
+
+    Args:
+        path: string/Path of the pdf to be created
+        n_pages: int with number of pages
+        table_every: int, every `table_every`-th page contains a table, 0 for
+            no tables
+        seed: int seed of the text
+        max_chars: int with maximum number of characters of text per page
+    Returns: Path of the pdf
+    """
+    rng = random.Random(seed)
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Helvetica", size=10)
+
+    for page_index, text in enumerate(synthetic_pages(n_pages, seed=seed)):
+        pdf.add_page()
+        pdf.set_xy(20, 20)
+        pdf.multi_cell(w=170, h=5, txt=text[:max_chars])
+
+        if table_every and page_index % table_every == table_every - 1:
+            # Table with ruling lines below the text
+            pdf.set_xy(20, 200)
+            for _ in range(6):
+                for _ in range(4):
+                    pdf.cell(w=40, h=8, txt=f"{rng.randint(0, 99999):,}", border=1)
+                pdf.ln()
+                pdf.set_x(20)
+
+        pdf.set_xy(20, 280)
+        pdf.cell(w=170, h=5, txt=str(page_index + 1), align="C")
+
+    path = Path(path)
+    pdf.output(str(path))
+    return path
@@ -0,0 +1,98 @@
+"""This file contains tests to check the translator backends."""
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.auxiliary_extraction_translation import translate_extracted
+from translation.backends import BackendError
+from translation.backends import get_backend
+from translation.backends import InvalidPayloadError
+from translation.backends import LocalBackend
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """Initialize untrained nltk tokenizer, which does not need downloads."""
+    return PunktSentenceTokenizer()
+
+
+def test_local_backend_translate_many():
+    """Check that the local backend keeps order and counts requests.
+
+    Arrange: Create local backend that upper-cases its input.
+    Act: Translate list of strings.
+    Assert: Check translations and request statistics.
+    """
+    backend = LocalBackend(transform=str.upper)
+
+    translations = backend.translate_many(["Ich liebe Python.", " Hallo "])
+
+    assert translations == ["ICH LIEBE PYTHON.", "HALLO"]
+    assert backend.stats()["calls"] == 2
+
+
+def test_local_backend_invalid_payload():
+    """Check that the local backend rejects payloads like Google Translate."""
+    backend = LocalBackend(max_request_bytes=10)
+
+    for payload in ["", " ", "_", "2022", "a" * 11]:
+        with pytest.raises(InvalidPayloadError):
+            backend.translate(payload)
+
+
+def test_local_backend_error_rate_deterministic():
+    """Check that simulated failures are reproducible for a given seed.
+
+    Arrange: Create two local backends with identical seed.
+    Act: Translate the same strings and record which requests fail.
+    Assert: Check that the same requests fail for both backends.
+    """
+
+    def failures(backend):
+        failed = []
+        for i in range(50):
+            try:
+                backend.translate(f"Satz {i}")
+            except BackendError:
+                failed.append(i)
+        return failed
+
+    first = failures(LocalBackend(error_rate=0.3, seed=1))
+    second = failures(LocalBackend(error_rate=0.3, seed=1))
+
+    assert first == second
+    assert 0 < len(first) < 50
+
+
+def test_get_backend_unknown():
+    """Check that unknown backend names raise an error."""
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+def test_translate_extracted_local_backend(tokenizer):
+    """Check that translate_extracted() uses the given backend.
+
+    Arrange: Create local backend that upper-cases its input.
+    Act: Translate text.
+    Assert: Check that text has been passed through the backend.
+    """
+    backend = LocalBackend(transform=str.upper)
+
+    translation = translate_extracted(
+        "Ich liebe Python. Ich liebe Python.", tokenizer, backend=backend
+    )
+
+    assert translation == " ICH LIEBE PYTHON. ICH LIEBE PYTHON."
+
+
+def test_translate_extracted_raises_backend_errors(tokenizer):
+    """Check that errors of the backend in the final chunk are not ignored.
+
+    Arrange: Create a local backend failing every request.
+    Act: Translate text.
+    Assert: Check that the failure is raised.
+    """
+    with pytest.raises(BackendError):
+        translate_extracted(
+            "Ich liebe Python.", tokenizer, backend=LocalBackend(error_rate=1.0)
+        )
@@ -0,0 +1,80 @@
+"""This file contains tests to check the translation cache."""
+import pytest
+
+from translation.backends import LocalBackend
+from translation.cache import cache_key
+from translation.cache import CachedBackend
+from translation.cache import TranslationCache
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    """Open temporary translation cache.
+
+    Clean-up: close cache after test has run.
+    """
+    cache = TranslationCache(tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_rerun_hits_cache(cache):
+    """Check that repeated text is translated only once.
+
+    Arrange: Wrap local backend with cache.
+    Act: Translate the same strings twice.
+    Assert: Check that second run is answered from cache.
+    """
+    backend = LocalBackend(transform=str.upper)
+    cached = CachedBackend(backend, cache)
+
+    first = cached.translate_many(["Ich liebe Python.", "Hallo"])
+    second = cached.translate_many(["Ich liebe Python.", "Hallo"])
+
+    assert first == second == ["ICH LIEBE PYTHON.", "HALLO"]
+    assert backend.stats()["calls"] == 2
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_key_normalizes_whitespace():
+    """Check that layout changes in whitespace do not change the key."""
+    assert cache_key("Ich  liebe\nPython. ", "auto", "en", "google") == cache_key(
+        "Ich liebe Python.", "auto", "en", "google"
+    )
+
+
+def test_key_depends_on_language_and_backend():
+    """Check that language pair and backend are part of the key."""
+    keys = {
+        cache_key("Hallo", "auto", "en", "google"),
+        cache_key("Hallo", "auto", "fr", "google"),
+        cache_key("Hallo", "auto", "en", "local"),
+    }
+
+    assert len(keys) == 3
+
+
+def test_lru_eviction(tmp_path):
+    """Check that least-recently-used entries are evicted first.
+
+    Arrange: Create cache that fits two translations of 5 bytes.
+    Act: Store two entries, use the first, store a third.
+    Assert: Check that second entry has been evicted.
+    """
+    with TranslationCache(tmp_path / "cache.sqlite", max_bytes=10) as cache:
+        cache.put_many([("a", "aaaaa"), ("b", "bbbbb")])
+        cache.get_many(["a"])
+        cache.put_many([("c", "ccccc")])
+
+        assert cache.get_many(["a", "b", "c"]) == ["aaaaa", None, "ccccc"]
+
+
+def test_cache_persists(tmp_path):
+    """Check that translations survive closing the cache."""
+    with TranslationCache(tmp_path / "cache.sqlite") as cache:
+        cache.put_many([("a", "aaaaa")])
+
+    with TranslationCache(tmp_path / "cache.sqlite") as cache:
+        assert cache.get_many(["a"]) == ["aaaaa"]
+        assert cache.stats()["size_bytes"] == 5
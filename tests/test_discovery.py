@@ -0,0 +1,84 @@
+"""This file contains tests to check the discovery of pdfs."""
+import os
+from pathlib import Path  # for Windows/Unix compatibility
+
+from translation.discovery import create_output_dirs
+from translation.discovery import discover_pdfs
+from translation.discovery import ignore_patterns
+from translation.discovery import Manifest
+from translation.discovery import scan_pdfs
+
+
+def make_corpus(folder):
+    """Create a corpus of pdfs and other files in nested folders."""
+    for relative in [
+        "BEL/report_1978.pdf",
+        "BEL/annex/tables.pdf",
+        "BEL/English/report_1978.pdf",
+        "BEL/notes.txt",
+        "NLD/report_1979.pdf",
+    ]:
+        path = folder / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(relative.encode())
+
+
+def test_scan_pdfs_patterns(tmp_path):
+    """Check that include and exclude patterns select files and folders."""
+    make_corpus(tmp_path)
+    root = tmp_path.as_posix()
+
+    found = sorted(path for path, _, _ in scan_pdfs(root))
+    excluded = sorted(
+        path for path, _, _ in scan_pdfs(root, exclude=ignore_patterns("English"))
+    )
+    included = sorted(path for path, _, _ in scan_pdfs(root, include=["BEL/*.pdf"]))
+
+    assert len(found) == 4
+    assert excluded == sorted(path for path in found if "English" not in path)
+    assert len(excluded) == 3
+    assert len(included) == 3
+
+
+def test_discover_pdfs_manifest(tmp_path):
+    """Check that new, changed, unchanged and removed pdfs are reported.
+
+    Arrange: Create corpus and record it in the manifest.
+    Act: Change, touch, remove and add pdfs and discover again.
+    Assert: Check the reported files.
+    """
+    make_corpus(tmp_path)
+    root = tmp_path.as_posix()
+    with Manifest(tmp_path / "manifest.sqlite") as manifest:
+        first = discover_pdfs(["BEL", "NLD"], root, manifest=manifest)
+
+        (tmp_path / "BEL/report_1978.pdf").write_bytes(b"changed content")
+        touched = tmp_path / "NLD/report_1979.pdf"
+        os.utime(touched, ns=(0, touched.stat().st_mtime_ns + 10**9))
+        (tmp_path / "BEL/annex/tables.pdf").unlink()
+        (tmp_path / "NLD/report_1980.pdf").write_bytes(b"new")
+        second = discover_pdfs(["BEL", "NLD"], root, manifest=manifest)
+
+    assert len(first["new"]) == 4
+    assert second == {
+        "new": [f"{root}/NLD/report_1980.pdf"],
+        "changed": [f"{root}/BEL/report_1978.pdf"],
+        "unchanged": sorted(second["unchanged"]),
+        "removed": [f"{root}/BEL/annex/tables.pdf"],
+    }
+    assert sorted(second["unchanged"]) == [
+        f"{root}/BEL/English/report_1978.pdf",
+        f"{root}/NLD/report_1979.pdf",
+    ]
+
+
+def test_create_output_dirs(tmp_path):
+    """Check that the directories of all pdfs are created under output/."""
+    make_corpus(tmp_path)
+    pdf_list = [path for path, _, _ in scan_pdfs(tmp_path.as_posix())]
+
+    created = create_output_dirs(str(tmp_path), pdf_list)
+
+    assert len(created) == 4
+    assert Path(tmp_path / "output/BEL/annex").is_dir()
+    assert create_output_dirs(str(tmp_path), pdf_list) == []
@@ -0,0 +1,149 @@
+"""This file contains tests to check the concurrent dispatch of requests."""
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from translation.backends import GoogleBackend
+from translation.backends import LocalBackend
+from translation.backends import ThrottledError
+from translation.dispatch import TokenBucket
+from translation.dispatch import TranslationDispatcher
+
+
+class ThrottlingBackend(LocalBackend):
+    """Local backend that rejects the first requests as throttled."""
+
+    def __init__(self, n_throttled, **kwargs):
+        """Initialize backend that throttles `n_throttled` requests."""
+        super().__init__(**kwargs)
+        self.n_throttled = n_throttled
+
+    def _translate_one(self, text, source):
+        """Raise ThrottledError for the first requests."""
+        with self._lock:
+            self.n_throttled -= 1
+            throttled = self.n_throttled >= 0
+        if throttled:
+            raise ThrottledError("Too many requests.")
+        return super()._translate_one(text, source)
+
+
+class BarrierBackend(LocalBackend):
+    """Local backend whose requests wait until `parties` requests are in flight."""
+
+    def __init__(self, parties, **kwargs):
+        """Initialize backend with a barrier for `parties` requests."""
+        super().__init__(**kwargs)
+        self.barrier = threading.Barrier(parties)
+
+    def _translate_one(self, text, source):
+        """Wait for the other requests, fail if they are not sent concurrently."""
+        self.barrier.wait(timeout=10)
+        return super()._translate_one(text, source)
+
+
+def test_dispatcher_keeps_order():
+    """Check that concurrent requests are returned in order.
+
+    Arrange: Create local backend whose requests wait for 10 requests in
+        flight, and dispatcher with 10 requests in flight.
+    Act: Translate 20 strings.
+    Assert: Check order of output, i.e. that requests ran concurrently without
+        breaking the barrier.
+    """
+    backend = BarrierBackend(10, transform=str.upper)
+    texts = [f"Satz {i}" for i in range(20)]
+
+    with TranslationDispatcher(backend, max_in_flight=10) as dispatcher:
+        translations = dispatcher.translate_many(texts)
+
+    assert translations == [text.upper() for text in texts]
+
+
+class StatefulTranslator:
+    """Fake GoogleTranslator, which stores the text of a request in the client."""
+
+    created = []
+
+    def __init__(self, source, target, proxies=None):
+        """Initialize client without request."""
+        self.text = None
+        self.created.append(self)
+
+    def translate(self, text):
+        """Translate text after a pause, in which other threads may run."""
+        self.text = text
+        time.sleep(0.001)
+        return f"T({self.text})"
+
+
+def test_dispatcher_google_clients_per_thread(monkeypatch):
+    """Check that concurrent requests do not share a stateful client.
+
+    Arrange: Replace deep_translator by a fake module with a stateful client,
+        switch threads often.
+    Act: Translate 200 strings with 8 requests in flight, twice.
+    Assert: Check that every translation belongs to its input, in order, and
+        that the clients of the threads are kept between calls.
+    """
+    fake = types.ModuleType("deep_translator")
+    fake.GoogleTranslator = StatefulTranslator
+    fake.exceptions = types.SimpleNamespace(
+        TooManyRequests=type("TooManyRequests", (Exception,), {}),
+        NotValidPayload=type("NotValidPayload", (Exception,), {}),
+        NotValidLength=type("NotValidLength", (Exception,), {}),
+    )
+    monkeypatch.setitem(sys.modules, "deep_translator", fake)
+    monkeypatch.setattr(StatefulTranslator, "created", [])
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        texts = [f"Satz nummer {i} hier." for i in range(200)]
+        with TranslationDispatcher(GoogleBackend(), max_in_flight=8) as dispatcher:
+            translations = dispatcher.translate_many(texts)
+            again = dispatcher.translate_many(texts)
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert translations == again == [f"T({text})" for text in texts]
+    assert 1 < len(StatefulTranslator.created) <= 8
+
+
+def test_dispatcher_retries_throttled():
+    """Check that throttled requests are retried with backoff."""
+    backend = ThrottlingBackend(n_throttled=2)
+    dispatcher = TranslationDispatcher(backend, max_in_flight=1, backoff=0.001)
+
+    assert dispatcher.translate_many(["Hallo"]) == ["Hallo"]
+    assert dispatcher.stats()["retries"] == 2
+
+
+def test_dispatcher_gives_up():
+    """Check that throttling errors are raised after the last retry."""
+    backend = ThrottlingBackend(n_throttled=10)
+    dispatcher = TranslationDispatcher(backend, max_retries=2, backoff=0.001)
+
+    with pytest.raises(ThrottledError):
+        dispatcher.translate_many(["Hallo"])
+
+
+def test_token_bucket_waits():
+    """Check that the token bucket limits the rate.
+
+    Arrange: Create bucket with 2 tokens per second and a fake clock.
+    Act: Take three tokens.
+    Assert: Check that the third token required waiting half a second.
+    """
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert now[0] == pytest.approx(0.5)
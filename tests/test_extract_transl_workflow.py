@@ -1,11 +1,26 @@
 """This file contains tests to check the extraction and translation workflow."""
+import shutil
+import sqlite3
+import threading
 from pathlib import Path  # for Windows/Unix compatibility
 
 import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
 
 from translation.auxiliary_extraction_translation import create_destination_dir
 from translation.auxiliary_extraction_translation import find_pdfs
+from translation.backends import LocalBackend
+from translation.journal import file_hash
+from translation.journal import JobJournal
+from translation.metrics import format_summary
+from translation.metrics import Metrics
+from translation.metrics import read_metrics
+from translation.metrics import summarize
 from translation.text_extraction_translation import extract_and_translate_file
+from translation.text_extraction_translation import extract_and_translate_targets
+from translation.text_extraction_translation import journal_key
+from translation.text_extraction_translation import run_batch
+from translation.text_extraction_translation import translate_document
 
 
 @pytest.fixture(scope="module")
@@ -35,6 +50,33 @@ def test_workflow_creates_file(pdf_path, tmp_path):
     assert Path(file).exists()
 
 
+def test_workflow_records_metrics(pdf_path, tmp_path):
+    """Check that the workflow records metrics of all stages.
+
+    Arrange: Open metrics file and create local backend.
+    Act: Translate example pdf and summarize recorded metrics.
+    Assert: Check that every page was extracted and written, and the
+        document record contains the request statistics.
+    """
+    with Metrics(tmp_path / "metrics.jsonl", file=pdf_path) as metrics:
+        extract_and_translate_file(
+            file_path=pdf_path,
+            destination_path=str(tmp_path) + "/",
+            paths_relative=False,
+            backend=LocalBackend(),
+            metrics=metrics,
+        )
+
+    summary = summarize(read_metrics(tmp_path / "metrics.jsonl", file=pdf_path))
+
+    assert summary["extract_page"]["count"] == 3
+    assert summary["write_page"]["count"] == 3
+    assert summary["document"]["pages"] == 3
+    assert summary["document"]["calls"] > 0
+    assert {"extract", "tokenize", "translate", "save"} <= set(summary)
+    assert "document" in format_summary(summary)
+
+
 def test_find_example_pdf():
     """Check that find_pdfs() works.
 
@@ -67,3 +109,178 @@ def test_create_destination_dir(tmp_path):
 
     assert Path(tmp_path / "output/sub").exists()
     assert not Path(tmp_path / "output/sub/hello.txt").exists()
+
+
+def test_translate_document_skips_completed_pages():
+    """Check that completed pages are not translated again.
+
+    Arrange: Create local backend and mark first page as completed.
+    Act: Translate document in batches of one page.
+    Assert: Check that only the second page was translated and recorded.
+    """
+    backend = LocalBackend(transform=str.upper)
+    recorded = []
+
+    translated = translate_document(
+        ["Erste Seite.", "Zweite Seite."],
+        PunktSentenceTokenizer(),
+        backend,
+        pages_per_batch=1,
+        completed_pages={0: "First page."},
+        on_page_translated=lambda i, text: recorded.append((i, text)),
+    )
+
+    assert translated == ["First page.", "ZWEITE SEITE."]
+    assert recorded == [(1, "ZWEITE SEITE.")]
+    assert backend.stats()["calls"] == 1
+
+
+def test_batch_skips_translated_files(pdf_path, tmp_path):
+    """Check that a rerun of a batch skips files that have been translated.
+
+    Arrange: Copy example PDF into temporary corpus.
+    Act: Run batch twice with local backend.
+    Assert: Check output exists and second run skipped the file.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    file = corpus / Path(pdf_path).name
+    shutil.copy(pdf_path, file)
+
+    first = run_batch([str(file)], str(corpus), backend_name="local")
+    second = run_batch([str(file)], str(corpus), backend_name="local")
+
+    assert Path(corpus / "output" / file.name).exists()
+    assert first["translated"] == 1
+    assert second["skipped"] == 1
+
+
+def test_batch_continues_after_failure(pdf_path, tmp_path):
+    """Check that a failing file is counted and does not stop the batch.
+
+    Arrange: Copy example PDF and a broken pdf into temporary corpus.
+    Act: Run batch with local backend, then again into another language.
+    Assert: Check the broken file failed, the example was translated and that
+        the other language is not skipped.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    file = corpus / Path(pdf_path).name
+    shutil.copy(pdf_path, file)
+    (corpus / "broken.pdf").write_bytes(b"not a pdf")
+
+    first = run_batch(
+        [str(file), str(corpus / "broken.pdf")], str(corpus), backend_name="local"
+    )
+    french = run_batch(
+        [str(file)], str(corpus), backend_name="local", backend_kwargs={"target": "fr"}
+    )
+
+    assert (first["translated"], first["failed"]) == (1, 1)
+    assert (french["translated"], french["skipped"]) == (1, 0)
+
+
+def test_batch_records_all_pages_after_resume(pdf_path, tmp_path):
+    """Check that a resumed file is recorded with all of its pages.
+
+    Arrange: Record the first page of the example PDF in the journal.
+    Act: Run batch with local backend.
+    Assert: Check that the journal records all three pages of the file.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    file = corpus / Path(pdf_path).name
+    shutil.copy(pdf_path, file)
+    journal_path = corpus / "journal.sqlite"
+    key = journal_key(str(file), "local", ["en"])
+    with JobJournal(journal_path) as journal:
+        journal.record_page(key, file_hash(file), 0, "Translated page")
+
+    summary = run_batch(
+        [str(file)], str(corpus), journal_path=journal_path, backend_name="local"
+    )
+
+    connection = sqlite3.connect(journal_path)
+    pages = connection.execute("SELECT pages FROM files WHERE file = ?", (key,))
+    assert pages.fetchone() == (3,)
+    connection.close()
+    assert summary["pages"] == 2
+
+
+class MeetingBackend(LocalBackend):
+    """Local backend whose first request waits for those of other backends."""
+
+    def __init__(self, barrier, **kwargs):
+        """Initialize backend meeting the other backends at `barrier`."""
+        super().__init__(**kwargs)
+        self.barrier = barrier
+        self.met = False
+
+    def _translate_one(self, text, source):
+        """Wait for the other backends at the first request."""
+        with self._lock:
+            meet, self.met = not self.met, True
+        if meet:
+            self.barrier.wait(timeout=10)
+        return super()._translate_one(text, source)
+
+
+def test_workflow_fans_out_targets(pdf_path, tmp_path):
+    """Check that a pdf is extracted once and translated into every language.
+
+    Arrange: Create a local backend for each of two target languages, whose
+        first requests wait for each other.
+    Act: Translate example pdf into both languages.
+    Assert: Check one pdf per language, a single extraction and tokenization,
+        and that the languages were translated concurrently.
+    """
+    barrier = threading.Barrier(2)
+    backends = {
+        target: MeetingBackend(barrier, target=target, transform=str.upper)
+        for target in ["fr", "de"]
+    }
+    with Metrics() as metrics:
+        output_paths = extract_and_translate_targets(
+            file_path=pdf_path,
+            destination_path=str(tmp_path) + "/",
+            targets=["fr", "de"],
+            paths_relative=False,
+            backends=backends,
+            metrics=metrics,
+            routing=False,
+        )
+
+    summary = summarize(metrics.records)
+    stem = Path(pdf_path).stem
+    assert output_paths == {
+        "fr": tmp_path / f"{stem}_fr.pdf",
+        "de": tmp_path / f"{stem}_de.pdf",
+    }
+    assert all(path.exists() for path in output_paths.values())
+    assert summary["extract"]["count"] == 1
+    assert summary["translate_target"]["count"] == 2
+    tokenize = next(r for r in metrics.records if r["stage"] == "tokenize")
+    assert tokenize["shared"] == 2 * tokenize["segments"]
+    # Both languages were in flight at once, otherwise the barrier broke
+    assert not barrier.broken
+
+
+def test_batch_translates_targets(pdf_path, tmp_path):
+    """Check that a batch translates into all targets and skips them on rerun."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    file = corpus / Path(pdf_path).name
+    shutil.copy(pdf_path, file)
+
+    first = run_batch(
+        [str(file)], str(corpus), backend_name="local", targets=["fr", "de"]
+    )
+    second = run_batch(
+        [str(file)], str(corpus), backend_name="local", targets=["fr", "de"]
+    )
+
+    assert Path(corpus / "output" / f"{file.stem}_fr.pdf").exists()
+    assert Path(corpus / "output" / f"{file.stem}_de.pdf").exists()
+    assert first["translated"] == 1
+    assert first["pages"] == 3
+    assert second["skipped"] == 1
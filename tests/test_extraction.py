@@ -1,10 +1,21 @@
 """This file contains tests to check the extraction function."""
+import random
 from pathlib import Path  # for Windows/Unix compatibility
 
 import pdfplumber
 import pytest
 
+import translation.extraction
+from benchmarks.synthetic import synthetic_pdf
+from translation.auxiliary_extraction_translation import BBoxIndex
+from translation.auxiliary_extraction_translation import clean_text
 from translation.auxiliary_extraction_translation import extract
+from translation.auxiliary_extraction_translation import find_table_bboxes
+from translation.auxiliary_extraction_translation import not_within_bboxes
+from translation.extraction import extract_pages
+from translation.extraction import resolve_page_numbers
+from translation.extraction_cache import ExtractionCache
+from translation.fast_extraction import extract_page_fast
 
 
 @pytest.fixture(scope="module")
@@ -65,3 +76,131 @@ def test_empty_page(pdf):
     extracted, _ = extract(table_page, "?")
 
     assert extracted == ""
+
+
+def test_parallel_extraction_identical():
+    """Check that parallel extraction gives the same result as serial extraction.
+
+    Arrange: Select short example PDF.
+    Act: Extract all pages in this process and with two worker processes.
+    Assert: Check that texts and page numbers are identical.
+    """
+    pdf_path = "examples/1978-geschaeftsbericht-data_subset.pdf"
+
+    assert extract_pages(pdf_path, workers=2) == extract_pages(pdf_path, workers=1)
+
+
+def test_fast_extraction_identical(tmp_path):
+    """Check that the fast path extracts the same text as pdfplumber.
+
+    Arrange: Create synthetic report with a table on every 4th page.
+    Act: Extract example and report with both paths, count fast pages.
+    Assert: Check identical pages and that only table-free pages were fast.
+    """
+    report = synthetic_pdf(tmp_path / "report.pdf", 8)
+    for pdf_path in ["examples/1978-geschaeftsbericht-data_subset.pdf", report]:
+        assert extract_pages(pdf_path, fast=True) == extract_pages(pdf_path, fast=False)
+
+    timings = {}
+    with pdfplumber.open(report) as pdf:
+        for page in pdf.pages:
+            extract_page_fast(page, timings=timings)
+
+    assert timings["fast_pages"] == 6
+    assert timings["fallback_pages"] == 2
+
+
+def test_clean_text_matches_chained_replacements():
+    """Check that line breaks are removed like by the former replacements."""
+
+    def chained(text):
+        return (
+            text.replace(".\n", "****")
+            .replace(". \n", "****")
+            .replace("\n", "")
+            .replace("****", ".\n\n")
+        )
+
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice(["a", ".", " ", "\n", "*"]) for _ in range(12))
+        assert clean_text("x\n" + text) == (chained("x\n" + text), None)
+
+    assert clean_text("12 \nEin Satz.\nNeuer\nAbsatz") == (
+        "Ein Satz.\n\nNeuerAbsatz",
+        "12",
+    )
+
+
+def test_resolve_page_numbers():
+    """Check that page numbers are counted forward from identified numbers."""
+    page_results = [("a", None), ("b", "13"), ("c", None), ("d", "20")]
+
+    assert resolve_page_numbers(page_results) == [
+        ("a", "?"),
+        ("b", "13"),
+        ("c", 14),
+        ("d", "20"),
+    ]
+
+
+def test_table_precheck_skips_pages_without_lines():
+    """Check that table detection is skipped on pages without lines.
+
+    Arrange: Open short example PDF, with text on page 1 and table on page 3.
+    Act: Find tables on both pages and count skipped pages.
+    Assert: Check that only page 1 was skipped and page 3 has a table.
+    """
+    timings = {}
+    with pdfplumber.open("examples/1978-geschaeftsbericht-data_subset.pdf") as pdf:
+        text_bboxes = find_table_bboxes(pdf.pages[0], timings=timings)
+        table_bboxes = find_table_bboxes(pdf.pages[2], timings=timings)
+
+    assert text_bboxes == []
+    assert len(table_bboxes) == 1
+    assert timings["pages"] == 2
+    assert timings["pages_without_lines"] == 1
+    assert timings["pages_with_tables"] == 1
+
+
+def test_bbox_index_matches_not_within_bboxes():
+    """Check that the grid index excludes the same objects as the linear scan.
+
+    Arrange: Create grid of objects, including objects on the table borders.
+    Act: Test objects with BBoxIndex and not_within_bboxes().
+    Assert: Check that results agree for every object.
+    """
+    bboxes = [(10, 10, 100, 60), (120, 10, 300, 200), (50, 300, 250, 310)]
+    objs = [
+        {"x0": x, "x1": x + 4, "top": y, "bottom": y + 4}
+        for x in range(-10, 320, 3)
+        for y in range(-10, 320, 3)
+    ]
+    index = BBoxIndex(bboxes)
+
+    assert [index.not_within(obj) for obj in objs] == [
+        not_within_bboxes(obj, bboxes) for obj in objs
+    ]
+
+
+def test_extraction_cache_skips_pdfplumber(tmp_path, monkeypatch):
+    """Check that cached documents are loaded without opening the pdf.
+
+    Arrange: Extract short example PDF with extraction cache.
+    Act: Make opening pdfs fail and extract again.
+    Assert: Check that the result is identical and other versions miss.
+    """
+    pdf_path = "examples/1978-geschaeftsbericht-data_subset.pdf"
+    with ExtractionCache(tmp_path / "extraction.sqlite") as cache:
+        extracted = extract_pages(pdf_path, cache=cache)
+
+    def fail_open(*args, **kwargs):
+        raise AssertionError("The pdf must not be opened.")
+
+    monkeypatch.setattr(translation.extraction.pdfplumber, "open", fail_open)
+    with ExtractionCache(tmp_path / "extraction.sqlite") as cache:
+        assert extract_pages(pdf_path, cache=cache) == extracted
+
+    with ExtractionCache(tmp_path / "extraction.sqlite", version=0) as cache:
+        with pytest.raises(AssertionError):
+            extract_pages(pdf_path, cache=cache)
@@ -0,0 +1,39 @@
+"""This file contains tests to check the job journal of batch translation."""
+from translation.journal import file_hash
+from translation.journal import JobJournal
+
+
+def test_journal_resumes_pages(tmp_path):
+    """Check that recorded pages are returned for the same content only.
+
+    Arrange: Open journal and record a page of a file.
+    Act: Re-open journal and query completed pages.
+    Assert: Check that page is returned for matching hash only.
+    """
+    with JobJournal(tmp_path / "journal.sqlite") as journal:
+        journal.record_page("a.pdf", "hash", 3, "Translated page")
+
+    with JobJournal(tmp_path / "journal.sqlite") as journal:
+        assert journal.completed_pages("a.pdf", "hash") == {3: "Translated page"}
+        assert journal.completed_pages("a.pdf", "other") == {}
+
+
+def test_journal_file_done(tmp_path):
+    """Check that finished files are recognised by their content hash."""
+    with JobJournal(tmp_path / "journal.sqlite") as journal:
+        journal.record_page("a.pdf", "hash", 0, "Translated page")
+        journal.record_file("a.pdf", "hash", pages=1, seconds=0.1)
+
+        assert journal.is_done("a.pdf", "hash")
+        assert not journal.is_done("a.pdf", "changed")
+        assert journal.completed_pages("a.pdf", "hash") == {}
+
+
+def test_file_hash(tmp_path):
+    """Check that file hash changes with content."""
+    file = tmp_path / "a.pdf"
+    file.write_bytes(b"content")
+    first = file_hash(file)
+    file.write_bytes(b"changed")
+
+    assert first != file_hash(file)
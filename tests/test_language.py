@@ -0,0 +1,62 @@
+"""This file contains tests to check the language identification and routing."""
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.backends import LocalBackend
+from translation.language import detect_language
+from translation.language import LanguageRouter
+from translation.packing import translate_pages
+
+
+class RecordingBackend(LocalBackend):
+    """Local backend that records the source language of every request."""
+
+    def __init__(self, **kwargs):
+        """Initialize backend without recorded requests."""
+        super().__init__(transform=str.upper, **kwargs)
+        self.sources = []
+
+    def _translate_one(self, text, source):
+        """Record source language and upper-case the payload."""
+        self.sources.append(source)
+        return super()._translate_one(text, source)
+
+
+@pytest.mark.parametrize(
+    "text, language",
+    [
+        ("Die Bank hat im Jahr 1978 die Zinsen erhöht, und das ist gut.", "de"),
+        ("The bank raised the interest rates, which was good for the economy.", "en"),
+        ("La banque a augmenté les taux pour la première fois depuis 1975.", "fr"),
+        ("De bank heeft de rente verhoogd en dat is een goed teken.", "nl"),
+        ("Zinsen", None),
+        ("1978 1977 +3,5 % 12.000", None),
+    ],
+)
+def test_detect_language(text, language):
+    """Check that languages are identified and short text is undecided."""
+    assert detect_language(text) == language
+
+
+def test_translate_pages_routing():
+    """Check that only paragraphs in other languages are translated.
+
+    Arrange: Create page with German, English and numeric paragraph.
+    Act: Translate page with language router.
+    Assert: Check translation, source language and skipped bytes.
+    """
+    english = "The bank raised the interest rates, which was good for the economy."
+    numbers = "1978 1977 +3,5 % 12.000"
+    pages = [
+        f"Die Bank hat die Zinsen erhöht, und das ist gut.\n\n{english}\n\n{numbers}"
+    ]
+    backend = RecordingBackend()
+    router = LanguageRouter(target="en")
+
+    translated = translate_pages(pages, PunktSentenceTokenizer(), backend, router)
+
+    assert translated == [
+        f"DIE BANK HAT DIE ZINSEN ERHÖHT, UND DAS IST GUT.\n\n{english}\n\n{numbers}"
+    ]
+    assert backend.sources == ["de"]
+    assert router.stats()["bytes_skipped"] == len(english) + len(numbers)
@@ -0,0 +1,37 @@
+"""This file contains tests to check the memory use of the extraction."""
+import pytest
+
+from benchmarks.synthetic import synthetic_pdf
+from translation.extraction import extract_pages
+from translation.extraction import iter_extracted_pages
+from translation.metrics import current_memory_mb
+
+
+@pytest.mark.skipif(current_memory_mb() is None, reason="requires /proc")
+def test_memory_stays_flat(tmp_path):
+    """Check that memory does not grow with the number of extracted pages.
+
+    Without releasing pages, memory grows by about 0.3 MB per page here.
+    Arrange: Create synthetic pdf with 1000 pages.
+    Act: Extract pages one by one, measuring memory after 100 pages.
+    Assert: Check that memory grew by less than 40 MB until the last page.
+    """
+    pdf_path = synthetic_pdf(tmp_path / "long.pdf", 1000, max_chars=200)
+
+    memory_mb = {}
+    for page_index, _, _ in iter_extracted_pages(pdf_path):
+        if page_index in (99, 999):
+            memory_mb[page_index] = current_memory_mb()
+
+    assert memory_mb[999] - memory_mb[99] < 40
+
+
+def test_reopen_at_memory_limit():
+    """Check that reopening the pdf at the memory limit keeps the result."""
+    example_path = "examples/1978-geschaeftsbericht-data_subset.pdf"
+
+    extracted = list(iter_extracted_pages(example_path, memory_limit_mb=0))
+
+    assert [(text, number) for _, text, number in extracted] == extract_pages(
+        example_path
+    )
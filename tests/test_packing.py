@@ -0,0 +1,105 @@
+"""This file contains tests to check the packing of translation requests."""
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.auxiliary_extraction_translation import translate_page
+from translation.backends import LocalBackend
+from translation.packing import join_parts
+from translation.packing import Part
+from translation.packing import plan_requests
+from translation.packing import SENTINEL
+from translation.packing import split_translation
+from translation.packing import translate_pages
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """Initialize untrained nltk tokenizer, which does not need downloads."""
+    return PunktSentenceTokenizer()
+
+
+@pytest.fixture(scope="module")
+def pages():
+    """Create pages with many short paragraphs."""
+    paragraph = "Die Geldmenge ist gestiegen. Die Preise sind stabil."
+    return ["\n\n".join([paragraph] * 30) for _ in range(10)] + [""]
+
+
+def test_packing_reduces_requests(pages, tokenizer):
+    """Check that packing needs far fewer requests than paragraphs.
+
+    Arrange: Create local backends to count requests.
+    Act: Translate pages per paragraph and packed.
+    Assert: Check that packing cuts requests by an order of magnitude.
+    """
+    per_paragraph = LocalBackend()
+    packed = LocalBackend()
+
+    _ = [translate_page(page, tokenizer, backend=per_paragraph) for page in pages]
+    translate_pages(pages, tokenizer, packed)
+
+    assert per_paragraph.stats()["calls"] == 300
+    assert packed.stats()["calls"] * 10 <= per_paragraph.stats()["calls"]
+
+
+def test_requests_within_limit(pages, tokenizer):
+    """Check that no packed request exceeds the upload limit."""
+    requests, unpackable = plan_requests(pages, tokenizer, max_request_bytes=500)
+
+    assert unpackable == []
+    assert all(len(request) > 1 for request in requests)
+    assert max(len(join_parts(r).encode("utf-8")) for r in requests) < 500
+
+
+def test_requests_below_limit_at_boundary(tokenizer):
+    """Check that requests of exactly the upload limit are split.
+
+    Arrange: Create two paragraphs, which packed take exactly 100 bytes, and
+        a sentence of exactly 100 bytes.
+    Act: Plan requests with a limit of 100 bytes.
+    Assert: Check that the paragraphs are split and the sentence is unpackable.
+    """
+    first = "Erster Satz."
+    second = "x" * (99 - len(first) - len(SENTINEL.format(1))) + "."
+    boundary = "y" * 99 + "."
+
+    requests, unpackable = plan_requests(
+        [f"{first}\n\n{second}", boundary], tokenizer, max_request_bytes=100
+    )
+
+    assert len(join_parts([Part((0, 0), [first]), Part((0, 1), [second])])) == 100
+    assert [len(request) for request in requests] == [1, 1]
+    assert unpackable == [((1, 0), boundary)]
+
+
+def test_structure_is_restored(pages, tokenizer):
+    """Check that pages and paragraphs are restored after translation.
+
+    Arrange: Create local backend that upper-cases its input.
+    Act: Translate pages with packed requests.
+    Assert: Check that every paragraph is translated and in place.
+    """
+    backend = LocalBackend(transform=str.upper, max_request_bytes=500)
+
+    translated = translate_pages(pages, tokenizer, backend)
+
+    assert translated == [page.upper() for page in pages]
+
+
+def test_mangled_sentinels_fall_back(tokenizer):
+    """Check that requests are re-translated part by part if sentinels break.
+
+    Arrange: Create local backend that deletes the sentinel brackets.
+    Act: Translate pages with several paragraphs.
+    Assert: Check that every paragraph is still translated and in place.
+    """
+    backend = LocalBackend(transform=lambda text: text.replace("[[", "(("))
+    pages = ["Erster Absatz.\n\nZweiter Absatz.", "Dritter Absatz."]
+
+    assert translate_pages(pages, tokenizer, backend) == pages
+
+
+def test_split_translation_counts_parts():
+    """Check that missing sentinels are detected."""
+    assert split_translation("a [[1]] b [[2]] c", 3) == ["a", "b", "c"]
+    assert split_translation("a [[1]] b c", 3) is None
@@ -0,0 +1,68 @@
+"""This file contains tests to check the writers of translated pdfs."""
+import tracemalloc
+
+import pdfplumber
+import pytest
+
+from translation.pdf_writer import PDFWriter
+from translation.pdf_writer import StreamingPDFWriter
+
+
+@pytest.mark.parametrize("writer_class", [PDFWriter, StreamingPDFWriter])
+def test_writer_orders_pages(writer_class, tmp_path):
+    """Check that pages added out of order are written in order.
+
+    Arrange: Create writer for three pages.
+    Act: Add pages in reverse order and close writer.
+    Assert: Check number of pages and their order in the pdf.
+    """
+    with writer_class(tmp_path / "out.pdf", 3) as writer:
+        for page_index in [2, 1, 0]:
+            writer.add_page(page_index, f"Text of page {page_index}")
+
+    with pdfplumber.open(tmp_path / "out.pdf") as pdf:
+        texts = [page.extract_text() for page in pdf.pages]
+
+    assert len(texts) == 3
+    assert all(text.startswith(f"Text of page {i}") for i, text in enumerate(texts))
+
+
+def test_streaming_writer_saves_partial_pdf(tmp_path):
+    """Check that an interrupted streaming writer leaves a valid partial pdf.
+
+    Arrange: Create streaming writer for ten pages.
+    Act: Add two pages, then raise an error.
+    Assert: Check that output is a valid pdf with two pages.
+    """
+    with pytest.raises(KeyboardInterrupt):
+        with StreamingPDFWriter(tmp_path / "out.pdf", 10) as writer:
+            writer.add_page(0, "First page")
+            writer.add_page(1, "Second page")
+            raise KeyboardInterrupt
+
+    with pdfplumber.open(tmp_path / "out.pdf") as pdf:
+        assert len(pdf.pages) == 2
+    assert not (tmp_path / "out.pdf.tmp").exists()
+
+
+def test_streaming_writer_memory_flat(tmp_path):
+    """Check that memory of the streaming writer does not grow with text.
+
+    Arrange: Create long text for every page.
+    Act: Write 20 and 120 pages and trace peak memory.
+    Assert: Check that peak memory grows much less than the written text.
+    """
+    text = "Die Geldmenge ist gestiegen. " * 80
+
+    def peak_memory(n_pages):
+        tracemalloc.start()
+        with StreamingPDFWriter(tmp_path / f"{n_pages}.pdf", n_pages) as writer:
+            for page_index in range(n_pages):
+                writer.add_page(page_index, text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    growth = peak_memory(120) - peak_memory(20)
+
+    assert growth < 100 * len(text) / 2
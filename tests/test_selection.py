@@ -0,0 +1,131 @@
+"""This file contains tests to check the selection of pages."""
+import pdfplumber
+import pytest
+from fpdf import FPDF
+
+import translation.auxiliary_extraction_translation as auxiliary
+from benchmarks.synthetic import synthetic_pdf
+from translation.extraction import extract_pages
+from translation.extraction import iter_extracted_pages
+from translation.selection import enclosed_regions
+from translation.selection import PageSelection
+from translation.selection import parse_page_ranges
+from translation.selection import sniff_page
+
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory):
+    """Create synthetic report of 8 pages with a table on every 4th page."""
+    return synthetic_pdf(tmp_path_factory.mktemp("selection") / "report.pdf", 8)
+
+
+def test_parse_page_ranges():
+    """Check that page ranges are converted to page indices."""
+    assert parse_page_ranges("1-5, 10,20-") == [(0, 5), (9, 10), (19, None)]
+    with pytest.raises(ValueError):
+        parse_page_ranges("5-2")
+    with pytest.raises(ValueError):
+        parse_page_ranges("-")
+
+
+def test_sniff_page(report):
+    """Check that the first pass finds the text and the tables."""
+    with pdfplumber.open(report) as pdf:
+        sniffs = [sniff_page(pdf, page) for page in pdf.pages]
+        extracted = auxiliary.extract_page(pdf.pages[0])[0]
+
+    assert extracted.split()[0] in sniffs[0].text
+    assert [sniff.table_ratio > 0 for sniff in sniffs] == [
+        False,
+        False,
+        False,
+        True,
+    ] * 2
+
+
+def test_sniff_page_ignores_rules(tmp_path):
+    """Check that rules above and below the text of a page are no table.
+
+    Arrange: Create a page with text between a header and a footer rule, and
+        a page with a boxed paragraph.
+    Act: Sniff both pages.
+    Assert: Check that only the boxed text counts as table text.
+    """
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=10)
+    for box in [False, True]:
+        pdf.add_page()
+        pdf.line(20, 15, 190, 15)
+        pdf.set_xy(20, 30)
+        pdf.multi_cell(w=170, h=5, txt="Ein Satz mit etwas Text. " * 40)
+        if box:
+            pdf.set_xy(20, 100)
+            pdf.multi_cell(w=170, h=5, txt="Ein Kasten. " * 40, border=1)
+        pdf.line(20, 280, 190, 280)
+    pdf.output(tmp_path / "rules.pdf")
+
+    with pdfplumber.open(tmp_path / "rules.pdf") as pdf:
+        assert pdf.pages[0].find_tables() == []
+        ruled, boxed = [sniff_page(pdf, page) for page in pdf.pages]
+
+    assert ruled.table_ratio == 0
+    assert 0.2 < boxed.table_ratio < 0.8
+
+
+def test_enclosed_regions_keep_apart():
+    """Check that nearby boxes at slightly different levels are not joined.
+
+    Arrange: Create the edges of a box on the right and of a box on the left,
+        one point lower.
+    Act: Cluster the edges into regions.
+    Assert: Check that both boxes are separate regions.
+    """
+    right = [(500, 600, 100), (500, 600, 150)], [(500, 100, 150), (600, 100, 150)]
+    left = [(0, 10, 101), (0, 10, 151)], [(0, 101, 151), (10, 101, 151)]
+
+    regions = enclosed_regions(right[0] + left[0], right[1] + left[1])
+
+    assert sorted(regions) == [(0, 101, 10, 151), (500, 100, 600, 150)]
+
+
+def test_selected_pages_are_not_extracted(report, monkeypatch):
+    """Check that only selected pages are laid out, with the same result.
+
+    Arrange: Extract all pages, count calls of the extraction of a page.
+    Act: Extract a range of pages without table pages.
+    Assert: Check extracted pages and number of extracted pages.
+    """
+    extracted = extract_pages(report)
+    calls = []
+
+    def counting_extract_page(page, **kwargs):
+        calls.append(page.page_number)
+        return extract_page(page, **kwargs)
+
+    extract_page = auxiliary.extract_page
+    monkeypatch.setattr(auxiliary, "extract_page", counting_extract_page)
+    selection = PageSelection(pages="2-5,8", max_table_ratio=0.05)
+
+    selected = list(iter_extracted_pages(report, selection, fast=False))
+
+    assert [page_index for page_index, _, _ in selected] == [1, 2, 4]
+    assert [(text, number) for _, text, number in selected] == [
+        extracted[1],
+        extracted[2],
+        extracted[4],
+    ]
+    assert calls == [2, 3, 5]
+
+
+def test_keyword_selection(report):
+    """Check that pages are selected by keywords, ignoring case and spaces."""
+    with pdfplumber.open(report) as pdf:
+        first_words = [
+            auxiliary.extract_page(page)[0].split()[0] for page in pdf.pages[:2]
+        ]
+        selection = PageSelection(keywords=[first_words[1].upper()])
+        selected = list(selection.page_indices(pdf))
+        missing = list(PageSelection(keywords=["Inflationsrate"]).page_indices(pdf))
+
+    assert 1 in selected
+    assert missing == []
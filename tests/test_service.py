@@ -0,0 +1,127 @@
+"""This file contains tests to check the worker service."""
+import shutil
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+import pytest
+
+from translation.service import Job
+from translation.service import job_output_path
+from translation.service import JobQueue
+from translation.service import main
+from translation.service import serve
+
+EXAMPLE = "examples/1978-geschaeftsbericht-data_subset.pdf"
+
+
+@pytest.fixture()
+def corpus(tmp_path):
+    """Copy example PDF into a temporary corpus."""
+    corpus = tmp_path / "corpus"
+    (corpus / "BEL").mkdir(parents=True)
+    shutil.copy(EXAMPLE, corpus / "BEL" / Path(EXAMPLE).name)
+    return corpus
+
+
+def test_queue_claims_jobs_once(tmp_path):
+    """Check that jobs are claimed in order, once, and queued again at restart."""
+    with JobQueue(tmp_path / "jobs.sqlite") as queue:
+        first = queue.submit("a.pdf")
+        second = queue.submit("b.pdf", pages="1-2", target="fr")
+
+        with pytest.raises(ValueError):
+            queue.submit("c.pdf", pages="2-1")
+
+        claimed = queue.claim(1)
+        assert [job.id for job in claimed] == [first]
+        assert claimed[0].file == Path("a.pdf").resolve().as_posix()
+        assert queue.claim(5) == [
+            Job(second, Path("b.pdf").resolve().as_posix(), "1-2", "fr")
+        ]
+        assert queue.claim(5) == []
+
+        queue.finish(first, "a_out.pdf", 3)
+        assert queue.requeue_running() == 1
+        assert queue.get(second)["status"] == "queued"
+
+        stats = queue.stats()
+        assert (stats["queued"], stats["done"], stats["failed"]) == (1, 1, 0)
+        assert stats["latency_p50"] >= stats["run_mean"] >= 0
+
+
+def test_queue_requeues_expired_jobs_only(tmp_path):
+    """Check that jobs of other services are queued again once their lease expired.
+
+    Arrange: Let a live and a stopped service claim a job each.
+    Act: Queue running jobs again from a third service, renew the live lease.
+    Assert: Check that only the job of the stopped service is queued again.
+    """
+    path = tmp_path / "jobs.sqlite"
+    with JobQueue(path, owner="live") as live, JobQueue(
+        path, owner="stopped", lease_seconds=0
+    ) as stopped, JobQueue(path, owner="new") as new:
+        first = new.submit("a.pdf")
+        second = new.submit("b.pdf")
+        assert [job.id for job in live.claim(1)] == [first]
+        assert [job.id for job in stopped.claim(1)] == [second]
+        time.sleep(0.01)
+
+        assert new.requeue_running() == 1
+        assert new.get(first)["status"] == "running"
+        assert new.get(second)["status"] == "queued"
+
+        live.renew([first])
+        assert live.requeue_running(own=False) == 0
+        assert new.get(first)["owner"] == "live"
+        assert new.get(first)["lease"] > time.time() + 30
+
+
+def test_serve_translates_jobs(corpus):
+    """Check that the service translates queued jobs into the output layout.
+
+    Arrange: Submit a full job, a page range in French and a missing file.
+    Act: Serve the queue with local backend until it is empty.
+    Assert: Check output pdfs, job status and latency statistics.
+    """
+    pdf = corpus / "BEL" / Path(EXAMPLE).name
+    queue_path = corpus / "jobs.sqlite"
+    with JobQueue(queue_path) as queue:
+        full = queue.submit(pdf)
+        selected = queue.submit(pdf, pages="2-3", target="fr")
+        missing = queue.submit(corpus / "BEL" / "missing.pdf")
+
+    stats = serve(
+        queue_path, str(corpus), workers=2, backend_name="local", until_idle=True
+    )
+
+    output = corpus / "output" / "BEL"
+    with JobQueue(queue_path) as queue:
+        assert queue.get(full)["output"] == (output / pdf.name).as_posix()
+        assert queue.get(full)["n_pages"] == 3
+        assert (
+            queue.get(selected)["output"]
+            == (output / f"{pdf.stem}_selected_fr.pdf").as_posix()
+        )
+        assert queue.get(selected)["n_pages"] == 2
+        assert queue.get(missing)["status"] == "failed"
+        assert "does not exist" in queue.get(missing)["error"]
+
+    assert (output / pdf.name).exists()
+    assert (output / f"{pdf.stem}_selected_fr.pdf").exists()
+    assert (stats["done"], stats["failed"]) == (2, 1)
+    assert stats["latency_p95"] >= stats["latency_p50"] > 0
+
+
+def test_client_submits_jobs(corpus, capsys):
+    """Check that the client command submits jobs and reports their status."""
+    pdf = corpus / "BEL" / Path(EXAMPLE).name
+    main(["--dest-path", str(corpus), "submit", str(pdf), "--target", "de"])
+    main(["--dest-path", str(corpus), "serve", "--backend", "local", "--until-idle"])
+    main(["--dest-path", str(corpus), "status", "1"])
+    main(["--dest-path", str(corpus), "stats"])
+
+    printed = capsys.readouterr().out
+    assert "Submitted jobs 1." in printed
+    assert f"Job 1: done {pdf.resolve().as_posix()}" in printed
+    assert "1 done" in printed
+    assert job_output_path(Job(1, pdf.as_posix(), None, "de"), str(corpus)).exists()
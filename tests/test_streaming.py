@@ -0,0 +1,63 @@
+"""This file contains tests to check the streaming pipeline."""
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.backends import LocalBackend
+from translation.extraction import extract_pages
+from translation.packing import translate_pages
+from translation.streaming import iter_translated_pages
+from translation.streaming import prefetch
+
+EXAMPLE = "examples/1978-geschaeftsbericht-data_subset.pdf"
+
+
+def test_iter_translated_pages():
+    """Check that streamed pages equal the translation of all pages at once.
+
+    Arrange: Extract and translate the example pdf at once.
+    Act: Iterate over translated pages, one page per batch.
+    Assert: Check page order, page numbers, source and translated text.
+    """
+    tokenizer = PunktSentenceTokenizer()
+    extracted = extract_pages(EXAMPLE)
+    expected = translate_pages(
+        [text for text, _ in extracted], tokenizer, LocalBackend(transform=str.upper)
+    )
+
+    records = list(
+        iter_translated_pages(
+            EXAMPLE,
+            backend=LocalBackend(transform=str.upper),
+            tokenizer=tokenizer,
+            pages_per_batch=1,
+            lookahead=1,
+            routing=False,
+        )
+    )
+
+    assert [record.page_index for record in records] == list(range(len(extracted)))
+    assert [(r.source, r.page_number) for r in records] == extracted
+    assert [record.translated for record in records] == expected
+    assert all(record.extract_seconds > 0 for record in records)
+
+
+def test_prefetch():
+    """Check that prefetching keeps order, stops early and raises errors."""
+    produced = []
+
+    def numbers():
+        for number in range(100):
+            produced.append(number)
+            yield number
+
+    prefetched = prefetch(numbers(), 3)
+    assert [next(prefetched) for _ in range(5)] == list(range(5))
+    prefetched.close()
+    assert len(produced) <= 5 + 3 + 1
+
+    def failing():
+        yield 1
+        raise ValueError("extraction failed")
+
+    with pytest.raises(ValueError, match="extraction failed"):
+        list(prefetch(failing(), 3))
@@ -0,0 +1,64 @@
+"""This file contains tests to check the translation of tables."""
+import pdfplumber
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.backends import LocalBackend
+from translation.tables import normalize_cell
+from translation.tables import translate_tables
+from translation.text_extraction_translation import extract_and_translate_file
+
+
+def test_normalize_cell():
+    """Check that lines of cells are joined, also within hyphenated words."""
+    assert (
+        normalize_cell("Brutto-\ninlands-\nprodukt 1) ") == "Brutto-inlands-produkt 1)"
+    )
+    assert normalize_cell("+ 5,2 \n+ 4,6") == "+ 5,2 + 4,6"
+
+
+def test_translate_tables_deduplicates():
+    """Check that every label is translated once, in a single request.
+
+    Arrange: Create tables on two pages with recurring labels and numbers.
+    Act: Translate tables with local backend.
+    Assert: Check translated cells, numbers and statistics.
+    """
+    table = [
+        ["", "Kredite", "Einlagen"],
+        ["Januar", "1,5", "2,0"],
+        ["Insgesamt", "3", ""],
+    ]
+    tables = [[table], [], [table, [["Kredite", "Januar"]]]]
+    backend = LocalBackend(transform=str.upper)
+
+    translated, stats = translate_tables(tables, PunktSentenceTokenizer(), backend)
+
+    upper = [
+        ["", "KREDITE", "EINLAGEN"],
+        ["JANUAR", "1,5", "2,0"],
+        ["INSGESAMT", "3", ""],
+    ]
+    assert translated == [[upper], [], [upper, [["KREDITE", "JANUAR"]]]]
+    assert stats["cells"] == 20
+    assert stats["text_cells"] == 10
+    assert stats["unique_labels"] == 4
+    assert stats["dedup_ratio"] == 2.5
+    assert stats["requests"] == backend.stats()["calls"] == 1
+
+
+def test_workflow_writes_tables(tmp_path):
+    """Check that translated tables are written to the output pdf."""
+    pdf_path = "examples/1978-geschaeftsbericht-data_subset.pdf"
+
+    output_path = extract_and_translate_file(
+        file_path=pdf_path,
+        destination_path=str(tmp_path) + "/",
+        paths_relative=False,
+        backend=LocalBackend(transform=str.upper),
+        tables=True,
+    )
+
+    with pdfplumber.open(output_path) as pdf:
+        text = "".join(page.extract_text() for page in pdf.pages)
+    assert "ENTWICKLUNG DES" in text
+    assert "VORLÄUFIG" in text
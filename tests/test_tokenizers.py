@@ -0,0 +1,82 @@
+"""This file contains tests to check the registry of sentence tokenizers."""
+import pickle
+
+import nltk
+import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.tokenizers import add_data_dir
+from translation.tokenizers import clear_tokenizers
+from translation.tokenizers import get_tokenizer
+from translation.tokenizers import preload_tokenizers
+from translation.tokenizers import SharedTokenizer
+
+
+@pytest.fixture()
+def registry():
+    """Provide an empty tokenizer registry."""
+    clear_tokenizers()
+    yield
+    clear_tokenizers()
+
+
+@pytest.fixture()
+def bundled_data(tmp_path):
+    """Create nltk data directory with punkt tokenizer of a made-up language."""
+    tokenizer = PunktSentenceTokenizer("Das ist ein Satz. Das ist noch ein Satz.")
+
+    # Like nltk_data, with a copy for Python 3 in "PY3/"
+    for punkt_dir in [tmp_path / "tokenizers/punkt", tmp_path / "tokenizers/punkt/PY3"]:
+        punkt_dir.mkdir(parents=True)
+        with open(punkt_dir / "bundled.pickle", "wb") as file:
+            pickle.dump(tokenizer, file)
+
+    return tmp_path
+
+
+def test_bundled_tokenizer_loaded_once(registry, bundled_data, monkeypatch):
+    """Check that a bundled tokenizer is loaded once and never downloaded.
+
+    Arrange: Add bundled nltk data, make downloads fail.
+    Act: Get tokenizer twice.
+    Assert: Check that the same tokenizer is returned and it splits sentences.
+    """
+
+    def fail_download(*args, **kwargs):
+        raise AssertionError("The tokenizer must not be downloaded.")
+
+    monkeypatch.setattr(nltk, "download", fail_download)
+    # Restore the search path of nltk, which must not keep the temporary data
+    monkeypatch.setattr(nltk.data, "path", list(nltk.data.path))
+    add_data_dir(bundled_data)
+
+    tokenizer = get_tokenizer("bundled")
+
+    assert get_tokenizer("bundled") is tokenizer
+    assert str(bundled_data) in nltk.data.path
+    assert tokenizer.tokenize("Ich liebe Python. Du auch?") == [
+        "Ich liebe Python.",
+        "Du auch?",
+    ]
+
+
+def test_missing_tokenizer_offline(registry):
+    """Check that a missing tokenizer falls back to an untrained tokenizer."""
+    with pytest.warns(UserWarning):
+        load_seconds = preload_tokenizers(["missing"], download=False)
+
+    assert list(load_seconds) == ["missing"]
+    assert get_tokenizer("missing").tokenize("Eins. Zwei.") == ["Eins.", "Zwei."]
+
+
+def test_shared_tokenizer():
+    """Check that a shared tokenizer splits every text only once."""
+    tokenizer = SharedTokenizer(PunktSentenceTokenizer())
+    text = "Das ist ein Satz. Das ist noch ein Satz."
+
+    first = tokenizer.tokenize(text)
+    first.append("changed")
+
+    assert tokenizer.tokenize(text) == ["Das ist ein Satz.", "Das ist noch ein Satz."]
+    assert tokenizer.hits == 1
+    assert len(tokenizer) == 1
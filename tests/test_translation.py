@@ -1,8 +1,14 @@
 """This file contains tests to check the translation function."""
+import math
+
 import pytest
+from nltk.tokenize.punkt import PunktSentenceTokenizer
 
 from translation.auxiliary_extraction_translation import initialize_tokenizer
+from translation.auxiliary_extraction_translation import plan_chunks
+from translation.auxiliary_extraction_translation import split_oversized
 from translation.auxiliary_extraction_translation import translate_extracted
+from translation.backends import LocalBackend
 
 
 @pytest.fixture(scope="module")
@@ -62,3 +68,47 @@ def test_long_sentence(tokenizer):
     translation = translate_extracted(text, tokenizer)
 
     assert translation.find("<<Omitted Word >= 5000bytes>>") > 0
+
+
+def test_plan_chunks():
+    """Check that chunks stay below the limit and long sentences are alone.
+
+    Arrange: Create sentences of 5, 8, 30 and 4 bytes.
+    Act: Plan chunks with limit of 20 bytes.
+    Assert: Check the slices of the sentences.
+    """
+    sentences = ["aaaa.", "bbbbbbb.", "c" * 29 + ".", "ddd."]
+
+    chunks = plan_chunks(sentences, limit=20)
+
+    assert chunks == [slice(0, 2), slice(2, 3), slice(3, 4)]
+    assert [" ".join(sentences[chunk]) for chunk in chunks][0] == "aaaa. bbbbbbb."
+
+
+def test_split_oversized():
+    """Check that pieces of an oversized sentence end at clause punctuation."""
+    sentence = "Bank und Kredit, " * 10 + "Zentralbank"
+
+    pieces = split_oversized(sentence, limit=40)
+
+    assert all(len(piece.encode("utf-8")) < 40 for piece in pieces)
+    assert all(piece.endswith(",") for piece in pieces[:-1])
+    assert " ".join(pieces) == sentence
+
+
+def test_oversized_sentence_requests():
+    """Check that an oversized sentence needs few requests.
+
+    Arrange: Create sentence of 24000 bytes without punctuation.
+    Act: Translate sentence with local backend.
+    Assert: Check that ceil(bytes / 5000) requests were sent.
+    """
+    sentence = " ".join(["Zentralbank"] * 2000)
+    backend = LocalBackend()
+
+    translation = translate_extracted(
+        sentence, PunktSentenceTokenizer(), backend=backend
+    )
+
+    assert translation.split() == sentence.split()
+    assert backend.stats()["calls"] == math.ceil(len(sentence.encode("utf-8")) / 5000)
@@ -0,0 +1,121 @@
+"""This file contains tests to check the fuzzy translation memory."""
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+from translation.backends import LocalBackend
+from translation.memory import content_words
+from translation.memory import jaccard
+from translation.memory import mask_numbers
+from translation.memory import shingles
+from translation.memory import substitute_numbers
+from translation.memory import TranslationMemory
+from translation.packing import translate_pages
+
+PARAGRAPH = (
+    "Die Geldmenge M3 ist im Jahr {year} um {rate} % gestiegen, nachdem sie im"
+    " Vorjahr um 9,1 % zugenommen hatte. Die Bundesbank hat ihr Ziel für das"
+    " Wachstum der Zentralbankgeldmenge damit {verb} überschritten."
+)
+
+
+def test_mask_numbers():
+    """Check that numbers and dates are masked."""
+    masked, numbers = mask_numbers("Am 31.12.1978 lag der Zins bei 3,5 % (12.000).")
+
+    assert masked == "Am <n> lag der Zins bei <n> % (<n>)."
+    assert numbers == ["31.12.1978", "3,5", "12.000"]
+
+
+def test_substitute_numbers():
+    """Check that numbers are substituted in the format of the translation."""
+    translation = "In 1978 the rate rose to 3.5%, after 9.1% in the year before."
+    old = ["1978", "3,5", "9,1"]
+
+    assert substitute_numbers(translation, old, ["1979", "4,2", "9,1"]) == (
+        "In 1979 the rate rose to 4.2%, after 9.1% in the year before."
+    )
+    assert substitute_numbers(translation, old, old) == translation
+    # Numbers of the same digits cannot be told apart
+    assert substitute_numbers("3.5 and 3.5", ["3,5", "3,5"], ["1", "2"]) is None
+    assert substitute_numbers(translation, old, ["1979"]) is None
+
+
+def test_memory_lookup(tmp_path):
+    """Check that similar paragraphs are found, different ones are not.
+
+    Arrange: Store the translation of a paragraph.
+    Act: Look up paragraphs with other numbers, numbers in brackets, another
+        word, other content and another language pair.
+    Assert: Check reused translations and statistics.
+    """
+    paragraph = PARAGRAPH.format(year="1978", rate="11,5", verb="deutlich")
+    translation = paragraph.upper()
+
+    with TranslationMemory(tmp_path / "memory.sqlite", threshold=0.8) as memory:
+        memory.add_many([(paragraph, translation)], "local:de:en")
+        numbers = memory.lookup(
+            PARAGRAPH.format(year="1979", rate="6,3", verb="deutlich"), "local:de:en"
+        )
+        brackets = memory.lookup(
+            PARAGRAPH.format(year="(1979)", rate="6,3", verb="deutlich"), "local:de:en"
+        )
+        word = memory.lookup(
+            PARAGRAPH.format(year="1978", rate="11,5", verb="erneut"), "local:de:en"
+        )
+        other = memory.lookup("Die Zinsen sind 1979 gestiegen.", "local:de:en")
+        pair = memory.lookup(paragraph, "local:de:fr")
+        stats = memory.stats()
+
+    assert numbers == PARAGRAPH.format(year="1979", rate="6,3", verb="DEUTLICH").upper()
+    assert brackets == numbers
+    assert word is None
+    assert other is None
+    assert pair is None
+    assert stats["memory_lookups"] == 5
+    assert stats["reused"] == 2
+
+
+def test_memory_ignores_changed_words(tmp_path):
+    """Check that a paragraph with a changed word is translated anew.
+
+    Arrange: Store the translation of a paragraph.
+    Act: Look up the paragraph with "gesunken" instead of "gestiegen", and
+        with an inserted "nicht", at a low threshold.
+    Assert: Check that neither reuses the translation.
+    """
+    paragraph = PARAGRAPH.format(year="1978", rate="11,5", verb="deutlich")
+
+    with TranslationMemory(tmp_path / "memory.sqlite", threshold=0.5) as memory:
+        memory.add_many([(paragraph, "rose")], "local:de:en")
+        fallen = memory.lookup(
+            paragraph.replace("gestiegen", "gesunken"), "local:de:en"
+        )
+        negated = memory.lookup(paragraph.replace("hat", "hat nicht"), "local:de:en")
+
+    assert fallen is None
+    assert negated is None
+    assert content_words("Im Jahr (<n>) um <n>-<n> %") == ["Im", "Jahr", "um", "%"]
+
+
+def test_translate_pages_with_memory(tmp_path):
+    """Check that paragraphs of the next year are not sent to the backend."""
+    tokenizer = PunktSentenceTokenizer()
+    first = [PARAGRAPH.format(year="1978", rate="11,5", verb="deutlich")]
+    second = [PARAGRAPH.format(year="1979", rate="6,3", verb="deutlich")]
+
+    with TranslationMemory(tmp_path / "memory.sqlite", threshold=1.0) as memory:
+        translate_pages(
+            first, tokenizer, LocalBackend(transform=str.upper), memory=memory
+        )
+        backend = LocalBackend(transform=str.upper)
+        translated = translate_pages(second, tokenizer, backend, memory=memory)
+
+    assert translated == [second[0].upper()]
+    assert backend.stats()["calls"] == 0
+
+
+def test_shingle_similarity():
+    """Check that the similarity of paragraphs differing in a word is high."""
+    first = shingles(mask_numbers(PARAGRAPH.format(year=1, rate=2, verb="a"))[0])
+    second = shingles(mask_numbers(PARAGRAPH.format(year=1, rate=2, verb="b"))[0])
+
+    assert 0.8 < jaccard(first, second) < 1.0
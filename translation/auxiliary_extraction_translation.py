@@ -1,13 +1,23 @@
 """This file contains the script for extracting and translating text from pdf."""
 import os
+import re
+import time
 from functools import partial
 from pathlib import Path  # for Windows/Unix compatibility
 
-import nltk.data  # natural language processing
 import pdfplumber
-from deep_translator import GoogleTranslator
 from fpdf import FPDF
 
+from translation.backends import GoogleBackend
+from translation.backends import InvalidPayloadError
+from translation.tokenizers import get_tokenizer
+
+# Whitespace after clause punctuation, where oversized sentences are split
+CLAUSE_BREAK = re.compile(r"(?<=[,;:)\]])\s+")
+
+# Line breaks, group 1 is set at the end of a sentence (paragraph break)
+LINE_BREAK = re.compile(r"(\. ?)?\n")
+
 
 class CustomPDF(FPDF):
     """Custom Class for FPDF."""
@@ -97,6 +107,8 @@ def create_destination_dir(destination_folder, file_path):
 def get_table_settings(p):
     """Create Dictionary for find_tables().
 
+    The edges of curves, lines and rects are computed once and used
+    as explicit vertical and horizontal lines.
     Args: pdfplumber page Object
     Returns: dictionary
     """
@@ -111,12 +123,15 @@ def get_table_settings(p):
             edges += pdfplumber.utils.rect_to_edges(c)
         return edges
 
+    # find_tables() only reads the lines, such that both can share them
+    explicit_lines = curves_to_edges(p.curves + p.edges)
+
     # Table settings.
     ts = {
         "vertical_strategy": "explicit",
         "horizontal_strategy": "explicit",
-        "explicit_vertical_lines": curves_to_edges(p.curves + p.edges),
-        "explicit_horizontal_lines": curves_to_edges(p.curves + p.edges),
+        "explicit_vertical_lines": explicit_lines,
+        "explicit_horizontal_lines": explicit_lines,
         "intersection_y_tolerance": 10,
     }
     return ts
@@ -138,13 +153,109 @@ def not_within_bboxes(obj, bboxes):  # or add bboxes?
     return not any(obj_in_bbox(__bbox) for __bbox in bboxes)
 
 
-def extract(page, page_counter):
-    """Extract text from a Page Object.
+class BBoxIndex:
+    """Grid index of bounding boxes for testing whether objects lie in them.
+
+    Each bounding box is registered in the cells of a uniform grid it
+    overlaps, such that an object is only tested against the boxes in the
+    cell of its midpoint instead of all boxes. Follows the definition of
+    "within" of not_within_bboxes().
+    Args:
+        bboxes: list of (x0, top, x1, bottom) tuples
+        cell_size: float with width and height of grid cells in points
+    """
+
+    def __init__(self, bboxes, cell_size=50):
+        """Register bounding boxes in the grid."""
+        self.cell_size = cell_size
+        self.grid = {}
+        for bbox in bboxes:
+            x0, top, x1, bottom = bbox
+            for column in range(int(x0 // cell_size), int(x1 // cell_size) + 1):
+                for row in range(int(top // cell_size), int(bottom // cell_size) + 1):
+                    self.grid.setdefault((column, row), []).append(bbox)
+
+    def contains(self, h_mid, v_mid):
+        """Check if a point is in any of the bounding boxes."""
+        cell = (int(h_mid // self.cell_size), int(v_mid // self.cell_size))
+        for x0, top, x1, bottom in self.grid.get(cell, ()):
+            if (h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom):
+                return True
+        return False
+
+    def not_within(self, obj):
+        """Check if the object is in none of the bounding boxes.
+
+        Drop-in replacement for `partial(not_within_bboxes, bboxes=bboxes)`.
+        """
+        return not self.contains(
+            (obj["x0"] + obj["x1"]) / 2, (obj["top"] + obj["bottom"]) / 2
+        )
+
+
+def has_table_lines(page):
+    """Check cheaply whether a page can contain tables.
+
+    With default settings find_tables() builds tables from the lines and
+    rects of a page, i.e. without them no tables are found.
+    """
+    return bool(page.lines or page.rects)
+
+
+def find_table_bboxes(page, timings=None, tables=None):
+    """Find the bounding boxes of the tables on a page.
+
+    Pages without lines and rects are skipped. On all other pages, tables
+    are first searched with default settings and, if any are found, their
+    bounding boxes are determined with the settings of get_table_settings().
+    Args:
+        page: pdfplumber page Object
+        timings: dictionary to which counters and seconds spent are added
+        tables: list to which the pdfplumber Table objects are appended
+    Returns: list of bounding boxes
+    """
+    if timings is None:
+        timings = {}
+    start = time.perf_counter()
+
+    # Pre-check, without lines there are no tables
+    if not has_table_lines(page):
+        bboxes = []
+        timings["pages_without_lines"] = timings.get("pages_without_lines", 0) + 1
+
+    elif page.find_tables() == []:
+        bboxes = []
+
+    else:
+        # Get the bounding boxes of the tables on the page.
+        # Adapted from
+        # https://github.com/jsvine/pdfplumber/issues/242#issuecomment-668448246
+        ts = get_table_settings(page)
+        found = page.find_tables(table_settings=ts)
+        bboxes = [table.bbox for table in found]
+        if tables is not None:
+            tables.extend(found)
+        timings["pages_with_tables"] = timings.get("pages_with_tables", 0) + 1
+
+    timings["pages"] = timings.get("pages", 0) + 1
+    timings["find_tables"] = timings.get("find_tables", 0) + (
+        time.perf_counter() - start
+    )
+    return bboxes
+
+
+def extract_page(page, timings=None, tables=None):
+    """Extract text and page number from a Page Object.
 
     Wrapper for pdfplumber function, to be applied to a Page Object.
     Eliminates tables, page numbers and in-paragraph line breaks.
-    Returns a string and page number. Uses the variable
-    page_counter.
+    Does not depend on other pages, such that pages can be extracted
+    independently of each other (e.g. in parallel).
+    Returns a string and the page number found on the page (string),
+    None if the page has no page number. Counters and time spent on
+    finding tables are added to the dictionary `timings`, if given. The
+    cells of the tables are appended to the list `tables`, if given, as
+    lists of rows of strings.
     """
     # Assert is class pdfplumber page
     assert isinstance(
@@ -152,68 +263,180 @@ def extract(page, page_counter):
     ), "`page` needs to be object of type pdfplumber.page.Page"
 
     # Step 1: Extract text, exclude tables
-    if page.find_tables() != []:
-        # Get the bounding boxes of the tables on the page.
-        # Adapted from
-        # https://github.com/jsvine/pdfplumber/issues/242#issuecomment-668448246
-        ts = get_table_settings(page)
-        bboxes = [table.bbox for table in page.find_tables(table_settings=ts)]
-
-        bbox_not_within_bboxes = partial(not_within_bboxes, bboxes=bboxes)
-
+    found = [] if tables is not None else None
+    bboxes = find_table_bboxes(page, timings=timings, tables=found)
+    if tables is not None:
+        tables.extend(
+            [[cell or "" for cell in row] for row in table.extract()] for table in found
+        )
+    if bboxes != []:
         # Filter-out tables from page
-        page = page.filter(bbox_not_within_bboxes)
+        page = page.filter(BBoxIndex(bboxes).not_within)
 
     # Extract text
     extracted = page.extract_text()
 
+    return clean_text(extracted)
+
+
+def clean_text(extracted):
+    """Remove the page number and in-paragraph line breaks from a page's text.
+
+    Args:
+        extracted: string with text of a page, as extracted by pdfplumber
+    Returns: string with text and string with page number (None if not found)
+    """
     # Step 2: Get Page Number
     # First line should be page number
-    if extracted[: extracted.find("\n") - 1].isdigit():
-        page_number = extracted[: extracted.find("\n") - 1]
+    first_break = extracted.find("\n")
+    if extracted[: first_break - 1].isdigit():
+        page_number = extracted[: first_break - 1]
 
         # Delete page_number (i.e. first line) from text
-        extracted = extracted[extracted.find("\n") :]
+        extracted = extracted[first_break:]
+    else:
+        page_number = None
+
+    # Step 3: Delete in-paragraph line breaks, keep paragraph breaks after
+    # sentences. The former chained replacements marked paragraph breaks
+    # with "****", which also turned asterisks of the text into breaks.
+    if "*" in extracted:
+        extracted = (
+            extracted.replace(".\n", "****")
+            .replace(". \n", "****")
+            .replace("\n", "")
+            .replace("****", ".\n\n")
+        )
     else:
-        # See if we can count forward from previously identified page number
-        if page_counter != "?":
-            page_number = int(page_counter) + 1
+        extracted = LINE_BREAK.sub(_join_line, extracted)
+
+    return extracted, page_number
+
+
+def _join_line(match):
+    """Replace a line break, see LINE_BREAK."""
+    return ".\n\n" if match.group(1) else ""
+
+
+def resolve_page_number(page_number, page_counter):
+    """Determine the page number of a page.
+
+    Args:
+        page_number: string with page number found on the page or None
+        page_counter: page number of the previous page, "?" if unknown
+    Returns: page number found on the page, else counted forward from
+        page_counter if known, else "?"
+    """
+    if page_number is not None:
+        return page_number
+
+    # See if we can count forward from previously identified page number
+    if page_counter != "?":
+        return int(page_counter) + 1
+    return page_counter
+
+
+def extract(page, page_counter):
+    """Extract text from a Page Object.
+
+    Wrapper for pdfplumber function, to be applied to a Page Object.
+    Eliminates tables, page numbers and in-paragraph line breaks.
+    Returns a string and page number. Uses the variable
+    page_counter.
+    """
+    extracted, page_number = extract_page(page)
+
+    return extracted, resolve_page_number(page_number, page_counter)
+
+
+def initialize_tokenizer(language="english"):
+    """Initialize nltk tokenizer.
+
+    The tokenizer is loaded once per process and language, see get_tokenizer().
+    """
+    return get_tokenizer(language)
+
+
+def plan_chunks(sentences, limit=5000):
+    """Collect sentences into chunks within an upload limit.
+
+    Sentences are added to a chunk as long as the chunk, with sentences joined
+    by a space, stays within `limit` bytes. Sentences of `limit` bytes or
+    more form a chunk of their own. The size of every sentence is computed
+    once, such that planning takes linear time.
+    Args:
+        sentences: list of strings
+        limit: int with upload limit in bytes
+    Returns: list of slices of `sentences`, one for each chunk
+    """
+    chunks = []
+
+    # Initialize chunk, its size includes the leading space of a chunk that
+    # started from an empty container (see translate_extracted())
+    start = 0
+    chunk_bytes = 0
+
+    for i, sentence in enumerate(sentences):
+        size = len(sentence.encode("utf-8"))
+
+        # if chunck together with current sentence is below limit, add the sentence
+        if size + chunk_bytes < limit:
+            chunk_bytes += size + 1
+            continue
+
+        # else close chunck, if not empty
+        if i > start:
+            chunks.append(slice(start, i))
+
+        # start new chunck with current sentence, or keep sentence on its own
+        if size < limit:
+            start, chunk_bytes = i, size
         else:
-            page_number = page_counter
+            chunks.append(slice(i, i + 1))
+            start, chunk_bytes = i + 1, 0
 
-    # Step 3: Delete in-paragraph line breaks
-    extracted = (
-        extracted.replace(".\n", "****")  # keep paragraph breaks
-        .replace(". \n", "****")  # keep paragraph breaks
-        .replace("\n", "")  # delete in-paragraph breaks (i.e. all remaining \n)
-        .replace("****", ".\n\n")
-    )  # restore paragraph breaks
+    if start < len(sentences):
+        chunks.append(slice(start, len(sentences)))
 
-    return extracted, page_number
+    return chunks
 
 
-def initialize_tokenizer():
-    """Initialize nltk tokenizer."""
-    # Set-up natural language processing
-    # TODO: need different tokenizer for different language?
-    nltk.data.path.append(
-        "/tmp/"
-    )  # Tell the NLTK data loader to look for resource files in /tmp/
-    nltk.download("punkt", download_dir="/tmp/")  # Download NLTK tokenizers to /tmp/
+def split_oversized(sentence, limit=5000):
+    """Split a sentence of `limit` bytes or more into pieces below the limit.
 
-    return nltk.data.load(
-        "tokenizers/punkt/english.pickle"
-    )  # Load the English language tokenizer
+    The sentence is broken at clause punctuation and clauses that are still
+    too long at whitespace. The resulting pieces are packed greedily into as
+    few pieces below the limit as possible (see plan_chunks()). Words of
+    `limit` bytes or more cannot be split and are returned on their own.
+    Args:
+        sentence: string to be split
+        limit: int with upload limit in bytes
+    Returns: list of strings
+    """
+    pieces = []
+    for clause in CLAUSE_BREAK.split(sentence):
+        if len(clause.encode("utf-8")) < limit:
+            pieces.append(clause)
+        else:
+            pieces.extend(clause.split())
+
+    # Chunks of plan_chunks() may reach the limit, stay below it
+    return [" ".join(pieces[chunk]) for chunk in plan_chunks(pieces, limit - 1)]
 
 
-def translate_extracted(extracted, tokenizer):
-    """Translate strings of any size with Googletranslator.
+def translate_extracted(extracted, tokenizer, backend=None, source=None):
+    """Translate strings of any size with a translator backend.
 
-    Wrapper for Google Translate with upload workaround.This functions works
+    Wrapper for the translator backend with upload workaround.This functions works
     around the upload limit of 50000 chars by collecting chuncks of sentences
     that are below this limit and translate them individually - sentences longer
-    than 5000 chars are divided in half. Sentences are identified using `nltk` natural
-    language processing.
+    than 5000 chars are split into pieces below the limit (see split_oversized()).
+    Sentences are identified using `nltk` natural language processing.
+    Args:
+        extracted: string to be translated
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object, defaults to GoogleBackend
+        source: string with source language, defaults to `source` of the backend
     Returns: a string
     """
     ###################################
@@ -221,68 +444,91 @@ def translate_extracted(extracted, tokenizer):
     ###################################
 
     # Set-up and wrap translation client
-    translate = GoogleTranslator(source="auto", target="en").translate
+    if backend is None:
+        backend = GoogleBackend(source="auto", target="en")
+    translate = partial(backend.translate, source=source)
 
     # Split input text into a list of sentences
     sentences = tokenizer.tokenize(extracted)
 
-    # Invalid input
-    invalid_chars = ["", " ", "\n\n", "_", "-"]
-
     ###################################
     #     Translation
     ###################################
 
-    # Initialize containers
-    translated_text = ""
-    source_text_chunk = ""
+    # Collect translated pieces, joined once at the end
+    translated_pieces = []
 
-    # collect chuncks of sentences below limit and translate them individually
-    for sentence in sentences:
-        # if chunck together with current sentence is below limit, add the sentence
-        if (
-            len(sentence.encode("utf-8")) + len(source_text_chunk.encode("utf-8"))
-            < 5000
-        ):
-            source_text_chunk += " " + sentence
+    # Chunks that start from an empty container begin with a space
+    leading = " "
 
-        # else translate chunck and start new one with current sentence
+    # collect chuncks of sentences below limit and translate them individually
+    chunks = plan_chunks(sentences, 5000)
+    for i, chunk in enumerate(chunks):
+        sentence = sentences[chunk.start]
+
+        # if sentence larger than 5000 chars, divide-up sentence into as few
+        # pieces as possible, translate each separately and start chunck from zero
+        if chunk.stop - chunk.start == 1 and len(sentence.encode("utf-8")) >= 5000:
+            for piece in split_oversized(sentence, 5000):
+                # Check validity of piece
+                if len(piece.encode("utf-8")) >= 5000:  # if too long
+                    piece = "<<Omitted Word >= 5000bytes>>"
+                    translated_pieces.append(" " + piece)
+                else:
+                    try:
+                        translated_pieces.append(" " + translate(piece))
+                    except InvalidPayloadError:
+                        translated_pieces.append(" " + piece)
+
+            leading = " "
+            continue
+
+        source_text_chunk = leading + " ".join(sentences[chunk])
+        leading = ""
+
+        # Ignore invalid input in the final chunk of input text, errors of the
+        # backend (e.g. throttling) need to reach the caller
+        if i == len(chunks) - 1:
+            try:
+                translated_pieces.append(" " + translate(source_text_chunk))
+            except InvalidPayloadError:
+                pass
         else:
-            # if current chunck not empty translate
-            if source_text_chunk != "":
-                translated_text += " " + translate(source_text_chunk)
-
-            # if current sentence smaller than 5000 chars, start new chunck
-            if len(sentence.encode("utf-8")) < 5000:
-                source_text_chunk = sentence
-
-            # else, divide-up sentence, translate each word separately and start
-            # chunck from zero
-            else:
-                # Split sentence into list of words
-                sentence_list = sentence.split(" ")
-
-                for word in sentence_list:
-                    # Check validity of word
-                    if word in invalid_chars:
-                        translated_text += word
-                    elif len(word.encode("utf-8")) >= 5000:  # if too long
-                        word = "<<Omitted Word >= 5000bytes>>"
-                        translated_text += " " + word
-                    else:
-                        translated_text += translate(word)
-
-                # Re-set text container to empty
-                source_text_chunk = ""
-
-    # Translate the final chunk of input text, if there is any valid text
-    # left to translate
-    try:
-        translated_text += " " + translate(source_text_chunk)
-    except Exception:
-        AssertionError, "Invalid input"
-
-    return translated_text
+            translated_pieces.append(" " + translate(source_text_chunk))
+
+    return "".join(translated_pieces)
+
+
+def translate_page(extracted, tokenizer, backend=None, router=None):
+    r"""Translate the extracted text of a page paragraph by paragraph.
+
+    Paragraphs are separated by "\n\n" and translated individually
+    with translate_extracted(), to keep the paragraphs of the page. With a
+    LanguageRouter, paragraphs that do not need translation are kept as is
+    (see translate_pages()).
+    Returns: a string
+    """
+    if extracted == "":
+        return extracted
+
+    # Translate paragraphs individually to keep
+    paragraphs = extracted.split("\n\n")
+    translated = []
+    for paragraph in paragraphs:
+        source = None
+        if router is not None:
+            translate, language = router.route(paragraph)
+            if not translate:
+                translated.append(paragraph)
+                continue
+            if backend is None or backend.source == "auto":
+                source = language
+
+        translated.append(
+            translate_extracted(paragraph, tokenizer, backend=backend, source=source)
+        )
+
+    return "\n\n".join(translated)
 
 
 def initialize_pdf_storage():
@@ -295,7 +541,44 @@ def initialize_pdf_storage():
     return pdf
 
 
-def write_to_page(text, page_number, pdf):
+def to_latin1(text):
+    """Replace characters that cannot be written with the pdf font."""
+    return text.encode("latin-1", errors="replace").decode("latin-1")
+
+
+def write_table(rows, pdf, line_height=4):
+    """Write the rows of a table as grid at the current position.
+
+    Cells are wrapped to the width of their column, rows which do not fit on
+    the page are continued on a new page.
+    Args:
+        rows: list of lists of strings with the cells of each row
+        pdf: FPDF CustomPDF object
+        line_height: float with height of a line of text in mm
+    """
+    n_columns = max(len(row) for row in rows)
+    width = pdf.epw / n_columns
+    for row in rows:
+        cells = [to_latin1(cell) for cell in row] + [""] * (n_columns - len(row))
+        n_lines = max(
+            len(pdf.multi_cell(w=width, h=line_height, txt=cell, split_only=True))
+            for cell in cells
+        )
+        height = max(n_lines, 1) * line_height
+
+        if pdf.get_y() + height > pdf.page_break_trigger:
+            pdf.add_page()
+        x, y = pdf.l_margin, pdf.get_y()
+        for column, cell in enumerate(cells):
+            pdf.rect(x + column * width, y, width, height)
+            pdf.set_xy(x + column * width, y)
+            pdf.multi_cell(w=width, h=line_height, txt=cell, align="L")
+        pdf.set_xy(x, y + height)
+
+    pdf.ln(line_height)
+
+
+def write_to_page(text, page_number, pdf, tables=None):
     """Write a string on a pdf page.
 
     This function uses the FDPF module to write the string on
@@ -305,6 +588,8 @@ def write_to_page(text, page_number, pdf):
         text: string to be saved
         page_number: string/int with current page nuber
         pdf: FPDF CustomPDF object
+        tables: list of tables written below the text, each a list of rows
+            of strings, see write_table()
     Returns: FPDF CustomPDF object with added page
     """
     assert isinstance(pdf, CustomPDF), (
@@ -317,9 +602,12 @@ def write_to_page(text, page_number, pdf):
     # Assign page number (uses footer class defined above)
     pdf.page_no = page_number
 
-    pdf.multi_cell(
-        w=0, h=5, txt=text.encode("latin-1", errors="replace").decode("latin-1")
-    )
+    pdf.multi_cell(w=0, h=5, txt=to_latin1(text))
+
+    for rows in tables or []:
+        if rows:
+            pdf.ln(5)
+            write_table(rows, pdf)
 
     return pdf
 
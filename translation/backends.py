@@ -0,0 +1,254 @@
+"""This file contains the translator backends used for translating text.
+
+A backend wraps a translation engine behind a common interface, so that the
+extraction and translation workflow can be run against the live Google
+service or against a local stand-in engine (e.g. for offline benchmarking).
+"""
+import random
+import string
+import threading
+import time
+
+
+class BackendError(Exception):
+    """Raised when a translator backend fails to translate a payload."""
+
+
+class InvalidPayloadError(BackendError):
+    """Raised when a payload cannot be sent to the translator backend."""
+
+
+class ThrottledError(BackendError):
+    """Raised when the translator backend rejects requests due to rate limits."""
+
+
+def validate_payload(text, max_request_bytes):
+    """Check that a string is a valid payload for a translator backend.
+
+    Mirrors the validation of `deep_translator`: empty, whitespace-only,
+    numeric-only and punctuation-only strings are rejected, as are strings
+    reaching the upload limit of the backend.
+    Args:
+        text: string to be translated
+        max_request_bytes: int with upload limit of the backend in bytes
+    Returns: Nothing, raises InvalidPayloadError for invalid payloads
+    """
+    if not isinstance(text, str) or not text.strip() or text.isdigit():
+        raise InvalidPayloadError(f"Invalid payload {text!r}.")
+
+    if all(char in string.punctuation for char in text):
+        raise InvalidPayloadError(f"Invalid payload {text!r}.")
+
+    if len(text.encode("utf-8")) >= max_request_bytes:
+        raise InvalidPayloadError(
+            f"Payload of {len(text.encode('utf-8'))} bytes reaches the limit"
+            f" of {max_request_bytes} bytes."
+        )
+
+
+class TranslatorBackend:
+    """Base class for translator backends.
+
+    Backends translate lists of strings with `translate_many()` and describe
+    their limits with `max_request_bytes` (upload limit per request) and
+    `max_concurrency` (number of requests that may be in flight at once).
+    Every translated string counts as one request in the statistics.
+    The source language of a request defaults to `source`, but may be given
+    per call, e.g. when it has been detected beforehand.
+    Subclasses implement `_translate_one()`.
+    """
+
+    name = "base"
+
+    def __init__(
+        self, source="auto", target="en", max_request_bytes=5000, max_concurrency=1
+    ):
+        """Initialize backend with language pair and limits."""
+        self.source = source
+        self.target = target
+        self.max_request_bytes = max_request_bytes
+        self.max_concurrency = max_concurrency
+
+        # Request statistics, shared between threads
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def __repr__(self):
+        """Represent backend by name and language pair."""
+        return (
+            f"{self.__class__.__name__}(source={self.source!r}, "
+            f"target={self.target!r})"
+        )
+
+    def _translate_one(self, text, source):
+        """Translate a single string, to be implemented by subclasses."""
+        raise NotImplementedError
+
+    def translate(self, text, source=None):
+        """Translate a single string."""
+        return self.translate_many([text], source=source)[0]
+
+    def translate_many(self, texts, source=None):
+        """Translate a list of strings.
+
+        Args:
+            texts: list of strings to be translated
+            source: string with source language, defaults to `source` of the
+                backend
+        Returns: list of translated strings, in the same order
+        """
+        translations = []
+        for text in texts:
+            translated = self._translate_one(text, source or self.source)
+            with self._lock:
+                self.calls += 1
+                self.bytes_sent += len(text.encode("utf-8"))
+                self.bytes_received += len(translated.encode("utf-8"))
+            translations.append(translated)
+
+        return translations
+
+    def stats(self):
+        """Return the request statistics of the backend as dictionary."""
+        with self._lock:
+            return {
+                "backend": self.name,
+                "calls": self.calls,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+            }
+
+
+class GoogleBackend(TranslatorBackend):
+    """Translator backend for Google Translate via `deep_translator`.
+
+    The client is created on first use, such that the module can be imported
+    (and other backends used) without network access. `GoogleTranslator`
+    stores the text of a request in the client, so every thread (e.g. of a
+    TranslationDispatcher) uses clients of its own.
+    """
+
+    name = "google"
+
+    def __init__(self, source="auto", target="en", proxies=None, max_concurrency=4):
+        """Initialize Google backend, the client is created lazily."""
+        super().__init__(
+            source=source,
+            target=target,
+            max_request_bytes=5000,
+            max_concurrency=max_concurrency,
+        )
+        self.proxies = proxies
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        """Set-up and return the GoogleTranslator client."""
+        return self.client_for(self.source)
+
+    def client_for(self, source):
+        """Return the GoogleTranslator client of a source language and thread."""
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        if source not in clients:
+            from deep_translator import GoogleTranslator
+
+            clients[source] = GoogleTranslator(
+                source=source, target=self.target, proxies=self.proxies
+            )
+        return clients[source]
+
+    def _translate_one(self, text, source):
+        """Translate a single string with Google Translate."""
+        from deep_translator import exceptions
+
+        try:
+            return self.client_for(source).translate(text)
+        except exceptions.TooManyRequests as err:
+            raise ThrottledError(str(err)) from err
+        except (exceptions.NotValidPayload, exceptions.NotValidLength) as err:
+            raise InvalidPayloadError(str(err)) from err
+
+
+class LocalBackend(TranslatorBackend):
+    """Deterministic local stand-in for a translation engine.
+
+    Does not translate, but returns the (stripped) input or the result of
+    `transform`. Validates payloads like the Google backend and can simulate
+    network latency and failing requests, which makes the workflow
+    benchmarkable and testable without network access.
+    Args:
+        latency: float with artificial latency per request in seconds
+        error_rate: float in [0, 1] with share of requests that fail
+        max_request_bytes: int with upload limit in bytes
+        max_concurrency: int with number of requests allowed in flight
+        seed: int seed for simulated failures
+        transform: function applied to every payload, e.g. `str.upper`
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        source="auto",
+        target="en",
+        latency=0.0,
+        error_rate=0.0,
+        max_request_bytes=5000,
+        max_concurrency=8,
+        seed=0,
+        transform=None,
+    ):
+        """Initialize local backend with simulated latency and failures."""
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"The error rate {error_rate} is not in [0, 1].")
+
+        super().__init__(
+            source=source,
+            target=target,
+            max_request_bytes=max_request_bytes,
+            max_concurrency=max_concurrency,
+        )
+        self.latency = latency
+        self.error_rate = error_rate
+        self.transform = transform
+        self._random = random.Random(seed)
+
+    def _translate_one(self, text, source):
+        """Return the payload after simulated latency and failures."""
+        validate_payload(text, self.max_request_bytes)
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise BackendError("Simulated failure of the local backend.")
+
+        text = text.strip()
+        return self.transform(text) if self.transform is not None else text
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def get_backend(name="google", **kwargs):
+    """Create a translator backend by its name.
+
+    Args:
+        name: string with name of the backend, see BACKENDS
+        kwargs: keyword arguments passed on to the backend
+    Returns: TranslatorBackend object
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            f"The backend {name} does not exist, choose one of {sorted(BACKENDS)}."
+        )
+    return BACKENDS[name](**kwargs)
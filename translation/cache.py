@@ -0,0 +1,222 @@
+"""This file contains the persistent cache for translated text.
+
+Translations are stored in a SQLite database and are addressed by a hash of
+the normalized source text, the language pair and the translator backend, so
+that reruns only translate text that has not been translated before.
+"""
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path  # for Windows/Unix compatibility
+
+from translation.backends import TranslatorBackend
+
+
+def normalize_text(text):
+    """Collapse whitespace, such that layout changes do not change the key."""
+    return " ".join(text.split())
+
+
+def cache_key(text, source, target, backend_name):
+    """Create content-address of a translation.
+
+    Args:
+        text: string with source text
+        source: string with source language
+        target: string with target language
+        backend_name: string with name of translator backend
+    Returns: string with hex digest
+    """
+    content = "\x1f".join([backend_name, source, target, normalize_text(text)])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Size-bounded, persistent LRU cache for translations.
+
+    Entries are evicted in least-recently-used order as soon as the stored
+    translations exceed `max_bytes`. Hits and misses are counted for the
+    lifetime of the object.
+    Args:
+        path: string/Path with location of the SQLite database
+        max_bytes: int with maximum size of stored translations in bytes
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        """Open (or create) the cache database."""
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.path), timeout=60, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_last_used"
+            " ON translations (last_used)"
+        )
+        self._connection.commit()
+
+        # Running totals, such that eviction does not need to scan the table
+        size, clock = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0)"
+            " FROM translations"
+        ).fetchone()
+        self._size = size
+        self._clock = clock
+
+    def __len__(self):
+        """Return number of cached translations."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM translations"
+            ).fetchone()[0]
+
+    def __enter__(self):
+        """Use cache as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close cache when leaving the context."""
+        self.close()
+
+    def _tick(self):
+        """Advance the logical clock used for LRU ordering."""
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys):
+        """Look up translations and mark them as recently used.
+
+        Args:
+            keys: list of strings created by cache_key()
+        Returns: list with translation strings, None for missing entries
+        """
+        with self._lock:
+            found = {}
+            for key in set(keys):
+                row = self._connection.execute(
+                    "SELECT translation FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+                    self._connection.execute(
+                        "UPDATE translations SET last_used = ? WHERE key = ?",
+                        (self._tick(), key),
+                    )
+            self._connection.commit()
+
+            translations = [found.get(key) for key in keys]
+            self.hits += sum(t is not None for t in translations)
+            self.misses += sum(t is None for t in translations)
+
+        return translations
+
+    def put_many(self, items):
+        """Store translations and evict least-recently-used entries.
+
+        Args:
+            items: list of (key, translation) tuples
+        Returns: Nothing
+        """
+        with self._lock:
+            for key, translation in items:
+                size = len(translation.encode("utf-8"))
+                row = self._connection.execute(
+                    "SELECT size FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._size -= row[0]
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                    (key, translation, size, self._tick()),
+                )
+                self._size += size
+
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        """Delete least-recently-used entries until cache fits into max_bytes."""
+        while self._size > self.max_bytes:
+            key, size = self._connection.execute(
+                "SELECT key, size FROM translations ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            self._connection.execute("DELETE FROM translations WHERE key = ?", (key,))
+            self._size -= size
+
+    def stats(self):
+        """Return hit/miss counters and size of the cache as dictionary."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size_bytes": self._size,
+            }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class CachedBackend(TranslatorBackend):
+    """Translator backend that answers from a TranslationCache if possible.
+
+    Only strings missing from the cache are passed on to the wrapped backend,
+    whose translations are then stored in the cache.
+    Args:
+        backend: TranslatorBackend object used for cache misses
+        cache: TranslationCache object
+    """
+
+    def __init__(self, backend, cache):
+        """Wrap backend, copying its language pair and limits."""
+        super().__init__(
+            source=backend.source,
+            target=backend.target,
+            max_request_bytes=backend.max_request_bytes,
+            max_concurrency=backend.max_concurrency,
+        )
+        self.name = backend.name
+        self.backend = backend
+        self.cache = cache
+
+    def translate_many(self, texts, source=None):
+        """Translate a list of strings, using cached translations if available.
+
+        Args:
+            texts: list of strings to be translated
+            source: string with source language, defaults to `source` of the
+                backend
+        Returns: list of translated strings, in the same order
+        """
+        source = source or self.source
+        keys = [cache_key(t, source, self.target, self.name) for t in texts]
+        translations = self.cache.get_many(keys)
+
+        missing = [i for i, t in enumerate(translations) if t is None]
+        if missing:
+            translated = self.backend.translate_many(
+                [texts[i] for i in missing], source=source
+            )
+            self.cache.put_many([(keys[i], t) for i, t in zip(missing, translated)])
+            for i, translation in zip(missing, translated):
+                translations[i] = translation
+
+        return translations
+
+    def stats(self):
+        """Return request statistics of the wrapped backend and the cache."""
+        return {**self.backend.stats(), **self.cache.stats()}
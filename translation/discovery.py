@@ -0,0 +1,239 @@
+"""This file contains the incremental discovery of the pdfs of a corpus.
+
+Folders are scanned with `os.scandir`, which returns the file type and size
+of every entry without further system calls, and excluded folders are not
+entered at all. A manifest records size, modification time and content hash
+of every pdf found, such that later scans only hash files whose size or
+modification time changed, and report which pdfs are new or changed.
+"""
+import fnmatch
+import os
+import sqlite3
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+from translation.journal import file_hash
+
+
+def matches(relative_path, patterns):
+    """Check whether a relative path matches any of a list of glob patterns.
+
+    Patterns are matched against the whole path in posix format, where "*"
+    also matches "/", e.g. "*.pdf" matches pdfs in all subfolders and
+    "*/English/*" matches everything in subfolders called "English".
+    """
+    return any(fnmatch.fnmatchcase(relative_path, pattern) for pattern in patterns)
+
+
+def ignore_patterns(dnames):
+    """Return exclude patterns of all folders with one of the given names."""
+    if isinstance(dnames, str):
+        dnames = [dnames]
+    return [f"{prefix}{name}/*" for name in dnames if name for prefix in ["", "*/"]]
+
+
+def scan_pdfs(root, include=("*.pdf",), exclude=()):
+    """Scan a folder recursively for pdfs.
+
+    Args:
+        root: string with path of the folder (or of a single file)
+        include: list of glob patterns of files to be included, relative to
+            `root` (see matches())
+        exclude: list of glob patterns of files and folders to be excluded
+    Returns: generator of (path, size, mtime_ns) tuples, with path as string
+        in posix format
+    """
+    root = Path(root).as_posix()
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        yield root, stat.st_size, stat.st_mtime_ns
+        return
+
+    # Paths relative to the working directory have no "./" prefix
+    prefix = "" if root == "." else root.rstrip("/") + "/"
+    folders = [""]
+    while folders:
+        folder = folders.pop()
+        with os.scandir(prefix + folder or ".") as entries:
+            for entry in entries:
+                relative = folder + entry.name
+                if entry.is_dir():
+                    # Do not enter excluded folders
+                    if not matches(relative + "/", exclude):
+                        folders.append(relative + "/")
+                elif (
+                    entry.is_file()
+                    and matches(relative, include)
+                    and not matches(relative, exclude)
+                ):
+                    stat = entry.stat()
+                    yield prefix + relative, stat.st_size, stat.st_mtime_ns
+
+
+def _is_within(file_path, folder):
+    """Check whether a path in posix format is (within) a folder or file."""
+    return folder == "." or file_path == folder or file_path.startswith(folder + "/")
+
+
+class Manifest:
+    """Persistent record of the pdfs found by previous scans.
+
+    Args:
+        path: string/Path with location of the SQLite database
+    """
+
+    def __init__(self, path):
+        """Open (or create) the manifest database."""
+        self.path = Path(path)
+        self._connection = sqlite3.connect(str(self.path), timeout=60)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " source_hash TEXT NOT NULL,"
+            " scanned REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        """Use manifest as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close manifest when leaving the context."""
+        self.close()
+
+    def entries(self):
+        """Return all recorded files.
+
+        Returns: dictionary mapping path to (size, mtime_ns, source_hash) tuple
+        """
+        rows = self._connection.execute(
+            "SELECT path, size, mtime_ns, source_hash FROM files"
+        )
+        return {
+            path: (size, mtime_ns, source_hash)
+            for path, size, mtime_ns, source_hash in rows
+        }
+
+    def update(self, files, removed=()):
+        """Record scanned files and forget removed files in one transaction.
+
+        Args:
+            files: list of (path, size, mtime_ns, source_hash) tuples
+            removed: list of paths
+        """
+        scanned = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                [(*file, scanned) for file in files],
+            )
+            self._connection.executemany(
+                "DELETE FROM files WHERE path = ?", [(path,) for path in removed]
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+def discover_pdfs(
+    desired_path,
+    dest_path,
+    include=("*.pdf",),
+    exclude=(),
+    manifest=None,
+):
+    """Find the pdfs of a set of (sub) folders and compare with the manifest.
+
+    Only files whose size or modification time differ from the manifest are
+    hashed. Files are reported as changed only if their content changed.
+    Without manifest, all pdfs are reported as new.
+    Args:
+        desired_path: list of strings with folders (or files) relative to
+            `dest_path`
+        dest_path: string with path of the corpus
+        include: list of glob patterns of files relative to the desired folder
+        exclude: list of glob patterns of files and folders to be excluded
+        manifest: Manifest object, which is updated, None for none
+    Returns: dictionary with lists of paths (strings in posix format) of
+        "new", "changed", "unchanged" and "removed" pdfs
+    """
+    found = {}
+    for path in desired_path:
+        for file_path, size, mtime_ns in scan_pdfs(
+            dest_path + "/" + path, include, exclude
+        ):
+            found[file_path] = (size, mtime_ns)
+
+    recorded = manifest.entries() if manifest is not None else {}
+    report = {"new": [], "changed": [], "unchanged": [], "removed": []}
+    updated = []
+    for file_path, (size, mtime_ns) in found.items():
+        if file_path not in recorded:
+            report["new"].append(file_path)
+            if manifest is not None:
+                updated.append((file_path, size, mtime_ns, file_hash(file_path)))
+            continue
+
+        recorded_size, recorded_mtime_ns, recorded_hash = recorded[file_path]
+        if (size, mtime_ns) == (recorded_size, recorded_mtime_ns):
+            report["unchanged"].append(file_path)
+            continue
+
+        source_hash = file_hash(file_path)
+        report["changed" if source_hash != recorded_hash else "unchanged"].append(
+            file_path
+        )
+        updated.append((file_path, size, mtime_ns, source_hash))
+
+    # Only files within the scanned folders can have been removed
+    scanned = [Path(dest_path + "/" + path).as_posix() for path in desired_path]
+    report["removed"] = [
+        file_path
+        for file_path in recorded
+        if file_path not in found
+        and any(_is_within(file_path, folder) for folder in scanned)
+    ]
+
+    if manifest is not None:
+        manifest.update(updated, report["removed"])
+
+    return report
+
+
+def create_output_dirs(destination_folder, pdf_list):
+    """Create the copy of the directory structure of pdfs under "output/".
+
+    Every directory is created once, see create_destination_dir() for a
+    single file.
+    Args:
+        destination_folder: string with path to destination folder
+        pdf_list: list of strings with paths to pdfs within the folder
+    Returns: list of strings with the created directories
+    """
+    if not Path(destination_folder).exists():
+        raise ValueError(
+            f"The Destination directory {destination_folder} does not exist locally."
+        )
+
+    # Many pdfs share a directory, so paths are only compared per directory
+    parents = set()
+    for folder in {os.path.dirname(file_path) for file_path in pdf_list}:
+        if not Path(folder).is_relative_to(destination_folder):
+            raise ValueError(
+                f"The folder {folder} is not relative to"
+                f" the destination directory {destination_folder}."
+            )
+        parents.add(Path(folder).relative_to(destination_folder))
+
+    created = []
+    for parent in sorted(parents):
+        directory = Path(destination_folder) / "output" / parent
+        if not directory.exists():
+            os.makedirs(directory)
+            created.append(directory.as_posix())
+
+    return created
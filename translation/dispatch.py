@@ -0,0 +1,161 @@
+"""This file contains the concurrent dispatch of translation requests.
+
+Translation requests spend most of their time waiting on the network, so
+they are submitted concurrently from a thread pool. The number of requests in
+flight is bounded, requests are rate limited with a token bucket and requests
+rejected by throttling are retried with exponential backoff.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from translation.backends import ThrottledError
+from translation.backends import TranslatorBackend
+
+
+class TokenBucket:
+    """Token bucket rate limiter, safe to share between threads.
+
+    Args:
+        rate: float with number of tokens added per second
+        capacity: int with maximum number of tokens, i.e. the allowed burst
+        clock: function returning the current time in seconds
+        sleep: function to wait for a number of seconds
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        """Initialize full bucket."""
+        if rate <= 0:
+            raise ValueError(f"The rate {rate} needs to be positive.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token from the bucket, wait until one is available."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            self._sleep(wait)
+
+
+class TranslationDispatcher(TranslatorBackend):
+    """Translator backend that sends the requests of a backend concurrently.
+
+    Results are returned in the order of the input, such that the dispatcher
+    can replace the wrapped backend without changing the translation. The
+    thread pool is created on first use and kept for all further calls, such
+    that per-thread state of the backend (e.g. clients of GoogleBackend) is
+    reused; close() it when done, or use the dispatcher as context manager.
+    Args:
+        backend: TranslatorBackend object sending the requests
+        max_in_flight: int with maximum number of concurrent requests,
+            defaults to `max_concurrency` of the backend
+        requests_per_second: float with rate limit, None for no limit
+        burst: int with number of requests allowed at once by the rate limit
+        max_retries: int with number of retries of throttled requests
+        backoff: float with seconds to wait before the first retry, doubled
+            with every further retry
+        max_backoff: float with maximum number of seconds to wait
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_in_flight=None,
+        requests_per_second=None,
+        burst=1,
+        max_retries=5,
+        backoff=1.0,
+        max_backoff=60.0,
+    ):
+        """Wrap backend, copying its language pair and limits."""
+        super().__init__(
+            source=backend.source,
+            target=backend.target,
+            max_request_bytes=backend.max_request_bytes,
+            max_concurrency=backend.max_concurrency,
+        )
+        self.name = backend.name
+        self.backend = backend
+        self.max_in_flight = max_in_flight or backend.max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self._executor = None
+
+        if requests_per_second is not None:
+            self.rate_limit = TokenBucket(requests_per_second, capacity=burst)
+        else:
+            self.rate_limit = None
+
+    def __enter__(self):
+        """Use dispatcher as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close dispatcher when leaving the context."""
+        self.close()
+
+    def _pool(self):
+        """Return the thread pool, created on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+            return self._executor
+
+    def _send(self, text, source=None):
+        """Send a single request, retry with exponential backoff if throttled."""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limit is not None:
+                self.rate_limit.acquire()
+
+            try:
+                return self.backend.translate_many([text], source=source)[0]
+            except ThrottledError:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(min(self.max_backoff, self.backoff * 2**attempt))
+
+    def translate_many(self, texts, source=None):
+        """Translate a list of strings with concurrent requests.
+
+        Args:
+            texts: list of strings to be translated
+            source: string with source language, defaults to `source` of the
+                backend
+        Returns: list of translated strings, in the same order
+        """
+        if self.max_in_flight == 1 or len(texts) <= 1:
+            return [self._send(text, source) for text in texts]
+
+        return list(self._pool().map(self._send, texts, [source] * len(texts)))
+
+    def stats(self):
+        """Return request statistics of the wrapped backend and retries."""
+        return {**self.backend.stats(), "retries": self.retries}
+
+    def close(self):
+        """Shut down the thread pool, waiting for requests in flight."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,226 @@
+"""This file contains the extraction of text from all pages of a pdf.
+
+Layout analysis with pdfplumber is CPU-bound, so pages can be extracted in
+parallel by a pool of processes. Every worker opens the pdf itself and
+extracts a range of pages. Page numbers are counted forward in a sequential
+pass afterwards, such that the result is identical to extracting page by page.
+With an extraction cache, pages of documents extracted before are loaded from
+the cache instead.
+pdfplumber keeps the objects parsed for every page it has laid out, such that
+memory grows with the number of pages. Pages are therefore released right
+after their extraction, and the pdf can be reopened once memory grows beyond
+a limit. Pages without tables are extracted by the fast path of
+extract_page_fast(), with identical results.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path  # for Windows/Unix compatibility
+
+import pdfplumber
+
+import translation.auxiliary_extraction_translation as auxiliary
+from translation.fast_extraction import extract_page_fast
+from translation.journal import file_hash
+from translation.metrics import current_memory_mb
+
+
+def count_pages(file_path):
+    """Return the number of pages of a pdf."""
+    with pdfplumber.open(Path(file_path)) as pdf:
+        return len(pdf.pages)
+
+
+def iter_pages(file_path, page_indices=None, selection=None, memory_limit_mb=None):
+    """Open a pdf and iterate over its pages, releasing every page after use.
+
+    The objects parsed by pdfplumber are flushed from a page as soon as the
+    next page is requested. If the memory of the process has grown by more
+    than `memory_limit_mb` since the pdf was opened, the pdf is closed and
+    opened again, which also releases the fonts and objects cached by
+    pdfminer.
+    Args:
+        file_path: string with path to pdf
+        page_indices: iterable of ints with indices of pages, None for all
+            pages (or all candidates of the selection)
+        selection: PageSelection object, None for all pages
+        memory_limit_mb: float with maximum growth of memory in MB, None for
+            no limit. Only available on Linux, see current_memory_mb().
+    Returns: generator of (page_index, page) tuples with pdfplumber page
+        Objects, which are valid until the next page is requested
+    """
+    pdf = pdfplumber.open(Path(file_path))
+    try:
+        if page_indices is None:
+            n_pages = len(pdf.pages)
+            if selection is not None:
+                page_indices = selection.candidates(n_pages)
+            else:
+                page_indices = range(n_pages)
+
+        baseline_mb = current_memory_mb()
+        for page_index in page_indices:
+            if selection is not None and not selection.selects(pdf, page_index):
+                continue
+
+            page = pdf.pages[page_index]
+            try:
+                yield page_index, page
+            finally:
+                page.flush_cache()
+
+            if memory_limit_mb is not None and baseline_mb is not None:
+                if current_memory_mb() - baseline_mb > memory_limit_mb:
+                    pdf.close()
+                    pdf = pdfplumber.open(Path(file_path))
+                    baseline_mb = current_memory_mb()
+    finally:
+        pdf.close()
+
+
+def extract_page_range(
+    file_path, start, stop, metrics=None, memory_limit_mb=None, fast=True
+):
+    """Extract text and page numbers of a range of pages.
+
+    Args:
+        file_path: string with path to pdf
+        start: int with index of first page
+        stop: int with index after last page
+        metrics: Metrics object recording the time of every page, None for none
+        memory_limit_mb: float with maximum growth of memory, see iter_pages()
+        fast: bool, extract pages without tables by the fast path (see
+            extract_page_fast()), otherwise all pages by extract_page()
+    Returns: list of (text, page_number_hint) tuples, see extract_page()
+    """
+    extract_page = extract_page_fast if fast else auxiliary.extract_page
+    pages = iter_pages(file_path, range(start, stop), memory_limit_mb=memory_limit_mb)
+    if metrics is None:
+        return [extract_page(page) for _, page in pages]
+
+    page_results = []
+    for i, page in pages:
+        with metrics.stage("extract_page", page=i):
+            page_results.append(extract_page(page))
+    return page_results
+
+
+def resolve_page_numbers(page_results):
+    """Resolve page numbers by counting forward from identified page numbers.
+
+    Args:
+        page_results: list of (text, page_number_hint) tuples
+    Returns: list of (text, page_number) tuples, as created by extract()
+    """
+    # Initialize page counter
+    page_counter = "?"
+    resolved = []
+    for extracted, page_number_hint in page_results:
+        page_counter = auxiliary.resolve_page_number(page_number_hint, page_counter)
+        resolved.append((extracted, page_counter))
+
+    return resolved
+
+
+def iter_extracted_pages(
+    file_path, selection=None, memory_limit_mb=None, tables=None, fast=True
+):
+    """Extract text and page numbers page by page.
+
+    Unlike extract_pages(), pages are extracted only when requested, such that
+    the first pages can be processed while later pages are still extracted.
+    Unselected pages are not extracted, page numbers are counted forward over
+    them.
+    Args:
+        file_path: string with path to pdf
+        selection: PageSelection object, None for all pages
+        memory_limit_mb: float with maximum growth of memory, see iter_pages()
+        tables: list to which the tables of every extracted page are appended
+            (see extract_page()), None to not extract tables
+        fast: bool, extract pages without tables by the fast path, see
+            extract_page_fast()
+    Returns: generator of (page_index, text, page_number) tuples, one for
+        each selected page
+    """
+    extract_page = extract_page_fast if fast else auxiliary.extract_page
+
+    # Initialize page counter
+    page_counter = "?"
+    previous_index = -1
+    pages = iter_pages(file_path, selection=selection, memory_limit_mb=memory_limit_mb)
+    for page_index, page in pages:
+        page_tables = [] if tables is not None else None
+        extracted, page_number_hint = extract_page(page, tables=page_tables)
+        if tables is not None:
+            tables.append(page_tables)
+        if page_counter != "?":
+            # Count forward over unselected pages
+            page_counter = int(page_counter) + page_index - previous_index - 1
+        page_counter = auxiliary.resolve_page_number(page_number_hint, page_counter)
+        previous_index = page_index
+        yield page_index, extracted, page_counter
+
+
+def extract_pages(
+    file_path,
+    workers=1,
+    cache=None,
+    source_hash=None,
+    metrics=None,
+    memory_limit_mb=None,
+    fast=True,
+):
+    """Extract text and page numbers of all pages of a pdf.
+
+    Args:
+        file_path: string with path to pdf
+        workers: int with number of processes, 1 extracts in this process
+        cache: ExtractionCache object, None for no cache
+        source_hash: string with hash of the file content, computed if needed
+        metrics: Metrics object recording the time of every page extracted in
+            this process, None for none
+        memory_limit_mb: float with maximum growth of memory of every process,
+            see iter_pages()
+        fast: bool, extract pages without tables by the fast path, see
+            extract_page_fast()
+    Returns: list of (text, page_number) tuples, one for each page
+    """
+    if cache is not None:
+        if source_hash is None:
+            source_hash = file_hash(file_path)
+
+        # Load pages one by one, without opening the pdf
+        if cache.n_pages(source_hash) is not None:
+            return resolve_page_numbers(cache.iter_pages(source_hash))
+
+    n_pages = count_pages(file_path)
+
+    if workers == 1 or n_pages <= 1:
+        page_results = extract_page_range(
+            file_path,
+            0,
+            n_pages,
+            metrics=metrics,
+            memory_limit_mb=memory_limit_mb,
+            fast=fast,
+        )
+
+    else:
+        # Several ranges per worker, such that slow pages do not stall a worker
+        pages_per_task = max(1, math.ceil(n_pages / (4 * workers)))
+        starts = range(0, n_pages, pages_per_task)
+        stops = [min(start + pages_per_task, n_pages) for start in starts]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranges = executor.map(
+                partial(extract_page_range, memory_limit_mb=memory_limit_mb, fast=fast),
+                [file_path] * len(starts),
+                starts,
+                stops,
+            )
+            page_results = [result for page_range in ranges for result in page_range]
+
+    if cache is not None:
+        cache.put_document(source_hash, page_results)
+
+    return resolve_page_numbers(page_results)
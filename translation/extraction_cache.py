@@ -0,0 +1,110 @@
+"""This file contains the persistent cache for extracted text.
+
+The layout and table analysis of pdfplumber is the expensive part of the
+extraction and its result does not depend on translation settings. Extracted
+pages are stored in a SQLite database, addressed by the hash of the file
+content, the page index and the version of the extraction settings, such that
+reruns with other translation settings do not open the pdf at all.
+"""
+import sqlite3
+from pathlib import Path  # for Windows/Unix compatibility
+
+# Increase when extraction changes its output, to invalidate cached pages
+EXTRACTION_VERSION = 1
+
+
+class ExtractionCache:
+    """Persistent cache for the extracted text of pdf pages.
+
+    Pages are stored with their page number hint (see extract_page()), such
+    that page numbers are resolved as after extraction.
+    Args:
+        path: string/Path with location of the SQLite database
+        version: int with version of the extraction settings
+    """
+
+    def __init__(self, path, version=EXTRACTION_VERSION):
+        """Open (or create) the cache database."""
+        self.path = Path(path)
+        self.version = version
+        self._connection = sqlite3.connect(str(self.path), timeout=60)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " source_hash TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " pages INTEGER NOT NULL,"
+            " PRIMARY KEY (source_hash, version));"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " source_hash TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " page_index INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " page_number TEXT,"
+            " PRIMARY KEY (source_hash, version, page_index));"
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        """Use cache as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close cache when leaving the context."""
+        self.close()
+
+    def n_pages(self, source_hash):
+        """Return number of pages of a cached document, None if not cached."""
+        row = self._connection.execute(
+            "SELECT pages FROM documents WHERE source_hash = ? AND version = ?",
+            (source_hash, self.version),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def get_page(self, source_hash, page_index):
+        """Return the extracted page of a document.
+
+        Returns: (text, page_number_hint) tuple, None if not cached
+        """
+        row = self._connection.execute(
+            "SELECT text, page_number FROM pages"
+            " WHERE source_hash = ? AND version = ? AND page_index = ?",
+            (source_hash, self.version, page_index),
+        ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def iter_pages(self, source_hash):
+        """Load the extracted pages of a cached document one by one.
+
+        Returns: iterator of (text, page_number_hint) tuples, in page order
+        """
+        cursor = self._connection.execute(
+            "SELECT text, page_number FROM pages"
+            " WHERE source_hash = ? AND version = ? ORDER BY page_index",
+            (source_hash, self.version),
+        )
+        for row in cursor:
+            yield tuple(row)
+
+    def put_document(self, source_hash, page_results):
+        """Store the extracted pages of a document.
+
+        Args:
+            source_hash: string with hash of the file content
+            page_results: list of (text, page_number_hint) tuples of all pages
+        """
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            [
+                (source_hash, self.version, page_index, text, page_number)
+                for page_index, (text, page_number) in enumerate(page_results)
+            ],
+        )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+            (source_hash, self.version, len(page_results)),
+        )
+        self._connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
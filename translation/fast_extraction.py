@@ -0,0 +1,144 @@
+"""This file contains the fast extraction of text from pages without tables.
+
+pdfplumber turns every character of a page into a dictionary of about twenty
+attributes before extract_text() uses four of them, which takes about half
+of the extraction time of a page. Pages without drawn paths (lines, rects or
+curves) cannot contain tables (see has_table_lines()), so their text is
+extracted from the positions of the characters alone, collected by a
+lightweight device in a single pass over the page. The characters are
+grouped into lines exactly like pdfplumber does, such that the text is
+identical to extract_page(). Pages with paths fall back to extract_page().
+Content streams are scanned for operators painting paths first, such that
+most pages with tables are not interpreted twice.
+"""
+import re
+
+import pdfplumber
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.pdftypes import list_value
+from pdfminer.pdftypes import stream_value
+from pdfminer.utils import apply_matrix_pt
+
+import translation.auxiliary_extraction_translation as auxiliary
+
+# Operators painting paths (S, s, f, F, f*, B, B*, b, b*) as separate tokens
+PATH_PAINTING = re.compile(rb"(?:^|(?<=[\s)\]>]))[SsFfBb]\*?(?=\s|$)")
+
+
+class _PathFound(Exception):
+    """Raised by _CharDevice when a page draws a path."""
+
+
+class _CharDevice(PDFTextDevice):
+    """Device collecting the bounding boxes of the characters of a page.
+
+    Bounding boxes are computed like the LTChar objects of pdfminer, which
+    pdfplumber turns into chars. The pass is stopped at the first path drawn.
+    """
+
+    def __init__(self, rsrcmgr):
+        """Initialize device without characters."""
+        super().__init__(rsrcmgr)
+        self.chars = []
+
+    def render_char(
+        self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate
+    ):
+        """Collect text and bounding box of a character."""
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = f"(cid:{cid})"
+        adv = font.char_width(cid) * fontsize * scaling
+
+        if font.is_vertical():
+            vx, vy = font.char_disp(cid)
+            vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+            vy = (1000 - vy) * fontsize * 0.001
+            lower_left = (-vx, vy + rise + adv)
+            upper_right = (-vx + fontsize, vy + rise)
+        else:
+            descent = font.get_descent() * fontsize
+            lower_left = (0, descent + rise)
+            upper_right = (adv, descent + rise + fontsize)
+
+        x0, y0 = apply_matrix_pt(matrix, lower_left)
+        x1, y1 = apply_matrix_pt(matrix, upper_right)
+        self.chars.append((text, min(x0, x1), max(x0, x1), max(y0, y1)))
+        return adv
+
+    def paint_path(self, graphicstate, stroke, fill, evenodd, path):
+        """Stop the pass over the page, which needs to be laid out by pdfplumber."""
+        raise _PathFound
+
+
+def paints_paths(page):
+    """Check cheaply whether the content stream of a page paints paths.
+
+    The stream is scanned for painting operators without being interpreted.
+    Paths may be reported wrongly (e.g. for an "S" in a text string), and
+    paths of form XObjects are not seen, which collect_chars() detects.
+    """
+    try:
+        return any(
+            PATH_PAINTING.search(stream_value(stream).get_data())
+            for stream in list_value(page.page_obj.contents)
+        )
+    except Exception:
+        # Leave errors of malformed streams to pdfminer
+        return True
+
+
+def collect_chars(page):
+    """Collect the characters of a page in a single pass, without pdfplumber.
+
+    Args:
+        page: pdfplumber page Object
+    Returns: list of char dictionaries with "text", "x0", "x1" and "doctop"
+        as in `page.chars`, None if the page draws paths
+    """
+    device = _CharDevice(page.pdf.rsrcmgr)
+    try:
+        PDFPageInterpreter(page.pdf.rsrcmgr, device).process_page(page.page_obj)
+    except _PathFound:
+        return None
+
+    # Like pdfplumber, which measures from the top of the first page
+    offset = page.initial_doctop + page.height
+    return [
+        {"text": text, "x0": x0, "x1": x1, "doctop": offset - y1}
+        for text, x0, x1, y1 in device.chars
+    ]
+
+
+def extract_page_fast(page, timings=None, tables=None):
+    """Extract text and page number from a Page Object, see extract_page().
+
+    Pages without paths are extracted from their characters only (see
+    collect_chars()), all other pages, pages already laid out by pdfplumber
+    and pages of pdfs opened with layout analysis are extracted by
+    extract_page(). Counters of fast and fallback pages are added to
+    `timings`, if given.
+    Returns: string with text and string with page number (None if not found),
+        identical to extract_page()
+    """
+    if timings is None:
+        timings = {}
+
+    chars = None
+    if (
+        tables is None
+        and page.pdf.laparams is None
+        and not hasattr(page, "_layout")
+        and not paints_paths(page)
+    ):
+        chars = collect_chars(page)
+
+    if chars is None:
+        timings["fallback_pages"] = timings.get("fallback_pages", 0) + 1
+        return auxiliary.extract_page(page, timings=timings, tables=tables)
+
+    timings["fast_pages"] = timings.get("fast_pages", 0) + 1
+    return auxiliary.clean_text(pdfplumber.utils.extract_text(chars))
@@ -0,0 +1,103 @@
+"""This file contains the job journal for translating a corpus of pdfs.
+
+The journal records which files, and which pages of a file, have been
+translated. Files are identified by their path and a hash of their content,
+such that a batch can be resumed after a crash and files are translated
+again when they change.
+"""
+import hashlib
+import sqlite3
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+
+def file_hash(file_path, block_size=1024 * 1024):
+    """Compute the sha256 hash of the content of a file.
+
+    Args:
+        file_path: string with path to file
+        block_size: int with number of bytes read at once
+    Returns: string with hex digest
+    """
+    digest = hashlib.sha256()
+    with open(Path(file_path), "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """Persistent record of translated files and pages.
+
+    Several processes may use the same journal, as SQLite serializes writes.
+    Args:
+        path: string/Path with location of the SQLite database
+    """
+
+    def __init__(self, path):
+        """Open (or create) the journal database."""
+        self.path = Path(path)
+        self._connection = sqlite3.connect(str(self.path), timeout=60)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " file TEXT PRIMARY KEY,"
+            " source_hash TEXT NOT NULL,"
+            " pages INTEGER NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " finished REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " file TEXT NOT NULL,"
+            " source_hash TEXT NOT NULL,"
+            " page_index INTEGER NOT NULL,"
+            " translated TEXT NOT NULL,"
+            " PRIMARY KEY (file, source_hash, page_index));"
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        """Use journal as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close journal when leaving the context."""
+        self.close()
+
+    def is_done(self, file_path, source_hash):
+        """Check whether a file with the given content has been translated."""
+        row = self._connection.execute(
+            "SELECT source_hash FROM files WHERE file = ?", (str(file_path),)
+        ).fetchone()
+        return row is not None and row[0] == source_hash
+
+    def completed_pages(self, file_path, source_hash):
+        """Return translated pages of a file with the given content.
+
+        Returns: dictionary mapping page index to translated text
+        """
+        rows = self._connection.execute(
+            "SELECT page_index, translated FROM pages"
+            " WHERE file = ? AND source_hash = ?",
+            (str(file_path), source_hash),
+        ).fetchall()
+        return dict(rows)
+
+    def record_page(self, file_path, source_hash, page_index, translated):
+        """Record the translation of a page."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+            (str(file_path), source_hash, page_index, translated),
+        )
+        self._connection.commit()
+
+    def record_file(self, file_path, source_hash, pages, seconds):
+        """Record that a file has been translated and drop its pages."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (str(file_path), source_hash, pages, seconds, time.time()),
+        )
+        self._connection.execute("DELETE FROM pages WHERE file = ?", (str(file_path),))
+        self._connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
@@ -0,0 +1,122 @@
+"""This file contains the local language identification of text segments.
+
+Paragraphs already in the target language, and paragraphs consisting mostly
+of digits and punctuation (e.g. rows of tables), do not need to be sent to
+the translator backend. The language of a paragraph is identified by counting
+frequent function words (stopwords) of each language, which is fast and
+works without any downloads.
+"""
+import re
+
+# Frequent function words, which rarely occur in other languages
+STOPWORDS = {
+    "en": set(
+        "the and of to is that for with was are this by from which have has were"
+        " be it its on not or an as at been their would will".split()
+    ),
+    "de": set(
+        "der die das und ist den dem des nicht mit sich auf für auch eine einer"
+        " eines wird wurde von zu im bei nach über sind werden oder aus durch".split()
+    ),
+    "fr": set(
+        "le la les et des du est une dans pour qui que sur par au aux pas sont été"
+        " ont cette ces leur plus avec mais ou il elle nous".split()
+    ),
+    "nl": set(
+        "het een van en is dat op te zijn voor met niet aan ook bij werd wordt door"
+        " naar deze dit worden uit tot als hun maar nog dan heeft".split()
+    ),
+    "it": set(
+        "il di che è per una della delle del nel alla sono con non gli le dei anche"
+        " più questo essere stato come ma tra sulla degli nella hanno ha".split()
+    ),
+    "es": set(
+        "el la los las y que del por una para con es se al lo como más pero sus su"
+        " fue son ha este esta entre sobre también han sin".split()
+    ),
+}
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+def letter_ratio(text):
+    """Return the share of letters among the non-whitespace characters."""
+    characters = [char for char in text if not char.isspace()]
+    if not characters:
+        return 0.0
+    return sum(char.isalpha() for char in characters) / len(characters)
+
+
+def detect_language(text, min_hits=3, margin=2.0):
+    """Identify the language of a text by counting stopwords.
+
+    Args:
+        text: string
+        min_hits: int with minimum number of stopwords of the language
+        margin: float with minimum ratio of the stopwords of the language to
+            the stopwords of the runner-up
+    Returns: string with language code (see STOPWORDS), None if undecided
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    hits = {
+        language: sum(word in stopwords for word in words)
+        for language, stopwords in STOPWORDS.items()
+    }
+
+    ranked = sorted(hits, key=hits.get, reverse=True)
+    best, runner_up = hits[ranked[0]], hits[ranked[1]]
+    if best < min_hits or best < margin * runner_up:
+        return None
+    return ranked[0]
+
+
+class LanguageRouter:
+    """Decide which text segments are sent to the translator backend.
+
+    Segments consisting mostly of digits and punctuation, and segments in the
+    target language, are passed through unchanged. The bytes of all routed
+    segments are counted, such that the savings can be reported.
+    Args:
+        target: string with language code of the target language
+        min_letter_ratio: float, segments with a lower share of letters are
+            not translated
+    """
+
+    def __init__(self, target="en", min_letter_ratio=0.5):
+        """Initialize router without routed segments."""
+        self.target = target
+        self.min_letter_ratio = min_letter_ratio
+        self.bytes_total = 0
+        self.bytes_target_language = 0
+        self.bytes_no_content = 0
+
+    def route(self, text):
+        """Classify a segment.
+
+        Args:
+            text: string with segment, e.g. a paragraph
+        Returns: (translate, language) tuple with bool whether the segment
+            needs translation and string with detected language (or None)
+        """
+        size = len(text.encode("utf-8"))
+        self.bytes_total += size
+
+        if letter_ratio(text) < self.min_letter_ratio:
+            self.bytes_no_content += size
+            return False, None
+
+        language = detect_language(text)
+        if language == self.target:
+            self.bytes_target_language += size
+            return False, language
+
+        return True, language
+
+    def stats(self):
+        """Return the number of routed and skipped bytes as dictionary."""
+        return {
+            "bytes_total": self.bytes_total,
+            "bytes_skipped": self.bytes_target_language + self.bytes_no_content,
+            "bytes_target_language": self.bytes_target_language,
+            "bytes_no_content": self.bytes_no_content,
+        }
@@ -0,0 +1,319 @@
+"""This file contains the fuzzy translation memory shared by all documents.
+
+Consecutive reports contain many paragraphs that differ only in figures and
+dates, which the exact cache (see cache.py) does not recognize. The memory
+masks numbers, indexes the masked paragraphs with MinHash signatures in an
+LSH table (locality-sensitive hashing), and reuses the translation of a
+paragraph differing in numbers only, with the new numbers substituted.
+LSH finds candidates whose similarity is above a threshold, where similarity
+is the Jaccard similarity of the sets of word 3-grams. It only compares a
+paragraph with the few paragraphs sharing a band of their signatures, such
+that lookups do not slow down with the size of the memory. Candidates
+differing in any other word are not reused, as their translation would be
+wrong (e.g. "gestiegen" and "gesunken").
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path  # for Windows/Unix compatibility
+
+from translation.cache import normalize_text
+
+# Numbers and dates, e.g. "1978", "3,5", "12.000", "31.12.1978"
+NUMBER = re.compile(r"\d+(?:[.,:/]\d+)*")
+NUMBER_MASK = "<n>"
+
+# Parameters of the universal hash functions of the MinHash signature
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def mask_numbers(text):
+    """Replace numbers by a placeholder.
+
+    Returns: masked string and list of strings with the numbers
+    """
+    return NUMBER.sub(NUMBER_MASK, text), NUMBER.findall(text)
+
+
+def content_words(masked):
+    """Return the words of a masked text that are not numbers.
+
+    Words consisting of masked numbers and punctuation, e.g. "(<n>)" or
+    "<n>-<n>", are left out.
+    """
+    return [
+        word
+        for word in masked.split()
+        if NUMBER_MASK not in word or re.search(r"\w", word.replace(NUMBER_MASK, ""))
+    ]
+
+
+def _digits(number):
+    """Return the digits of a number, ignoring separators."""
+    return re.sub(r"\D", "", number)
+
+
+def _reformat(number, source_number, translated_number):
+    """Format a number like the translator formatted a previous number.
+
+    E.g. if "3,5" was translated as "3.5", "4,1" is formatted as "4.1".
+    """
+    source_separators = re.sub(r"\d", "", source_number)
+    translated_separators = re.sub(r"\d", "", translated_number)
+    if source_separators == translated_separators:
+        return number
+    if len(source_separators) != len(translated_separators):
+        return number
+
+    mapping = dict(zip(source_separators, translated_separators))
+    return "".join(mapping.get(char, char) for char in number)
+
+
+def substitute_numbers(translation, old_numbers, new_numbers):
+    """Replace the numbers of a stored translation by the numbers of new text.
+
+    Numbers of the translation are matched to the numbers of its source text
+    by their digits, since translators may change separators (e.g. "3,5" to
+    "3.5").
+    Args:
+        translation: string with stored translation
+        old_numbers: list of strings with numbers of the stored source text
+        new_numbers: list of strings with numbers of the new text
+    Returns: string, None if the numbers cannot be substituted unambiguously
+    """
+    if len(old_numbers) != len(new_numbers):
+        return None
+
+    changes = {}
+    for old, new in zip(old_numbers, new_numbers):
+        if changes.get(_digits(old), (old, new))[1] != new:
+            return None
+        changes[_digits(old)] = (old, new)
+    changes = {digits: pair for digits, pair in changes.items() if pair[0] != pair[1]}
+    if not changes:
+        return translation
+
+    substituted = set()
+
+    def replace(match):
+        digits = _digits(match.group())
+        if digits not in changes:
+            return match.group()
+        substituted.add(digits)
+        old, new = changes[digits]
+        return _reformat(new, old, match.group())
+
+    translation = NUMBER.sub(replace, translation)
+    return translation if substituted == set(changes) else None
+
+
+def shingles(masked, size=3):
+    """Return the set of word n-grams of a (masked) text."""
+    words = masked.lower().split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(first, second):
+    """Return the Jaccard similarity of two sets."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _hash64(data):
+    """Hash bytes to an unsigned 64-bit integer, stable between runs."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class TranslationMemory:
+    """Persistent fuzzy translation memory.
+
+    Translations are stored per language pair and backend. The signatures
+    consist of `bands` * `rows` MinHash values; paragraphs sharing all values
+    of a band are compared. With the default 16 bands of 4 rows, paragraphs
+    with a similarity of 0.75 share a band with 99% probability.
+    Args:
+        path: string/Path with location of the SQLite database
+        threshold: float with minimum Jaccard similarity of candidates, whose
+            translation is reused if they differ in numbers only (see
+            content_words()), 1.0 only reuses paragraphs of the same masked
+            text
+        bands: int with number of bands of the LSH table
+        rows: int with number of MinHash values per band
+    """
+
+    def __init__(self, path, threshold=0.9, bands=16, rows=4):
+        """Open (or create) the memory database."""
+        self.path = Path(path)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.lookups = 0
+        self.reused = 0
+        self.lookup_seconds = 0.0
+
+        # Coefficients of the hash functions (a * x + b) mod prime
+        self._coefficients = [
+            (_hash64(b"a%d" % i) % (_PRIME - 1) + 1, _hash64(b"b%d" % i) % _PRIME)
+            for i in range(bands * rows)
+        ]
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.path), timeout=60, check_same_thread=False
+        )
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " id INTEGER PRIMARY KEY,"
+            " pair TEXT NOT NULL,"
+            " masked TEXT NOT NULL,"
+            " numbers TEXT NOT NULL,"
+            " translation TEXT NOT NULL,"
+            " UNIQUE (pair, masked));"
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " bucket INTEGER NOT NULL,"
+            " segment INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket);"
+        )
+        self._connection.commit()
+
+    def __len__(self):
+        """Return number of stored segments."""
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM segments").fetchone()
+        return row[0]
+
+    def __enter__(self):
+        """Use memory as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close memory when leaving the context."""
+        self.close()
+
+    def signature(self, grams):
+        """Compute the MinHash signature of a set of n-grams."""
+        hashes = [_hash64(gram.encode("utf-8")) for gram in grams]
+        return [
+            min(((a * x + b) % _PRIME) & _MAX_HASH for x in hashes)
+            for a, b in self._coefficients
+        ]
+
+    def buckets(self, pair, grams):
+        """Return the LSH buckets of a set of n-grams, one for each band."""
+        values = self.signature(grams)
+        buckets = []
+        for band in range(self.bands):
+            rows = values[band * self.rows : (band + 1) * self.rows]
+            data = pair.encode("utf-8") + struct.pack(f"<I{self.rows}I", band, *rows)
+            # SQLite integers are signed
+            buckets.append(_hash64(data) - (1 << 63))
+        return buckets
+
+    def lookup(self, text, pair):
+        """Find the translation of a text differing in numbers only.
+
+        Args:
+            text: string with source text
+            pair: string identifying language pair and backend
+        Returns: string with translation, None if there is no such text
+        """
+        start = time.perf_counter()
+        masked, numbers = mask_numbers(normalize_text(text))
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT numbers, translation FROM segments"
+                " WHERE pair = ? AND masked = ?",
+                (pair, masked),
+            ).fetchone()
+
+            if row is None and self.threshold < 1.0:
+                grams = shingles(masked)
+                buckets = self.buckets(pair, grams)
+                candidates = self._connection.execute(
+                    "SELECT DISTINCT s.masked, s.numbers, s.translation"
+                    " FROM buckets b JOIN segments s ON s.id = b.segment"
+                    f" WHERE b.bucket IN ({','.join('?' * len(buckets))})",
+                    buckets,
+                ).fetchall()
+
+                # Reuse candidates differing in numbers only
+                words = content_words(masked)
+                best = 0.0
+                for candidate, candidate_numbers, translation in candidates:
+                    similarity = jaccard(grams, shingles(candidate))
+                    if (
+                        similarity >= self.threshold
+                        and similarity > best
+                        and content_words(candidate) == words
+                    ):
+                        best, row = similarity, (candidate_numbers, translation)
+
+            translation = None
+            if row is not None:
+                translation = substitute_numbers(row[1], json.loads(row[0]), numbers)
+
+            self.lookups += 1
+            self.reused += translation is not None
+            self.lookup_seconds += time.perf_counter() - start
+
+        return translation
+
+    def add_many(self, items, pair):
+        """Store translations.
+
+        Args:
+            items: list of (text, translation) tuples
+            pair: string identifying language pair and backend
+        """
+        with self._lock:
+            for text, translation in items:
+                masked, numbers = mask_numbers(normalize_text(text))
+                row = self._connection.execute(
+                    "SELECT id FROM segments WHERE pair = ? AND masked = ?",
+                    (pair, masked),
+                ).fetchone()
+                if row is not None:
+                    # Keep the most recent numbers and translation
+                    self._connection.execute(
+                        "UPDATE segments SET numbers = ?, translation = ?"
+                        " WHERE id = ?",
+                        (json.dumps(numbers), translation, row[0]),
+                    )
+                    continue
+
+                segment = self._connection.execute(
+                    "INSERT INTO segments (pair, masked, numbers, translation)"
+                    " VALUES (?, ?, ?, ?)",
+                    (pair, masked, json.dumps(numbers), translation),
+                ).lastrowid
+                self._connection.executemany(
+                    "INSERT INTO buckets VALUES (?, ?)",
+                    [
+                        (bucket, segment)
+                        for bucket in self.buckets(pair, shingles(masked))
+                    ],
+                )
+            self._connection.commit()
+
+    def stats(self):
+        """Return lookup counters of the memory as dictionary."""
+        with self._lock:
+            return {
+                "memory_lookups": self.lookups,
+                "reused": self.reused,
+                "reuse_rate": self.reused / self.lookups if self.lookups else 0.0,
+                "memory_lookup_seconds": self.lookup_seconds,
+            }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
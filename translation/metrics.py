@@ -0,0 +1,223 @@
+"""This file contains the instrumentation of the translation pipeline.
+
+Wall time of the stages (extraction, tokenization, translation, writing) is
+recorded per page or per batch of pages, together with request statistics of
+the translator backend and peak memory. Records are kept in memory and, if a
+path is given, appended to a JSON-lines file, which several processes may
+share. A summary table aggregates the records of a batch.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path  # for Windows/Unix compatibility
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Fields summed up in the summary of a batch
+SUMMED_FIELDS = [
+    "pages",
+    "calls",
+    "bytes_sent",
+    "bytes_received",
+    "hits",
+    "misses",
+    "bytes_skipped",
+    "segments",
+    "memory_lookups",
+    "reused",
+]
+
+
+def peak_memory_mb():
+    """Return the peak memory (resident set size) of the process in MB.
+
+    Returns: float, None if not available on the platform
+    """
+    if resource is None:
+        return None
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024
+
+
+def current_memory_mb():
+    """Return the current memory (resident set size) of the process in MB.
+
+    Returns: float, None if not available on the platform (only Linux)
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            resident_pages = int(file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+class Metrics:
+    """Recorder of pipeline metrics.
+
+    Args:
+        path: string/Path of JSON-lines file the records are appended to,
+            None to keep records in memory only
+        context: keyword arguments added to every record, e.g. the file
+    """
+
+    def __init__(self, path=None, **context):
+        """Initialize recorder without records."""
+        self.path = Path(path) if path is not None else None
+        self.context = context
+        self.records = []
+        self._file = open(self.path, "a", encoding="utf-8") if path else None
+
+    def __enter__(self):
+        """Use recorder as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close file when leaving the context."""
+        self.close()
+
+    def record(self, **fields):
+        """Add a record, with the context of the recorder."""
+        record = {"time": time.time(), **self.context, **fields}
+        self.records.append(record)
+        if self._file is not None:
+            # Write whole lines at once, such that processes can share the file
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Record the wall time of a stage.
+
+        Fields can be added to the yielded dictionary within the stage, e.g.
+        the number of pages once known.
+        Args:
+            name: string with name of the stage
+            fields: keyword arguments added to the record
+        """
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(stage=name, seconds=time.perf_counter() - start, **fields)
+
+    def close(self):
+        """Close the JSON-lines file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TimedTokenizer:
+    """Sentence tokenizer that accumulates the time spent tokenizing.
+
+    Args:
+        tokenizer: nltk sentence tokenizer
+    """
+
+    def __init__(self, tokenizer):
+        """Wrap tokenizer."""
+        self.tokenizer = tokenizer
+        self.seconds = 0.0
+        self.calls = 0
+
+    def tokenize(self, text):
+        """Split text into sentences."""
+        start = time.perf_counter()
+        sentences = self.tokenizer.tokenize(text)
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        return sentences
+
+
+def read_metrics(path, **context):
+    """Read the records of a JSON-lines file.
+
+    Args:
+        path: string/Path of JSON-lines file
+        context: keyword arguments records need to match, e.g. the batch
+    Returns: list of dictionaries
+    """
+    with open(Path(path), encoding="utf-8") as file:
+        records = [json.loads(line) for line in file if line.strip()]
+
+    return [
+        record
+        for record in records
+        if all(record.get(key) == value for key, value in context.items())
+    ]
+
+
+def summarize(records):
+    """Aggregate records by stage.
+
+    Returns: dictionary mapping stage to dictionary with number of records,
+        total seconds and the sums of SUMMED_FIELDS, as well as the maximum
+        of the peak memory
+    """
+    summary = {}
+    for record in records:
+        stage = summary.setdefault(record["stage"], {"count": 0, "seconds": 0.0})
+        stage["count"] += 1
+        stage["seconds"] += record.get("seconds", 0.0)
+        for field in SUMMED_FIELDS:
+            if isinstance(record.get(field), (int, float)):
+                stage[field] = stage.get(field, 0) + record[field]
+        if record.get("peak_memory_mb") is not None:
+            stage["peak_memory_mb"] = max(
+                stage.get("peak_memory_mb", 0.0), record["peak_memory_mb"]
+            )
+
+    return summary
+
+
+def format_summary(summary):
+    """Format the summary of records as table.
+
+    Returns: string
+    """
+    columns = ["count", "seconds"] + SUMMED_FIELDS + ["peak_memory_mb"]
+    columns = [c for c in columns if any(c in stage for stage in summary.values())]
+
+    lines = [f"{'stage':<14}" + "".join(f"{column:>15}" for column in columns)]
+    for name, stage in summary.items():
+        cells = []
+        for column in columns:
+            value = stage.get(column, "")
+            cells.append(
+                f"{value:>15.2f}" if isinstance(value, float) else f"{value:>15}"
+            )
+        lines.append(f"{name:<14}" + "".join(cells))
+
+    return "\n".join(lines)
+
+
+def profiled(function, *args, profile_path=None, n_lines=25, **kwargs):
+    """Call a function under cProfile and print the most expensive calls.
+
+    Args:
+        function: function to be profiled
+        args: positional arguments of the function
+        profile_path: string/Path the profile is saved to (for `pstats` or
+            `snakeviz`), None to only print it
+        n_lines: int with number of printed functions
+        kwargs: keyword arguments of the function
+    Returns: return value of the function
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        if profile_path is not None:
+            profiler.dump_stats(str(profile_path))
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(n_lines)
@@ -0,0 +1,287 @@
+"""This file contains the packing of a document's text into translation requests.
+
+Instead of translating every paragraph on its own, sentences of many
+paragraphs (and pages) are gathered into requests that are as full as the
+upload limit of the translator backend allows. Paragraph boundaries inside a
+request are marked with numbered sentinels, which are used to split the
+translated request back into the paragraph and page structure.
+"""
+import re
+from collections import namedtuple
+from functools import partial
+
+from translation.auxiliary_extraction_translation import translate_extracted
+from translation.backends import InvalidPayloadError
+from translation.backends import validate_payload
+
+# Marks the start of the i-th part of a request, e.g. " [[3]] "
+SENTINEL = " [[{}]] "
+SENTINEL_PATTERN = re.compile(r"\s*\[\[(\d+)\]\]\s*")
+
+# Text of one paragraph (identified by page and paragraph index) in a request
+Part = namedtuple("Part", ["key", "sentences"])
+
+
+def has_content(text):
+    """Check whether a string contains anything worth translating."""
+    try:
+        validate_payload(text, max_request_bytes=float("inf"))
+    except InvalidPayloadError:
+        return False
+    return True
+
+
+def split_paragraphs(pages):
+    """Split pages of extracted text into paragraphs.
+
+    Args:
+        pages: list of strings with the extracted text of each page
+    Returns: list of ((page_index, paragraph_index), paragraph) tuples
+    """
+    return [
+        ((page_index, paragraph_index), paragraph)
+        for page_index, page in enumerate(pages)
+        for paragraph_index, paragraph in enumerate(page.split("\n\n"))
+    ]
+
+
+def join_parts(parts):
+    """Join the parts of a request with numbered sentinels."""
+    return " ".join(parts[0].sentences) + "".join(
+        SENTINEL.format(i) + " ".join(part.sentences)
+        for i, part in enumerate(parts[1:], start=1)
+    )
+
+
+def split_translation(translation, n_parts):
+    """Split a translated request into its parts.
+
+    Args:
+        translation: string with translated request
+        n_parts: int with number of parts in the request
+    Returns: list of strings, None if the sentinels did not survive translation
+    """
+    pieces = SENTINEL_PATTERN.split(translation)
+    texts, indices = pieces[0::2], pieces[1::2]
+
+    if indices != [str(i) for i in range(1, n_parts)]:
+        return None
+    return [text.strip() for text in texts]
+
+
+def plan_requests(pages, tokenizer, max_request_bytes=5000):
+    """Pack the sentences of all paragraphs into requests.
+
+    Sentences are added to a request as long as the request including
+    sentinels stays below `max_request_bytes`, like the chunks of
+    plan_chunks(). Paragraphs without content are not packed. Paragraphs with
+    sentences reaching the limit, or with text that looks like a sentinel,
+    cannot be packed and are returned separately.
+    Args:
+        pages: list of strings with the extracted text of each page
+        tokenizer: nltk sentence tokenizer
+        max_request_bytes: int with upload limit of the backend in bytes
+    Returns: list of requests (lists of Part) and list of unpackable paragraphs
+    """
+    requests = []
+    unpackable = []
+
+    # Initialize containers
+    current = []
+    current_bytes = 0
+
+    for key, paragraph in split_paragraphs(pages):
+        if not has_content(paragraph):
+            continue
+
+        sentences = tokenizer.tokenize(paragraph)
+        if SENTINEL_PATTERN.search(paragraph) or any(
+            len(s.encode("utf-8")) >= max_request_bytes for s in sentences
+        ):
+            unpackable.append((key, paragraph))
+            continue
+
+        for sentence in sentences:
+            size = len(sentence.encode("utf-8"))
+
+            # Continue the paragraph with a space, or start a new part
+            if current and current[-1].key == key:
+                cost = size + 1
+            elif current:
+                cost = size + len(SENTINEL.format(len(current)).encode("utf-8"))
+            else:
+                cost = size
+
+            # Start new request, if the sentence does not fit
+            if current and current_bytes + cost >= max_request_bytes:
+                requests.append(current)
+                current, current_bytes, cost = [], 0, size
+
+            if current and current[-1].key == key:
+                current[-1].sentences.append(sentence)
+            else:
+                current.append(Part(key, [sentence]))
+            current_bytes += cost
+
+    if current:
+        requests.append(current)
+
+    return requests, unpackable
+
+
+def group_by_language(pages, router):
+    """Group the paragraphs that need translation by their language.
+
+    Args:
+        pages: list of strings with the extracted text of each page
+        router: LanguageRouter object
+    Returns: dictionary mapping detected language (or None) to a list of
+        pages, in which paragraphs of other groups are left empty
+    """
+    groups = {}
+    for (page_index, paragraph_index), paragraph in split_paragraphs(pages):
+        if not has_content(paragraph):
+            continue
+
+        translate, language = router.route(paragraph)
+        if not translate:
+            continue
+
+        if language not in groups:
+            groups[language] = [[""] * (page.count("\n\n") + 1) for page in pages]
+        groups[language][page_index][paragraph_index] = paragraph
+
+    return {
+        language: ["\n\n".join(paragraphs) for paragraphs in group]
+        for language, group in groups.items()
+    }
+
+
+def translate_paragraphs(pages, tokenizer, backend, source=None):
+    """Translate the paragraphs of pages with packed requests.
+
+    Args:
+        pages: list of strings with the extracted text of each page
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object
+        source: string with source language, defaults to `source` of the
+            backend
+    Returns: dictionary mapping (page_index, paragraph_index) to list of
+        translated parts of the paragraph
+    """
+    requests, unpackable = plan_requests(pages, tokenizer, backend.max_request_bytes)
+
+    # Translate packed requests, requests without content are kept as is
+    texts = [join_parts(request) for request in requests]
+    to_translate = [i for i, text in enumerate(texts) if has_content(text)]
+    translations = list(texts)
+    for i, translation in zip(
+        to_translate,
+        backend.translate_many([texts[i] for i in to_translate], source=source),
+    ):
+        translations[i] = translation
+
+    # Collect translated parts of each paragraph
+    translated = {}
+    for request, translation in zip(requests, translations):
+        parts = split_translation(translation, len(request))
+
+        # Fall back to one request per part, if sentinels were mangled
+        if parts is None:
+            parts = [
+                backend.translate(" ".join(part.sentences), source=source)
+                if has_content(" ".join(part.sentences))
+                else " ".join(part.sentences)
+                for part in request
+            ]
+
+        for part, text in zip(request, parts):
+            translated.setdefault(part.key, []).append(text)
+
+    for key, paragraph in unpackable:
+        translated[key] = [
+            translate_extracted(
+                paragraph, tokenizer, backend=backend, source=source
+            ).strip()
+        ]
+
+    return translated
+
+
+def recall_paragraphs(pages, tokenizer, backend, memory, source=None):
+    """Translate paragraphs, reusing translations of similar paragraphs.
+
+    Paragraphs found in the translation memory are not sent to the backend,
+    the translations of all other paragraphs are added to the memory.
+    Args:
+        pages: list of strings with the extracted text of each page
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object
+        memory: TranslationMemory object
+        source: string with source language, defaults to `source` of the
+            backend
+    Returns: dictionary as returned by translate_paragraphs()
+    """
+    pair = f"{backend.name}:{source or backend.source}:{backend.target}"
+
+    recalled = {}
+    remaining = [page.split("\n\n") for page in pages]
+    for key, paragraph in split_paragraphs(pages):
+        if has_content(paragraph):
+            translation = memory.lookup(paragraph, pair)
+            if translation is not None:
+                recalled[key] = [translation]
+                remaining[key[0]][key[1]] = ""
+
+    translated = translate_paragraphs(
+        ["\n\n".join(paragraphs) for paragraphs in remaining],
+        tokenizer,
+        backend,
+        source,
+    )
+    paragraphs = dict(split_paragraphs(pages))
+    memory.add_many(
+        [(paragraphs[key], " ".join(parts)) for key, parts in translated.items()],
+        pair,
+    )
+
+    return {**translated, **recalled}
+
+
+def translate_pages(pages, tokenizer, backend, router=None, memory=None):
+    """Translate the extracted text of a document with packed requests.
+
+    With a LanguageRouter, paragraphs in the target language or without
+    translatable content are kept as is and the detected language of the
+    other paragraphs is passed to the backend (unless its source language is
+    set). Paragraphs of different languages are not packed together.
+    Args:
+        pages: list of strings with the extracted text of each page
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object
+        router: LanguageRouter object, None to translate all paragraphs
+        memory: TranslationMemory object reused for similar paragraphs, None
+            for none (see recall_paragraphs())
+    Returns: list of strings with the translated text of each page
+    """
+    if memory is None:
+        translate = translate_paragraphs
+    else:
+        translate = partial(recall_paragraphs, memory=memory)
+
+    if router is None:
+        translated = translate(pages, tokenizer, backend)
+
+    else:
+        translated = {}
+        for language, group in group_by_language(pages, router).items():
+            source = language if backend.source == "auto" else None
+            translated.update(translate(group, tokenizer, backend, source=source))
+
+    # Rebuild pages, paragraphs without translation are kept as is
+    translated_pages = [[] for _ in pages]
+    for key, paragraph in split_paragraphs(pages):
+        text = " ".join(translated[key]) if key in translated else paragraph
+        translated_pages[key[0]].append(text)
+
+    return ["\n\n".join(paragraphs) for paragraphs in translated_pages]
@@ -0,0 +1,187 @@
+"""This file contains the writers that store translated pages as pdf.
+
+`PDFWriter` keeps all pages of a document in one FPDF object and saves it
+at the end. `StreamingPDFWriter` moves the content of every finished page to
+a temporary spill file and writes the final pdf directly to disk, such that
+only a few hundred bytes of bookkeeping per page stay in memory. If it is
+interrupted, the pages completed so far are saved as a valid (partial) pdf.
+"""
+import os
+import tempfile
+from pathlib import Path  # for Windows/Unix compatibility
+
+import translation.auxiliary_extraction_translation as auxiliary
+
+
+class _FileBuffer:
+    """Append-only file standing in for the bytearray buffer of FPDF.
+
+    FPDF appends the document to `buffer` and uses its length as offset of
+    the pdf objects, which is the position in the file.
+    """
+
+    def __init__(self, file):
+        """Initialize buffer writing to an open binary file."""
+        self.file = file
+        self.size = 0
+
+    def __iadd__(self, data):
+        """Write data to the file."""
+        self.file.write(data)
+        self.size += len(data)
+        return self
+
+    def __len__(self):
+        """Return number of bytes written."""
+        return self.size
+
+
+class _SpilledPage(dict):
+    """Page of FPDF whose content has been moved to a spill file."""
+
+    __slots__ = ("offset", "size", "spill_file")
+
+    def __init__(self, page, spill_file):
+        """Move content of the page to the end of the spill file."""
+        content = page.pop("content")
+        super().__init__(page)
+        spill_file.seek(0, os.SEEK_END)
+        self.offset = spill_file.tell()
+        self.size = spill_file.write(content)
+        self.spill_file = spill_file
+
+    def __getitem__(self, key):
+        """Read the content from the spill file when it is needed."""
+        if key == "content":
+            self.spill_file.seek(self.offset)
+            return self.spill_file.read(self.size)
+        return super().__getitem__(key)
+
+
+class StreamingCustomPDF(auxiliary.CustomPDF):
+    """CustomPDF that keeps only the current page in memory.
+
+    The content of finished pages is moved to a spill file and the document
+    is written to `file` when the pdf is closed. The alias for the total
+    number of pages ("{nb}") is not substituted, since this would load the
+    content of all pages.
+    """
+
+    def __init__(self, file, *args, **kwargs):
+        """Initialize document written to an open binary file."""
+        super().__init__(*args, **kwargs)
+        self.alias_nb_pages(None)
+        self.buffer = _FileBuffer(file)
+        self._spill_file = tempfile.TemporaryFile()
+
+    def _endpage(self):
+        """Move the content of the finished page to the spill file."""
+        super()._endpage()
+        if self.page > 0 and not isinstance(self.pages[self.page], _SpilledPage):
+            self.pages[self.page] = _SpilledPage(
+                self.pages[self.page], self._spill_file
+            )
+
+    def close(self):
+        """Write the document and remove the spill file."""
+        super().close()
+        self._spill_file.close()
+
+
+class PDFWriter:
+    """Write translated pages into a single pdf, in order of their index.
+
+    Pages may be added in any order, they are written as soon as all
+    previous pages have been added.
+    Args:
+        output_path: string/Path of the pdf to be created
+        n_pages: int with number of pages of the document
+    """
+
+    def __init__(self, output_path, n_pages):
+        """Initialize writer without pages."""
+        self.output_path = Path(output_path)
+        self.n_pages = n_pages
+        self.pages_written = 0
+        self.closed = False
+        self._pending = {}
+        self._pdf = self._create_pdf()
+
+    def __enter__(self):
+        """Use writer as context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Save the pdf, unless an error occurred."""
+        if exc_type is None:
+            self.close()
+
+    def _create_pdf(self):
+        """Initialize the FPDF object to write on."""
+        return auxiliary.initialize_pdf_storage()
+
+    def add_page(self, page_index, text, tables=None):
+        """Add the translated text of a page.
+
+        Args:
+            page_index: int with index of page in the document
+            text: string with translated text of page
+            tables: list of translated tables of the page, see write_table()
+        """
+        self._pending[page_index] = (text, tables)
+        while self.pages_written in self._pending:
+            page_number = f"{self.pages_written + 1}/{self.n_pages}"
+            text, tables = self._pending.pop(self.pages_written)
+            self._pdf = auxiliary.write_to_page(
+                text, page_number, pdf=self._pdf, tables=tables
+            )
+            self.pages_written += 1
+
+    def close(self):
+        """Save all written pages as pdf."""
+        if self.closed:
+            return
+        self.closed = True
+
+        auxiliary.save_to_pdf(
+            self._pdf,
+            file_name=self.output_path.stem,
+            destination_folder=str(self.output_path.parent),
+        )
+
+
+class StreamingPDFWriter(PDFWriter):
+    """Write translated pages to disk as they are added.
+
+    Only the current page is kept in memory. The pdf is written
+    to a temporary file next to the output, which replaces the output once
+    complete. If the writer is left with an error (including
+    KeyboardInterrupt), the pages written so far are saved as output.
+    Args:
+        output_path: string/Path of the pdf to be created
+        n_pages: int with number of pages of the document
+    """
+
+    def _create_pdf(self):
+        """Initialize the StreamingCustomPDF object writing to a temporary file."""
+        self.temporary_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self._file = open(self.temporary_path, "wb")
+
+        # Set-up as in initialize_pdf_storage()
+        pdf = StreamingCustomPDF(self._file)
+        pdf.set_font("Arial", size=7)
+        return pdf
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Save the pdf, also if an error occurred."""
+        self.close()
+
+    def close(self):
+        """Finish the pdf and move it to the output path."""
+        if self.closed:
+            return
+        self.closed = True
+
+        self._pdf.close()
+        self._file.close()
+        os.replace(self.temporary_path, self.output_path)
@@ -0,0 +1,302 @@
+"""This file contains the selection of pages to be extracted from a pdf.
+
+Pages can be selected by their position in the pdf (e.g. "10-40") and by
+predicates on their content (e.g. containing a keyword, or consisting mostly
+of tables). Predicates are evaluated on a cheap first pass over the page,
+which collects the characters and ruling lines drawn by its content stream
+without the layout analysis of pdfplumber. Unselected pages are never laid
+out, such that partial runs cost in proportion to the selected pages.
+"""
+import re
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import namedtuple
+
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.utils import apply_matrix_pt
+
+PAGE_RANGE = re.compile(r"^\s*(\d+)?\s*(-)?\s*(\d+)?\s*$")
+
+PageSniff = namedtuple("PageSniff", ["text", "table_ratio"])
+PageSniff.__doc__ = """Result of the first pass over a page, see sniff_page().
+
+Args:
+    text: string with the characters of the page in drawing order, spaces
+        between words may be missing
+    table_ratio: float with share of characters within regions enclosed by
+        ruling lines
+"""
+
+
+def parse_page_ranges(spec):
+    """Parse page ranges, e.g. "1-5,10,20-", counting pages from 1.
+
+    Returns: list of (start, stop) tuples with page indices, stop is None for
+        ranges up to the last page
+    """
+    ranges = []
+    for part in spec.split(","):
+        match = PAGE_RANGE.match(part)
+        if match is None or match.group(1, 3) == (None, None):
+            raise ValueError(f"The page range {part!r} is not valid.")
+
+        first, dash, last = match.groups()
+        start = int(first) - 1 if first is not None else 0
+        if dash is None:
+            stop = start + 1
+        else:
+            stop = int(last) if last is not None else None
+        if start < 0 or (stop is not None and stop <= start):
+            raise ValueError(f"The page range {part!r} is not valid.")
+        ranges.append((start, stop))
+
+    return ranges
+
+
+# Tolerances in points for edges to be aligned with an axis and to touch
+ALIGN_TOLERANCE = 1
+EDGE_TOLERANCE = 3
+
+
+class _SniffingDevice(PDFTextDevice):
+    """Device collecting characters and axis-aligned edges of paths of a page."""
+
+    def __init__(self, rsrcmgr):
+        """Initialize device without characters and edges."""
+        super().__init__(rsrcmgr)
+        self.chars = []
+        self.horizontals = []
+        self.verticals = []
+
+    def render_char(
+        self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate
+    ):
+        """Collect a character and its origin."""
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = ""
+        self.chars.append((text, matrix[4], matrix[5]))
+        return font.char_width(cid) * fontsize * scaling
+
+    def paint_path(self, graphicstate, stroke, fill, evenodd, path):
+        """Collect the horizontal and vertical edges of lines and rects.
+
+        Edges are stored as (x0, x1, y) and (x, y0, y1) tuples, curves are
+        ignored.
+        """
+        start = current = None
+        for segment in path:
+            if segment[0] == "m":
+                start = current = apply_matrix_pt(self.ctm, segment[-2:])
+                continue
+            if current is None:
+                continue
+            if segment[0] == "h":
+                point = start
+            else:
+                point = apply_matrix_pt(self.ctm, segment[-2:])
+            if segment[0] in ("l", "h"):
+                self._add_edge(current, point)
+            current = point
+
+    def _add_edge(self, first, second):
+        """Collect a line segment if it is horizontal or vertical."""
+        (xa, ya), (xb, yb) = first, second
+        if abs(ya - yb) <= ALIGN_TOLERANCE and xa != xb:
+            self.horizontals.append((min(xa, xb), max(xa, xb), (ya + yb) / 2))
+        elif abs(xa - xb) <= ALIGN_TOLERANCE and ya != yb:
+            self.verticals.append(((xa + xb) / 2, min(ya, yb), max(ya, yb)))
+
+
+def enclosed_regions(horizontals, verticals, tolerance=EDGE_TOLERANCE):
+    """Cluster touching edges into regions enclosed by ruling lines.
+
+    Horizontal and vertical edges touching each other (within `tolerance`) are
+    clustered, as are collinear edges continuing each other. Clusters with at
+    least two horizontal and two vertical edges enclose a region (e.g. a rect
+    or a table with ruling lines), other edges (e.g. a rule below a header) do
+    not.
+    Args:
+        horizontals: list of (x0, x1, y) tuples
+        verticals: list of (x, y0, y1) tuples
+        tolerance: float with distance in points at which edges touch
+    Returns: list of (x0, y0, x1, y1) tuples with bounding boxes of regions
+    """
+    parents = list(range(len(horizontals) + len(verticals)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    # Verticals sorted by position, to find those crossing a horizontal
+    by_x = sorted(range(len(verticals)), key=lambda j: verticals[j][0])
+    xs = [verticals[j][0] for j in by_x]
+    for i, (x0, x1, y) in enumerate(horizontals):
+        first = bisect_left(xs, x0 - tolerance)
+        last = bisect_right(xs, x1 + tolerance)
+        for j in by_x[first:last]:
+            _, y0, y1 = verticals[j]
+            if y0 - tolerance <= y <= y1 + tolerance:
+                parents[find(i)] = find(len(horizontals) + j)
+
+    # Join collinear edges continuing each other, e.g. borders drawn per line
+    for edges, offset in [(horizontals, 0), (verticals, len(horizontals))]:
+        if edges is horizontals:
+            keys = [(y, x0, x1) for x0, x1, y in edges]
+        else:
+            keys = list(edges)
+
+        # Group edges of about the same level, then sweep them along the level
+        groups = []
+        for index in sorted(range(len(keys)), key=keys.__getitem__):
+            if groups and keys[index][0] - keys[groups[-1][0]][0] <= tolerance:
+                groups[-1].append(index)
+            else:
+                groups.append([index])
+        for group in groups:
+            group.sort(key=lambda index: keys[index][1])
+            run_end = None
+            for previous, index in zip([None] + group, group):
+                _, start, end = keys[index]
+                if run_end is not None and start <= run_end + tolerance:
+                    parents[find(offset + previous)] = find(offset + index)
+                    run_end = max(run_end, end)
+                else:
+                    run_end = end
+
+    clusters = {}
+    for i, (x0, x1, y) in enumerate(horizontals):
+        cluster = clusters.setdefault(find(i), ([], []))
+        cluster[0].append((x0, y, x1, y))
+    for j, (x, y0, y1) in enumerate(verticals, start=len(horizontals)):
+        cluster = clusters.setdefault(find(j), ([], []))
+        cluster[1].append((x, y0, x, y1))
+
+    regions = []
+    for cluster_horizontals, cluster_verticals in clusters.values():
+        if len(cluster_horizontals) < 2 or len(cluster_verticals) < 2:
+            continue
+        edges = cluster_horizontals + cluster_verticals
+        regions.append(
+            (
+                min(edge[0] for edge in edges),
+                min(edge[1] for edge in edges),
+                max(edge[2] for edge in edges),
+                max(edge[3] for edge in edges),
+            )
+        )
+    return regions
+
+
+def sniff_page(pdf, page):
+    """Collect text and share of table text of a page, without layout analysis.
+
+    The share of table text is estimated as the share of characters within
+    regions enclosed by ruling lines and rects (see enclosed_regions()), such
+    that rules above and below the text of a page do not count as tables.
+    Args:
+        pdf: pdfplumber PDF object
+        page: pdfplumber page Object of the pdf
+    Returns: PageSniff tuple
+    """
+    device = _SniffingDevice(pdf.rsrcmgr)
+    PDFPageInterpreter(pdf.rsrcmgr, device).process_page(page.page_obj)
+    text = "".join(char for char, _, _ in device.chars)
+
+    table_ratio = 0.0
+    if device.chars:
+        regions = [
+            (x0, y0, x1, y1)
+            for x0, y0, x1, y1 in enclosed_regions(device.horizontals, device.verticals)
+            if x0 < x1 and y0 < y1
+        ]
+        if regions:
+            within = sum(
+                any(x0 <= x <= x1 and y0 <= y <= y1 for x0, y0, x1, y1 in regions)
+                for _, x, y in device.chars
+            )
+            table_ratio = within / len(device.chars)
+
+    return PageSniff(text, table_ratio)
+
+
+def _normalize(text):
+    """Lower-case text and remove whitespace, which the first pass may lack."""
+    return "".join(text.lower().split())
+
+
+class PageSelection:
+    """Selection of pages by position and content.
+
+    A page is selected if it is in one of the page ranges and, if keywords
+    are given, contains one of them, and its share of table text is at most
+    `max_table_ratio`. Further conditions can be given as `predicates`, which
+    need to be module-level functions for use in worker processes.
+    Args:
+        pages: string with page ranges (see parse_page_ranges()), None for all
+            pages
+        keywords: list of strings, pages need to contain at least one of them
+            (ignoring case and whitespace)
+        max_table_ratio: float with maximum share of table text, None for any
+        predicates: list of functions called with a PageSniff tuple, returning
+            whether the page is selected
+    """
+
+    def __init__(self, pages=None, keywords=(), max_table_ratio=None, predicates=()):
+        """Initialize selection."""
+        self.ranges = parse_page_ranges(pages) if pages is not None else [(0, None)]
+        self.keywords = [_normalize(keyword) for keyword in keywords]
+        self.max_table_ratio = max_table_ratio
+        self.predicates = list(predicates)
+
+    def needs_sniff(self):
+        """Check whether the selection depends on the content of pages."""
+        return bool(
+            self.keywords or self.max_table_ratio is not None or self.predicates
+        )
+
+    def accepts(self, sniff):
+        """Check whether a page with the given first-pass result is selected."""
+        if self.keywords:
+            text = _normalize(sniff.text)
+            if not any(keyword in text for keyword in self.keywords):
+                return False
+        if (
+            self.max_table_ratio is not None
+            and sniff.table_ratio > self.max_table_ratio
+        ):
+            return False
+        return all(predicate(sniff) for predicate in self.predicates)
+
+    def candidates(self, n_pages):
+        """Return the indices of the pages in the page ranges, in ascending order."""
+        return sorted(
+            {
+                index
+                for start, stop in self.ranges
+                for index in range(start, min(stop or n_pages, n_pages))
+            }
+        )
+
+    def selects(self, pdf, page_index):
+        """Check whether a page of the candidates is selected by its content."""
+        if not self.needs_sniff():
+            return True
+        return self.accepts(sniff_page(pdf, pdf.pages[page_index]))
+
+    def page_indices(self, pdf):
+        """Select the pages of a pdf, one at a time.
+
+        Args:
+            pdf: pdfplumber PDF object
+        Returns: generator of ints with indices of the selected pages, in
+            ascending order
+        """
+        for page_index in self.candidates(len(pdf.pages)):
+            if self.selects(pdf, page_index):
+                yield page_index
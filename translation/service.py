@@ -0,0 +1,567 @@
+"""This file contains the worker service translating pdfs submitted ad hoc.
+
+Translating a single small pdf with text_extraction_translation.py mostly
+waits for imports, loading the tokenizer and setting up the translator.
+The service does this once: worker processes keep tokenizer, translator
+backends and caches warm and take jobs from a local queue. The queue is a
+SQLite database, such that clients can submit jobs and query their status
+from any process, and queued jobs survive a restart of the service.
+Start the service and submit jobs with e.g.
+    python -m translation.service --dest-path corpus serve
+    python -m translation.service --dest-path corpus submit report.pdf --wait
+"""
+import argparse
+import os
+import socket
+import sqlite3
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path  # for Windows/Unix compatibility
+
+import translation.auxiliary_extraction_translation as auxiliary
+from translation.backends import BACKENDS
+from translation.backends import get_backend
+from translation.cache import TranslationCache
+from translation.extraction_cache import ExtractionCache
+from translation.memory import TranslationMemory
+from translation.metrics import Metrics
+from translation.selection import PageSelection
+from translation.selection import parse_page_ranges
+from translation.text_extraction_translation import extract_and_translate_file
+from translation.text_extraction_translation import get_output_path
+from translation.tokenizers import add_data_dir
+from translation.tokenizers import preload_tokenizers
+
+STATUSES = ["queued", "running", "done", "failed"]
+
+Job = namedtuple("Job", ["id", "file", "pages", "target"])
+Job.__doc__ = """Job of the service.
+
+Args:
+    id: int with id of the job in the queue
+    file: string with absolute path to pdf
+    pages: string with page ranges (see parse_page_ranges()), None for all
+    target: string with target language, None for the target of the backend
+"""
+
+
+def percentile(values, share):
+    """Return the value below which a share of the values lies, None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+class JobQueue:
+    """Persistent queue of translation jobs.
+
+    Clients and the service may use the queue from different processes, as
+    SQLite serializes writes. Claimed jobs are leased to their owner, which
+    renews the lease while running them, such that services sharing a queue
+    only queue again jobs of their own or of services that stopped.
+    Args:
+        path: string/Path with location of the SQLite database
+        owner: string identifying the service claiming jobs, defaults to
+            host and process id
+        lease_seconds: float with time after which running jobs of an owner
+            not renewing their lease are considered interrupted
+    """
+
+    def __init__(self, path, owner=None, lease_seconds=60):
+        """Open (or create) the queue database."""
+        self.path = Path(path)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self._connection = sqlite3.connect(str(self.path), timeout=60)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " file TEXT NOT NULL,"
+            " pages TEXT,"
+            " target TEXT,"
+            " status TEXT NOT NULL,"
+            " submitted REAL NOT NULL,"
+            " started REAL,"
+            " finished REAL,"
+            " output TEXT,"
+            " n_pages INTEGER,"
+            " error TEXT,"
+            " owner TEXT,"
+            " lease REAL)"
+        )
+        # Add the lease to queues created without it
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")
+        ]
+        for column, kind in [("owner", "TEXT"), ("lease", "REAL")]:
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._connection.commit()
+
+    def __enter__(self):
+        """Use queue as context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close queue when leaving the context."""
+        self.close()
+
+    def submit(self, file_path, pages=None, target=None):
+        """Add a job to the queue.
+
+        Args:
+            file_path: string with path to pdf, stored as absolute path
+            pages: string with page ranges, e.g. "1-5,10", None for all pages
+            target: string with target language, None for the default of the
+                backend
+        Returns: int with id of the job
+        """
+        if pages is not None:
+            parse_page_ranges(pages)
+
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (file, pages, target, status, submitted)"
+                " VALUES (?, ?, ?, 'queued', ?)",
+                (Path(file_path).resolve().as_posix(), pages, target, time.time()),
+            )
+        return cursor.lastrowid
+
+    def claim(self, n_jobs):
+        """Mark the oldest queued jobs as running, leased to the owner.
+
+        Returns: list of Job tuples
+        """
+        if n_jobs <= 0:
+            return []
+
+        rows = self._connection.execute(
+            "SELECT id, file, pages, target FROM jobs"
+            " WHERE status = 'queued' ORDER BY id LIMIT ?",
+            (n_jobs,),
+        ).fetchall()
+
+        claimed = []
+        with self._connection:
+            for row in rows:
+                # Another service may have claimed the job in the meantime
+                now = time.time()
+                cursor = self._connection.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, owner = ?,"
+                    " lease = ? WHERE id = ? AND status = 'queued'",
+                    (now, self.owner, now + self.lease_seconds, row[0]),
+                )
+                if cursor.rowcount == 1:
+                    claimed.append(Job(*row))
+        return claimed
+
+    def finish(self, job_id, output, n_pages):
+        """Record the output of a job."""
+        with self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'done', finished = ?, output = ?,"
+                " n_pages = ? WHERE id = ?",
+                (time.time(), output, n_pages, job_id),
+            )
+
+    def fail(self, job_id, error):
+        """Record the error of a job."""
+        with self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ?"
+                " WHERE id = ?",
+                (time.time(), error, job_id),
+            )
+
+    def renew(self, job_ids):
+        """Extend the lease of running jobs of the owner."""
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE jobs SET lease = ?"
+                " WHERE id = ? AND status = 'running' AND owner = ?",
+                [
+                    (time.time() + self.lease_seconds, job_id, self.owner)
+                    for job_id in job_ids
+                ],
+            )
+
+    def requeue_running(self, own=True):
+        """Queue jobs again that were running when their service stopped.
+
+        These are the running jobs of the owner and jobs whose lease expired,
+        jobs of other services renewing their lease keep running.
+        Args:
+            own: bool, queue the running jobs of the owner again, False while
+                the owner is running them
+        Returns: int with number of queued jobs
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET status = 'queued', started = NULL, owner = NULL,"
+                " lease = NULL WHERE status = 'running'"
+                " AND ((owner = ? AND ?) OR lease IS NULL OR lease < ?)",
+                (self.owner, own, time.time()),
+            )
+        return cursor.rowcount
+
+    def get(self, job_id):
+        """Return a job with its status and times as dictionary, None if unknown."""
+        cursor = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def wait(self, job_id, timeout=None, poll_seconds=0.2):
+        """Wait until a job is done or failed.
+
+        Returns: dictionary of the job, see get()
+        """
+        start = time.perf_counter()
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise ValueError(f"The job {job_id} does not exist.")
+            if job["status"] in ["done", "failed"]:
+                return job
+            if timeout is not None and time.perf_counter() - start > timeout:
+                raise TimeoutError(f"The job {job_id} did not finish in {timeout}s.")
+            time.sleep(poll_seconds)
+
+    def stats(self):
+        """Return the number of jobs per status and latencies of finished jobs.
+
+        Latency is the time from submission to completion of a job, which is
+        the sum of its waiting time in the queue and its run time.
+        Returns: dictionary
+        """
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(
+            self._connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        )
+
+        rows = self._connection.execute(
+            "SELECT submitted, started, finished FROM jobs WHERE status = 'done'"
+        ).fetchall()
+        latencies = [finished - submitted for submitted, _, finished in rows]
+        waits = [started - submitted for submitted, started, _ in rows]
+        runs = [finished - started for _, started, finished in rows]
+
+        return {
+            **counts,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "wait_mean": statistics.mean(waits) if waits else None,
+            "run_mean": statistics.mean(runs) if runs else None,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+def job_output_path(job, destination_path):
+    """Determine where the translation of a job is saved.
+
+    Like get_output_path(), with the suffixes "_selected" for page ranges and
+    the target language, e.g. "report_selected_fr.pdf".
+    Returns: Path of the output pdf
+    """
+    output_path = get_output_path(job.file, destination_path)
+    stem = output_path.stem
+    if job.pages:
+        stem += "_selected"
+    if job.target:
+        stem += f"_{job.target}"
+    return output_path.with_name(stem + ".pdf")
+
+
+# Warm state of a worker process, see _initialize_worker()
+_state = {}
+
+
+def _initialize_worker(
+    backend_name="google",
+    backend_kwargs=None,
+    cache_path=None,
+    extraction_cache_path=None,
+    memory_path=None,
+    memory_threshold=0.9,
+    nltk_data=None,
+):
+    """Load tokenizer and open caches once per worker process."""
+    if nltk_data is not None:
+        add_data_dir(nltk_data)
+    preload_tokenizers()
+
+    _state.clear()
+    _state["backend_name"] = backend_name
+    _state["backend_kwargs"] = backend_kwargs or {}
+    _state["backends"] = {}
+    if cache_path is not None:
+        _state["cache"] = TranslationCache(cache_path)
+    if extraction_cache_path is not None:
+        _state["extraction_cache"] = ExtractionCache(extraction_cache_path)
+    if memory_path is not None:
+        _state["memory"] = TranslationMemory(memory_path, threshold=memory_threshold)
+
+
+def _backend(target):
+    """Return the backend of a target language, created on first use."""
+    if target not in _state["backends"]:
+        kwargs = dict(_state["backend_kwargs"])
+        if target is not None:
+            kwargs["target"] = target
+        _state["backends"][target] = get_backend(_state["backend_name"], **kwargs)
+    return _state["backends"][target]
+
+
+def run_job(job, destination_path, metrics_path=None):
+    """Translate the pdf of a job in a worker process.
+
+    The pdf needs to be within `destination_path`, its translation is saved
+    in the copy of its directory under "output/" (see job_output_path()).
+    Returns: tuple with string path of the output pdf and number of pages
+    """
+    auxiliary.create_destination_dir(destination_path, job.file)
+    selection = PageSelection(pages=job.pages) if job.pages else None
+    output_path = job_output_path(job, destination_path)
+
+    metrics = Metrics(metrics_path, job=job.id, file=job.file)
+    try:
+        extract_and_translate_file(
+            file_path=job.file,
+            destination_path=destination_path,
+            backend=_backend(job.target),
+            cache=_state.get("cache"),
+            streaming=True,
+            extraction_cache=_state.get("extraction_cache"),
+            metrics=metrics,
+            selection=selection,
+            memory=_state.get("memory"),
+            output_path=output_path,
+        )
+    finally:
+        metrics.close()
+
+    n_pages = next(
+        record["pages"] for record in metrics.records if record["stage"] == "extract"
+    )
+    return output_path.as_posix(), n_pages
+
+
+def serve(
+    queue_path,
+    destination_path,
+    workers=1,
+    backend_name="google",
+    backend_kwargs=None,
+    cache_path=None,
+    extraction_cache_path=None,
+    memory_path=None,
+    memory_threshold=0.9,
+    metrics_path=None,
+    nltk_data=None,
+    poll_seconds=0.2,
+    until_idle=False,
+    lease_seconds=60,
+):
+    """Run the worker service, taking jobs from the queue.
+
+    Up to `workers` jobs are translated at once, each by a warm worker
+    process. The leases of running jobs are renewed while the service runs.
+    Jobs that were running when their service stopped are queued again at
+    start and once their lease expired, see JobQueue.requeue_running().
+    Args:
+        queue_path: string with location of the job queue
+        destination_path: string with path of the folder containing the pdfs
+        workers: int with number of worker processes
+        backend_name: string with name of translator backend
+        backend_kwargs: dictionary with keyword arguments for the backend
+        cache_path: string with location of translation cache, None for none
+        extraction_cache_path: string with location of extraction cache, None
+            for none
+        memory_path: string with location of the fuzzy translation memory,
+            None for none
+        memory_threshold: float with minimum similarity of reused paragraphs
+        metrics_path: string with location of JSON-lines metrics file, None
+            for none
+        nltk_data: string with directory of (bundled) nltk data
+        poll_seconds: float with interval in which the queue is checked
+        until_idle: bool, stop once the queue is empty, e.g. for draining the
+            queue with a single call
+        lease_seconds: float with time after which jobs of a service that
+            stopped are queued again
+    Returns: dictionary with statistics of the queue, see JobQueue.stats()
+    """
+    destination_path = Path(destination_path).resolve().as_posix()
+
+    start = time.perf_counter()
+    with JobQueue(
+        queue_path, lease_seconds=lease_seconds
+    ) as queue, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialize_worker,
+        initargs=(
+            backend_name,
+            backend_kwargs,
+            cache_path,
+            extraction_cache_path,
+            memory_path,
+            memory_threshold,
+            nltk_data,
+        ),
+    ) as executor:
+        requeued = queue.requeue_running()
+        print(
+            f"Serving {destination_path} with {workers} workers"
+            f" ({requeued} interrupted jobs queued again)."
+        )
+
+        running = {}
+        renewed = time.monotonic()
+        while True:
+            # Renew leases well before they expire, take over expired jobs
+            if time.monotonic() - renewed > lease_seconds / 4:
+                queue.renew([job.id for job in running.values()])
+                requeued = queue.requeue_running(own=False)
+                if requeued:
+                    print(f"Queued {requeued} jobs of stopped services again.")
+                renewed = time.monotonic()
+
+            for job in queue.claim(workers - len(running)):
+                future = executor.submit(run_job, job, destination_path, metrics_path)
+                running[future] = job
+
+            if not running:
+                if until_idle:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            done, _ = wait(running, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                try:
+                    output, n_pages = future.result()
+                except Exception as error:
+                    queue.fail(job.id, f"{type(error).__name__}: {error}")
+                    print(f"Job {job.id} {job.file}: failed with {error!r}.")
+                    continue
+
+                queue.finish(job.id, output, n_pages)
+                record = queue.get(job.id)
+                print(
+                    f"Job {job.id} {job.file}: {n_pages} pages in"
+                    f" {record['finished'] - record['started']:.2f}s,"
+                    f" {record['finished'] - record['submitted']:.2f}s after"
+                    " submission."
+                )
+
+        stats = queue.stats()
+
+    print(
+        f"Served {stats['done']} jobs ({stats['failed']} failed)"
+        f" in {time.perf_counter() - start:.1f}s."
+    )
+    return stats
+
+
+def format_stats(stats):
+    """Format the statistics of the queue as text."""
+    lines = [", ".join(f"{stats[status]} {status}" for status in STATUSES)]
+    for name in ["latency_p50", "latency_p95", "wait_mean", "run_mean"]:
+        if stats[name] is not None:
+            lines.append(f"{name:<12} {stats[name]:>8.2f}s")
+    return "\n".join(lines)
+
+
+def main(args=None):
+    """Run the worker service or submit jobs to it."""
+    parser = argparse.ArgumentParser(description="Translate pdfs as a service.")
+    parser.add_argument("--dest-path", required=True)
+    parser.add_argument("--queue", default=None, help="location of the job queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="run the worker service")
+    serve_parser.add_argument("--workers", type=int, default=1)
+    serve_parser.add_argument("--backend", choices=sorted(BACKENDS), default="google")
+    serve_parser.add_argument("--nltk-data", default=None)
+    serve_parser.add_argument("--memory-threshold", type=float, default=None)
+    serve_parser.add_argument(
+        "--until-idle", action="store_true", help="stop once all jobs are done"
+    )
+
+    submit_parser = subparsers.add_parser("submit", help="submit pdfs")
+    submit_parser.add_argument("files", nargs="+")
+    submit_parser.add_argument("--pages", default=None, help='e.g. "10-40"')
+    submit_parser.add_argument("--target", default=None, help='e.g. "fr"')
+    submit_parser.add_argument("--wait", action="store_true")
+
+    status_parser = subparsers.add_parser("status", help="show the status of jobs")
+    status_parser.add_argument("ids", nargs="+", type=int)
+
+    subparsers.add_parser("stats", help="show the latency of finished jobs")
+    args = parser.parse_args(args)
+
+    output = args.dest_path + "/output/"
+    os.makedirs(output, exist_ok=True)
+    queue_path = args.queue or output + "jobs.sqlite"
+
+    if args.command == "serve":
+        serve(
+            queue_path,
+            args.dest_path,
+            workers=args.workers,
+            backend_name=args.backend,
+            cache_path=output + "translation_cache.sqlite",
+            extraction_cache_path=output + "extraction_cache.sqlite",
+            memory_path=(
+                output + "translation_memory.sqlite"
+                if args.memory_threshold is not None
+                else None
+            ),
+            memory_threshold=args.memory_threshold,
+            metrics_path=output + "metrics.jsonl",
+            nltk_data=args.nltk_data,
+            until_idle=args.until_idle,
+        )
+        return
+
+    with JobQueue(queue_path) as queue:
+        if args.command == "submit":
+            job_ids = [
+                queue.submit(file_path, pages=args.pages, target=args.target)
+                for file_path in args.files
+            ]
+            print(f"Submitted jobs {', '.join(map(str, job_ids))}.")
+            if args.wait:
+                for job_id in job_ids:
+                    job = queue.wait(job_id)
+                    latency = job["finished"] - job["submitted"]
+                    print(
+                        f"Job {job_id}: {job['status']} after {latency:.2f}s,"
+                        f" {job['output'] or job['error']}"
+                    )
+
+        elif args.command == "status":
+            for job_id in args.ids:
+                job = queue.get(job_id)
+                if job is None:
+                    print(f"Job {job_id}: unknown")
+                else:
+                    print(f"Job {job_id}: {job['status']} {job['file']}")
+
+        else:
+            print(format_stats(queue.stats()))
+
+
+if __name__ == "__main__":
+    main()
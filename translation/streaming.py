@@ -0,0 +1,212 @@
+"""This file contains the streaming pipeline, which yields translated pages.
+
+Pages are extracted in a background thread and handed to the translation via
+a bounded buffer, such that extraction and translation overlap, and at most a
+few batches of pages are held in memory. Translated pages are yielded as soon
+as their batch is complete, such that consumers (a pdf writer, a JSON export,
+a search index) can process a document without holding all of it.
+"""
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import translation.auxiliary_extraction_translation as auxiliary
+from translation.backends import GoogleBackend
+from translation.cache import CachedBackend
+from translation.dispatch import TranslationDispatcher
+from translation.extraction import iter_extracted_pages
+from translation.language import LanguageRouter
+from translation.packing import translate_pages
+
+PageRecord = namedtuple(
+    "PageRecord",
+    [
+        "page_index",
+        "page_number",
+        "source",
+        "translated",
+        "extract_seconds",
+        "translate_seconds",
+    ],
+)
+PageRecord.__doc__ = """Translated page yielded by iter_translated_pages().
+
+Args:
+    page_index: int with index of the page in the pdf
+    page_number: string with page number as printed on the page
+    source: string with extracted text
+    translated: string with translated text
+    extract_seconds: float with wall time of the extraction of the page
+    translate_seconds: float with wall time of the translation of the batch
+        of the page, divided by the number of pages of the batch
+"""
+
+# Marks the end of the items of a prefetched iterable
+_END = object()
+
+
+def prefetch(iterable, size):
+    """Iterate over an iterable in a background thread.
+
+    Up to `size` items are produced ahead of the consumer. Exceptions of the
+    iterable are raised in the consumer. If the consumer stops early, the
+    background thread stops after the current item.
+    Args:
+        iterable: iterable, e.g. a generator of extracted pages
+        size: int with maximum number of buffered items
+    Returns: generator of the items of the iterable
+    """
+    buffer = queue.Queue(maxsize=max(1, size))
+    stopped = threading.Event()
+
+    def put(item):
+        # Wait for free space, unless the consumer stopped
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except Exception as error:
+            put((_END, error))
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _timed(iterator):
+    """Yield the items of an iterator together with the time to produce them."""
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        yield item, time.perf_counter() - start
+
+
+def iter_translated_pages(
+    file_path,
+    backend=None,
+    cache=None,
+    tokenizer=None,
+    packing=True,
+    pages_per_batch=10,
+    lookahead=2,
+    max_in_flight=None,
+    routing=True,
+    selection=None,
+    memory_limit_mb=None,
+    memory=None,
+):
+    """Extract and translate the pages of a pdf, yielding pages as completed.
+
+    Pages are extracted in a background thread while earlier pages are
+    translated. The translation of a batch starts as soon as its
+    `pages_per_batch` pages are extracted, and up to `lookahead` batches are
+    extracted ahead of the translation. Backend, cache, packing and routing
+    are used as in extract_and_translate_file().
+    Example, writing a pdf while translating:
+        with StreamingPDFWriter(output_path, count_pages(file_path)) as writer:
+            for page in iter_translated_pages(file_path):
+                writer.add_page(page.page_index, page.translated)
+    Args:
+        file_path: string with path to pdf
+        backend: TranslatorBackend object, defaults to Google Translate
+        cache: TranslationCache object, None for no cache
+        tokenizer: nltk sentence tokenizer, defaults to the English tokenizer
+        packing: bool, pack paragraphs of a batch into as few requests as
+            possible, otherwise translate each paragraph separately
+        pages_per_batch: int with number of pages translated together
+        lookahead: int with number of batches extracted ahead
+        max_in_flight: int with number of concurrent requests, defaults to
+            `max_concurrency` of the backend
+        routing: bool, do not translate paragraphs in the target language or
+            without translatable content
+        selection: PageSelection object, None for all pages
+        memory_limit_mb: float with maximum growth of memory while extracting,
+            see iter_pages()
+        memory: TranslationMemory object reused for similar paragraphs when
+            packing, None for none
+    Returns: generator of PageRecord tuples, in the order of the pages
+    """
+    # Initialize translator backend
+    if backend is None:
+        backend = GoogleBackend(source="auto", target="en")
+    dispatcher = TranslationDispatcher(backend, max_in_flight=max_in_flight)
+    backend = dispatcher
+    if cache is not None:
+        backend = CachedBackend(backend, cache)
+
+    router = LanguageRouter(target=backend.target) if routing else None
+    if tokenizer is None:
+        tokenizer = auxiliary.initialize_tokenizer()
+
+    extracted = prefetch(
+        _timed(
+            iter_extracted_pages(
+                file_path, selection=selection, memory_limit_mb=memory_limit_mb
+            )
+        ),
+        lookahead * pages_per_batch,
+    )
+    try:
+        while True:
+            batch = list(itertools.islice(extracted, pages_per_batch))
+            if not batch:
+                return
+
+            start = time.perf_counter()
+            texts = [text for (_, text, _), _ in batch]
+            if packing:
+                translated = translate_pages(
+                    texts, tokenizer, backend, router=router, memory=memory
+                )
+            else:
+                translated = [
+                    auxiliary.translate_page(
+                        text, tokenizer, backend=backend, router=router
+                    )
+                    for text in texts
+                ]
+            translate_seconds = (time.perf_counter() - start) / len(batch)
+
+            for ((page_index, text, page_number), extract_seconds), translation in zip(
+                batch, translated
+            ):
+                yield PageRecord(
+                    page_index,
+                    page_number,
+                    text,
+                    translation,
+                    extract_seconds,
+                    translate_seconds,
+                )
+    finally:
+        extracted.close()
+        dispatcher.close()
@@ -0,0 +1,83 @@
+"""This file contains the translation of the tables of a document.
+
+The cells of tables are mostly short labels (row and column headers, units,
+month names), which recur many times within a report. Labels are therefore
+deduplicated across the whole document, and every unique label is translated
+once, packed together with other labels into as few requests as possible.
+Cells without letters (numbers, signs, footnote marks) are not translated.
+"""
+import re
+
+from translation.language import letter_ratio
+from translation.packing import has_content
+from translation.packing import translate_paragraphs
+
+# Line breaks within hyphenated words of a cell, e.g. "Brutto-\ninlands-"
+HYPHEN_BREAK = re.compile(r"-\s*\n\s*(?=[^\W\d_])")
+
+
+def normalize_cell(cell):
+    """Join the lines of a cell into a single label."""
+    return " ".join(HYPHEN_BREAK.sub("-", cell).split())
+
+
+def needs_translation(label, min_letter_ratio=0.5):
+    """Check whether a label contains text to be translated."""
+    return has_content(label) and letter_ratio(label) >= min_letter_ratio
+
+
+def translate_tables(tables, tokenizer, backend):
+    """Translate the cells of the tables of a document.
+
+    Args:
+        tables: list with the tables of each page, each table a list of rows
+            of strings, as extracted by extract_page()
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object
+    Returns: translated tables in the same structure and dictionary with
+        number of cells, cells with text, unique labels, deduplication ratio
+        and requests
+    """
+    # Collect unique labels
+    labels = {}
+    n_cells = 0
+    n_text_cells = 0
+    for page_tables in tables:
+        for table in page_tables:
+            for row in table:
+                for cell in row:
+                    n_cells += 1
+                    label = normalize_cell(cell)
+                    if needs_translation(label):
+                        n_text_cells += 1
+                        labels.setdefault(label, len(labels))
+
+    # Translate every label once, one label per paragraph of a single page
+    calls = backend.stats()["calls"]
+    translated_labels = {}
+    if labels:
+        translated = translate_paragraphs(["\n\n".join(labels)], tokenizer, backend)
+        translated_labels = {
+            label: " ".join(translated.get((0, index), [label]))
+            for label, index in labels.items()
+        }
+
+    translated_tables = [
+        [
+            [
+                [translated_labels.get(normalize_cell(cell), cell) for cell in row]
+                for row in table
+            ]
+            for table in page_tables
+        ]
+        for page_tables in tables
+    ]
+
+    stats = {
+        "cells": n_cells,
+        "text_cells": n_text_cells,
+        "unique_labels": len(labels),
+        "dedup_ratio": n_text_cells / len(labels) if labels else 1.0,
+        "requests": backend.stats()["calls"] - calls,
+    }
+    return translated_tables, stats
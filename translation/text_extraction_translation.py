@@ -1,72 +1,838 @@
 """This file contains the script for extracting and translating text from pdf."""
+import argparse
+import os
+import time
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path  # for Windows/Unix compatibility
 
-import pdfplumber
-
 import translation.auxiliary_extraction_translation as auxiliary
+from translation.backends import BACKENDS
+from translation.backends import get_backend
+from translation.backends import GoogleBackend
+from translation.cache import CachedBackend
+from translation.cache import TranslationCache
+from translation.discovery import create_output_dirs
+from translation.discovery import discover_pdfs
+from translation.discovery import ignore_patterns
+from translation.discovery import Manifest
+from translation.dispatch import TranslationDispatcher
+from translation.extraction import extract_pages
+from translation.extraction import iter_extracted_pages
+from translation.extraction_cache import ExtractionCache
+from translation.journal import file_hash
+from translation.journal import JobJournal
+from translation.language import LanguageRouter
+from translation.memory import TranslationMemory
+from translation.metrics import format_summary
+from translation.metrics import Metrics
+from translation.metrics import peak_memory_mb
+from translation.metrics import profiled
+from translation.metrics import read_metrics
+from translation.metrics import summarize
+from translation.metrics import TimedTokenizer
+from translation.packing import has_content
+from translation.packing import split_paragraphs
+from translation.packing import translate_pages
+from translation.pdf_writer import PDFWriter
+from translation.pdf_writer import StreamingPDFWriter
+from translation.selection import PageSelection
+from translation.tables import translate_tables
+from translation.tokenizers import add_data_dir
+from translation.tokenizers import preload_tokenizers
+from translation.tokenizers import SharedTokenizer
+
+
+def get_output_path(file_path, destination_path, paths_relative=True):
+    """Determine where the translation of a file is saved.
+
+    With `paths_relative`, the file is saved in the copy of its directory
+    under "output/" (see create_destination_dir()), otherwise directly in
+    `destination_path`.
+    Returns: Path of the output pdf
+    """
+    # Find subfolders of file
+    if paths_relative:
+        subdirectory_path = str(Path(file_path).relative_to(destination_path).parent)
+        dest_path = destination_path + "/output/" + subdirectory_path + "/"
+
+    else:
+        dest_path = destination_path
+
+    if not dest_path[-1] in ["", "/"]:
+        dest_path = dest_path + "/"
+    return Path(dest_path + str(Path(file_path).stem) + ".pdf")
+
+
+def translate_document(
+    pages,
+    tokenizer,
+    backend,
+    packing=True,
+    pages_per_batch=None,
+    completed_pages=None,
+    on_page_translated=None,
+    router=None,
+    metrics=None,
+    memory=None,
+):
+    """Translate the extracted text of all pages of a document.
 
+    Pages are translated in batches of `pages_per_batch` pages (default: all
+    pages at once). Pages in `completed_pages` are not translated again.
+    Args:
+        pages: list of strings with the extracted text of each page
+        tokenizer: nltk sentence tokenizer
+        backend: TranslatorBackend object
+        packing: bool, pack paragraphs of a batch into as few requests as
+            possible, otherwise translate each paragraph separately
+        pages_per_batch: int with number of pages translated together
+        completed_pages: dictionary mapping page index to translated text
+        on_page_translated: function called with page index and translated
+            text after each batch, e.g. to record progress
+        router: LanguageRouter object deciding which paragraphs are
+            translated, None to translate all paragraphs
+        metrics: Metrics object recording the time of every batch
+        memory: TranslationMemory object reused for similar paragraphs when
+            packing, None for none
+    Returns: list of strings with the translated text of each page
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    translated_pages = dict(completed_pages or {})
+    remaining = [i for i in range(len(pages)) if i not in translated_pages]
+    batch_size = pages_per_batch or max(1, len(remaining))
+
+    for start in range(0, len(remaining), batch_size):
+        indices = remaining[start : start + batch_size]
+        with metrics.stage("translate", first_page=indices[0], pages=len(indices)):
+            if packing:
+                # Pack paragraphs of all pages into as few requests as possible
+                translated = translate_pages(
+                    [pages[i] for i in indices],
+                    tokenizer,
+                    backend,
+                    router=router,
+                    memory=memory,
+                )
+            else:
+                translated = [
+                    auxiliary.translate_page(
+                        pages[i], tokenizer, backend=backend, router=router
+                    )
+                    for i in indices
+                ]
 
-def extract_and_translate_file(file_path, destination_path, paths_relative=True):
+        for page_index, text in zip(indices, translated):
+            translated_pages[page_index] = text
+            if on_page_translated is not None:
+                on_page_translated(page_index, text)
+
+    return [translated_pages[i] for i in range(len(pages))]
+
+
+def extract_and_translate_file(
+    file_path,
+    destination_path,
+    paths_relative=True,
+    backend=None,
+    cache=None,
+    packing=True,
+    max_in_flight=None,
+    requests_per_second=None,
+    workers=1,
+    pages_per_batch=None,
+    completed_pages=None,
+    on_page_translated=None,
+    streaming=False,
+    extraction_cache=None,
+    routing=True,
+    metrics=None,
+    selection=None,
+    memory_limit_mb=None,
+    tables=False,
+    memory=None,
+    output_path=None,
+):
     """Extract, translate and store text from files.
 
     Extraction, translation and storing are performed
     for each page, which are written into a single pdf.
+    The translation engine is given by `backend` (a TranslatorBackend
+    object), which defaults to Google Translate. If a TranslationCache
+    is passed as `cache`, only text missing from the cache is translated.
+    With `packing`, the paragraphs of all pages are packed into as few
+    requests as possible, otherwise each paragraph is translated separately.
+    Up to `max_in_flight` requests (default: `max_concurrency` of the backend)
+    are sent concurrently, limited to `requests_per_second` if given.
+    Pages are extracted by `workers` processes. For resuming, pages can be
+    translated in batches and completed pages skipped (see translate_document).
+    With `streaming`, translated pages are written to disk as they are
+    completed (see StreamingPDFWriter), otherwise all pages are kept in
+    memory until the pdf is saved. If an ExtractionCache is passed as
+    `extraction_cache`, pages extracted before are loaded from the cache.
+    With `routing`, paragraphs in the target language or without translatable
+    content are not translated and the number of skipped bytes is reported
+    (see LanguageRouter). Wall time of the stages, request statistics and
+    peak memory are recorded in `metrics` (a Metrics object), if given.
+    With a PageSelection as `selection`, only the selected pages are extracted
+    (in this process and without extraction cache) and translated, and saved
+    with the suffix "_selected". Pages are released after their extraction,
+    and the pdf is reopened once memory grows by more than `memory_limit_mb`
+    (see iter_pages()). With `tables`, the tables of the pages are extracted
+    as well (in this process and without extraction cache), their cells are
+    translated once per unique label (see translate_tables()) and the tables
+    are written below the text of their page. If a TranslationMemory is passed
+    as `memory`, translations of similar paragraphs are reused (see
+    recall_paragraphs()). The pdf is saved at `output_path`, if given, instead
+    of the path determined by get_output_path().
+    Returns: Path of the output pdf
     """
+    start = time.perf_counter()
+    metrics = metrics if metrics is not None else Metrics()
+
+    # Initialize translator backend
+    if backend is None:
+        backend = GoogleBackend(source="auto", target="en")
+    dispatcher = TranslationDispatcher(
+        backend, max_in_flight=max_in_flight, requests_per_second=requests_per_second
+    )
+    backend = dispatcher
+    if cache is not None:
+        backend = CachedBackend(backend, cache)
+
+    # Initialize language identification
+    router = LanguageRouter(target=backend.target) if routing else None
+
     # Initialize nltk sentence tokenizer
-    tokenizer = auxiliary.initialize_tokenizer()
-
-    # Initialize FPDF file to write on
-    fpdf = auxiliary.initialize_pdf_storage()
-
-    # Open PDF
-    with pdfplumber.open(Path(file_path)) as pdf:
-        # Initialize page counter
-        page_counter = "?"
-        for page in pdf.pages:
-            ##################
-            #  Extraction  ###
-            ##################
-            extracted, page_number = auxiliary.extract(page, page_counter)
-            page_counter = page_number  # Update page counter
-
-            ##################
-            #  Translate   ###
-            ##################
-            if extracted != "":
-                # Translate paragraphs individually to keep
-                paragraphs = extracted.split("\n\n")
-                translated = "\n\n".join(
-                    [
-                        auxiliary.translate_extracted(paragraph, tokenizer)
-                        for paragraph in paragraphs
-                    ]
+    tokenizer = TimedTokenizer(auxiliary.initialize_tokenizer())
+
+    ##################
+    #  Extraction  ###
+    ##################
+    page_tables = [] if tables else None
+    with metrics.stage("extract") as fields:
+        if selection is not None or tables:
+            pages = [
+                extracted
+                for _, extracted, _ in iter_extracted_pages(
+                    file_path,
+                    selection,
+                    memory_limit_mb=memory_limit_mb,
+                    tables=page_tables,
                 )
-            else:
-                translated = extracted
+            ]
+        else:
+            pages = [
+                extracted
+                for extracted, _ in extract_pages(
+                    file_path,
+                    workers=workers,
+                    cache=extraction_cache,
+                    metrics=metrics,
+                    memory_limit_mb=memory_limit_mb,
+                )
+            ]
+        fields["pages"] = len(pages)
 
-            #######################
-            #  Store PDF Page   ###
-            #######################
-            page_number = f"{page.page_number}/{len(pdf.pages)}"
-            fpdf = auxiliary.write_to_page(translated, page_number, pdf=fpdf)
+    # Translate the cells of all tables at once, such that labels recurring
+    # on many pages are translated once
+    if tables:
+        with metrics.stage("tables") as fields:
+            page_tables, table_stats = translate_tables(page_tables, tokenizer, backend)
+            fields.update(table_stats)
+        print(
+            f"{Path(file_path).name}: translated {table_stats['unique_labels']}"
+            f" unique labels of {table_stats['text_cells']} table cells with text"
+            f" ({table_stats['dedup_ratio']:.1f}x deduplication)"
+            f" in {table_stats['requests']} requests."
+        )
 
-    # Bring all pages together, save pdf
-    # Find subfolders of file
-    if paths_relative:
-        subdirectory_path = str(Path(file_path).relative_to(destination_path).parent)
-        dest_path = destination_path + "/output/" + subdirectory_path + "/"
+    # Initialize PDF writer, pages are stored in order as soon as translated
+    if output_path is None:
+        output_path = get_output_path(file_path, destination_path, paths_relative)
+        if selection is not None:
+            output_path = output_path.with_name(output_path.stem + "_selected.pdf")
+    if streaming:
+        writer = StreamingPDFWriter(output_path, len(pages))
+    else:
+        writer = PDFWriter(output_path, len(pages))
+
+    with writer:
+
+        def tables_of(page_index):
+            return page_tables[page_index] if tables else None
+
+        for page_index, translated in (completed_pages or {}).items():
+            writer.add_page(page_index, translated, tables_of(page_index))
+
+        def store_page(page_index, translated):
+            with metrics.stage("write_page", page=page_index):
+                writer.add_page(page_index, translated, tables_of(page_index))
+            if on_page_translated is not None:
+                on_page_translated(page_index, translated)
+
+        ##################
+        #  Translate   ###
+        ##################
+        translate_document(
+            pages,
+            tokenizer,
+            backend,
+            packing=packing,
+            pages_per_batch=pages_per_batch,
+            completed_pages=completed_pages,
+            on_page_translated=store_page,
+            router=router,
+            metrics=metrics,
+            memory=memory,
+        )
+
+        with metrics.stage("save"):
+            writer.close()
+
+    metrics.record(
+        stage="tokenize", seconds=tokenizer.seconds, segments=tokenizer.calls
+    )
+    metrics.record(
+        stage="document",
+        seconds=time.perf_counter() - start,
+        pages=len(pages),
+        **backend.stats(),
+        **(router.stats() if router is not None else {}),
+        **(memory.stats() if memory is not None else {}),
+        peak_memory_mb=peak_memory_mb(),
+    )
+    dispatcher.close()
+
+    if memory is not None:
+        recalled = memory.stats()
+        print(
+            f"{Path(file_path).name}: reused {recalled['reused']} of"
+            f" {recalled['memory_lookups']} paragraphs from the translation memory"
+            f" ({recalled['memory_lookup_seconds']:.2f}s lookups)."
+        )
+
+    if router is not None:
+        routed = router.stats()
+        print(
+            f"{Path(file_path).name}: skipped {routed['bytes_skipped']} of"
+            f" {routed['bytes_total']} bytes"
+            f" ({routed['bytes_target_language']} in target language,"
+            f" {routed['bytes_no_content']} without translatable content)."
+        )
+
+    return output_path
+
+
+def extract_and_translate_targets(
+    file_path,
+    destination_path,
+    targets,
+    paths_relative=True,
+    backends=None,
+    cache=None,
+    packing=True,
+    max_in_flight=None,
+    workers=1,
+    pages_per_batch=None,
+    extraction_cache=None,
+    routing=True,
+    metrics=None,
+    memory_limit_mb=None,
+    memory=None,
+):
+    """Extract text from a file once and translate it into several languages.
+
+    The pages are extracted and split into sentences once, then all target
+    languages are translated concurrently, each by its own backend and into
+    its own pdf, which is saved with the language as suffix (e.g.
+    "report_fr.pdf"). Wall time therefore approaches the time of the slowest
+    translation instead of the sum of full runs. Up to `max_in_flight`
+    requests are sent per language. The other arguments are used as in
+    extract_and_translate_file().
+    Args:
+        file_path: string with path to pdf
+        destination_path: string with path of the output folder
+        targets: list of strings with language codes, e.g. ["en", "fr"]
+        backends: dictionary mapping language code to TranslatorBackend
+            object, defaults to Google Translate for every language
+    Returns: dictionary mapping language code to Path of the output pdf
+    """
+    if len(set(targets)) != len(targets):
+        raise ValueError(f"The target languages {targets} contain duplicates.")
+
+    start = time.perf_counter()
+    metrics = metrics if metrics is not None else Metrics()
+    if backends is None:
+        backends = {
+            target: GoogleBackend(source="auto", target=target) for target in targets
+        }
+
+    # Initialize nltk sentence tokenizer, splitting each paragraph only once
+    timed_tokenizer = TimedTokenizer(auxiliary.initialize_tokenizer())
+    tokenizer = SharedTokenizer(timed_tokenizer)
+
+    ##################
+    #  Extraction  ###
+    ##################
+    with metrics.stage("extract") as fields:
+        pages = [
+            extracted
+            for extracted, _ in extract_pages(
+                file_path,
+                workers=workers,
+                cache=extraction_cache,
+                metrics=metrics,
+                memory_limit_mb=memory_limit_mb,
+            )
+        ]
+        fields["pages"] = len(pages)
+
+    # Split all paragraphs into sentences before the languages are translated
+    # concurrently, which would otherwise split the same paragraphs at once
+    with metrics.stage("segment") as fields:
+        paragraphs = [p for _, p in split_paragraphs(pages) if has_content(p)]
+        for paragraph in paragraphs:
+            tokenizer.tokenize(paragraph)
+        fields["paragraphs"] = len(paragraphs)
+
+    output_path = get_output_path(file_path, destination_path, paths_relative)
+
+    def translate_target(target):
+        dispatcher = TranslationDispatcher(
+            backends[target], max_in_flight=max_in_flight
+        )
+        backend = dispatcher
+        if cache is not None:
+            backend = CachedBackend(backend, cache)
+        router = LanguageRouter(target=target) if routing else None
+        target_path = output_path.with_name(f"{output_path.stem}_{target}.pdf")
+
+        with metrics.stage("translate_target", target=target) as fields:
+            with dispatcher, PDFWriter(target_path, len(pages)) as writer:
+                translate_document(
+                    pages,
+                    tokenizer,
+                    backend,
+                    packing=packing,
+                    pages_per_batch=pages_per_batch,
+                    on_page_translated=writer.add_page,
+                    router=router,
+                    memory=memory,
+                )
+            fields.update(backend.stats())
+
+        return target_path
+
+    ##################
+    #  Translate   ###
+    ##################
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        output_paths = dict(zip(targets, executor.map(translate_target, targets)))
 
+    metrics.record(
+        stage="tokenize",
+        seconds=timed_tokenizer.seconds,
+        segments=timed_tokenizer.calls,
+        shared=tokenizer.hits,
+    )
+    metrics.record(
+        stage="document",
+        seconds=time.perf_counter() - start,
+        pages=len(pages),
+        targets=len(targets),
+        peak_memory_mb=peak_memory_mb(),
+    )
+    print(
+        f"{Path(file_path).name}: translated {len(pages)} pages into"
+        f" {', '.join(targets)} in {time.perf_counter() - start:.1f}s,"
+        f" splitting {timed_tokenizer.calls} paragraphs into sentences once."
+    )
+
+    return output_paths
+
+
+def journal_key(file_path, backend_name, targets, tables=False):
+    """Return the key of a file in the job journal.
+
+    The key contains the settings of the translation, such that a file is
+    translated again with another backend, target language or tables, e.g.
+    "report.pdf [google:en,fr]" or "report.pdf [local:en+tables]".
+    """
+    key = f"{file_path} [{backend_name}:{','.join(targets)}"
+    return key + ("+tables]" if tables else "]")
+
+
+def translate_file_job(
+    file_path,
+    destination_path,
+    journal_path,
+    backend_name="google",
+    backend_kwargs=None,
+    cache_path=None,
+    pages_per_batch=20,
+    extraction_cache_path=None,
+    metrics_path=None,
+    batch=None,
+    selection=None,
+    memory_limit_mb=None,
+    tables=False,
+    memory_path=None,
+    memory_threshold=0.9,
+    targets=None,
+):
+    """Translate a file of a batch, resuming from the job journal.
+
+    The file is skipped if it has been translated with the same content and
+    its output exists. Otherwise, pages already recorded in the journal are
+    not translated again and every translated page is recorded. Metrics are
+    appended to `metrics_path`, if given, tagged with the file and `batch`.
+    Translations of a `selection` of pages are not recorded in the journal,
+    which records files under their settings (see journal_key()).
+    A translation memory is used if `memory_path` is given. With a list of
+    `targets`, the file is translated into all of these languages at once
+    (see extract_and_translate_targets()) and only recorded once all are done.
+    Returns: tuple with file path, number of pages, seconds, skipped (bool)
+    """
+    start = time.perf_counter()
+    source_hash = file_hash(file_path)
+
+    with JobJournal(journal_path) as journal:
+        output_path = get_output_path(file_path, destination_path)
+        if targets:
+            return _translate_targets_job(
+                file_path,
+                destination_path,
+                journal,
+                source_hash,
+                targets,
+                backend_name=backend_name,
+                backend_kwargs=backend_kwargs,
+                cache_path=cache_path,
+                pages_per_batch=pages_per_batch,
+                extraction_cache_path=extraction_cache_path,
+                metrics_path=metrics_path,
+                batch=batch,
+                memory_limit_mb=memory_limit_mb,
+                memory_path=memory_path,
+                memory_threshold=memory_threshold,
+            )
+
+        backend = get_backend(backend_name, **(backend_kwargs or {}))
+        key = journal_key(file_path, backend_name, [backend.target], tables)
+        if (
+            selection is None
+            and journal.is_done(key, source_hash)
+            and output_path.exists()
+        ):
+            return file_path, 0, 0.0, True
+
+        cache = TranslationCache(cache_path) if cache_path is not None else None
+        if extraction_cache_path is not None:
+            extraction_cache = ExtractionCache(extraction_cache_path)
+        else:
+            extraction_cache = None
+        if memory_path is not None:
+            memory = TranslationMemory(memory_path, threshold=memory_threshold)
+        else:
+            memory = None
+        metrics = Metrics(metrics_path, batch=batch, file=str(file_path))
+        translated_pages = []
+
+        def record_page(page_index, translated):
+            if selection is None:
+                journal.record_page(key, source_hash, page_index, translated)
+            translated_pages.append(page_index)
+
+        if selection is None:
+            completed_pages = journal.completed_pages(key, source_hash)
+        else:
+            completed_pages = None
+
+        try:
+            extract_and_translate_file(
+                file_path=file_path,
+                destination_path=destination_path,
+                backend=backend,
+                cache=cache,
+                pages_per_batch=pages_per_batch,
+                completed_pages=completed_pages,
+                on_page_translated=record_page,
+                streaming=True,
+                extraction_cache=extraction_cache,
+                metrics=metrics,
+                selection=selection,
+                memory_limit_mb=memory_limit_mb,
+                tables=tables,
+                memory=memory,
+            )
+        finally:
+            metrics.close()
+            if cache is not None:
+                cache.close()
+            if extraction_cache is not None:
+                extraction_cache.close()
+            if memory is not None:
+                memory.close()
+
+        seconds = time.perf_counter() - start
+        if selection is None:
+            # Record all pages of the file, including those of previous runs
+            pages = next(
+                record["pages"]
+                for record in metrics.records
+                if record["stage"] == "document"
+            )
+            journal.record_file(key, source_hash, pages, seconds)
+
+    return file_path, len(translated_pages), seconds, False
+
+
+def _translate_targets_job(
+    file_path,
+    destination_path,
+    journal,
+    source_hash,
+    targets,
+    backend_name="google",
+    backend_kwargs=None,
+    cache_path=None,
+    pages_per_batch=20,
+    extraction_cache_path=None,
+    metrics_path=None,
+    batch=None,
+    memory_limit_mb=None,
+    memory_path=None,
+    memory_threshold=0.9,
+):
+    """Translate a file of a batch into several languages, see translate_file_job().
+
+    The journal records the file under its path, backend and languages (see
+    journal_key()), pages are not recorded.
+    """
+    start = time.perf_counter()
+    key = journal_key(file_path, backend_name, targets)
+    output_path = get_output_path(file_path, destination_path)
+    if journal.is_done(key, source_hash) and all(
+        output_path.with_name(f"{output_path.stem}_{target}.pdf").exists()
+        for target in targets
+    ):
+        return file_path, 0, 0.0, True
+
+    backends = {
+        target: get_backend(
+            backend_name, **{**(backend_kwargs or {}), "target": target}
+        )
+        for target in targets
+    }
+    cache = TranslationCache(cache_path) if cache_path is not None else None
+    if extraction_cache_path is not None:
+        extraction_cache = ExtractionCache(extraction_cache_path)
     else:
-        dest_path = destination_path
+        extraction_cache = None
+    if memory_path is not None:
+        memory = TranslationMemory(memory_path, threshold=memory_threshold)
+    else:
+        memory = None
+    metrics = Metrics(metrics_path, batch=batch, file=str(file_path))
+
+    try:
+        extract_and_translate_targets(
+            file_path=file_path,
+            destination_path=destination_path,
+            targets=targets,
+            backends=backends,
+            cache=cache,
+            pages_per_batch=pages_per_batch,
+            extraction_cache=extraction_cache,
+            metrics=metrics,
+            memory_limit_mb=memory_limit_mb,
+            memory=memory,
+        )
+    finally:
+        metrics.close()
+        if cache is not None:
+            cache.close()
+        if extraction_cache is not None:
+            extraction_cache.close()
+        if memory is not None:
+            memory.close()
+
+    pages = next(
+        record["pages"] for record in metrics.records if record["stage"] == "extract"
+    )
+    seconds = time.perf_counter() - start
+    journal.record_file(key, source_hash, pages, seconds)
 
-    auxiliary.save_to_pdf(
-        fpdf,
-        file_name=str(Path(file_path).stem),
-        destination_folder=dest_path,
+    return file_path, pages, seconds, False
+
+
+def _initialize_worker(nltk_data=None):
+    """Load the tokenizer of a worker process, unless inherited by fork."""
+    if nltk_data is not None:
+        add_data_dir(nltk_data)
+    return preload_tokenizers()
+
+
+def run_batch(
+    pdf_list,
+    destination_path,
+    workers=1,
+    journal_path=None,
+    cache_path=None,
+    backend_name="google",
+    backend_kwargs=None,
+    pages_per_batch=20,
+    nltk_data=None,
+    extraction_cache_path=None,
+    metrics_path=None,
+    profile_path=None,
+    selection=None,
+    memory_limit_mb=None,
+    tables=False,
+    memory_path=None,
+    memory_threshold=0.9,
+    targets=None,
+):
+    """Translate a list of pdfs with several processes.
+
+    Files are scheduled largest-first, such that large files do not delay the
+    end of the batch. Progress is recorded in a job journal, which is used to
+    skip translated files and to resume files after an interruption. Files
+    failing to translate are reported and counted, the batch continues.
+    Args:
+        pdf_list: list of strings with paths to pdfs, as found by
+            discover_pdfs()
+        destination_path: string with path of folder containing the pdfs
+        workers: int with number of files translated at once
+        journal_path: string with location of job journal, defaults to
+            "output/journal.sqlite" in `destination_path`
+        cache_path: string with location of translation cache, None for none
+        backend_name: string with name of translator backend
+        backend_kwargs: dictionary with keyword arguments for the backend
+        pages_per_batch: int with number of pages translated (and recorded)
+            together
+        nltk_data: string with directory of (bundled) nltk data, None for the
+            default nltk data directories
+        extraction_cache_path: string with location of extraction cache, None
+            for none
+        metrics_path: string with location of JSON-lines metrics file, None
+            for none, see Metrics
+        profile_path: string with location of a cProfile profile, None for
+            none. The files are translated in this process, which is meant
+            for profiling a single file.
+        selection: PageSelection object, None to translate all pages
+        memory_limit_mb: float with maximum growth of memory of a worker
+            while extracting a pdf, after which the pdf is reopened
+        tables: bool, translate the tables of the pdfs as well
+        memory_path: string with location of the fuzzy translation memory,
+            None for none
+        memory_threshold: float with minimum similarity of paragraphs whose
+            translation is reused, see TranslationMemory
+        targets: list of strings with target languages, into which every pdf
+            is translated at once, None for the target of the backend
+    Returns: dictionary with summary of the batch
+    """
+    if journal_path is None:
+        journal_path = destination_path + "/output/journal.sqlite"
+
+    os.makedirs(destination_path + "/output", exist_ok=True)
+
+    # Do not translate translations of previous runs
+    output_folder = Path(destination_path + "/output")
+    pdf_list = [f for f in pdf_list if not Path(f).is_relative_to(output_folder)]
+    create_output_dirs(destination_path, pdf_list)
+
+    # Schedule largest files first
+    pdf_list = sorted(pdf_list, key=os.path.getsize, reverse=True)
+
+    job = partial(
+        translate_file_job,
+        destination_path=destination_path,
+        journal_path=journal_path,
+        backend_name=backend_name,
+        backend_kwargs=backend_kwargs,
+        cache_path=cache_path,
+        pages_per_batch=pages_per_batch,
+        extraction_cache_path=extraction_cache_path,
+        metrics_path=metrics_path,
+        batch=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        selection=selection,
+        memory_limit_mb=memory_limit_mb,
+        tables=tables,
+        memory_path=memory_path,
+        memory_threshold=memory_threshold,
+        targets=targets,
+    )
+
+    # Load tokenizer once, forked workers inherit it
+    load_seconds = _initialize_worker(nltk_data)["english"]
+    print(f"Loaded tokenizer in {load_seconds:.2f}s, shared by all files.")
+
+    start = time.perf_counter()
+    summary = {
+        "files": len(pdf_list),
+        "translated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "pages": 0,
+    }
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_initialize_worker, initargs=(nltk_data,)
+    ) as executor:
+        # Pairs of file and function returning the result of its job
+        if profile_path is None:
+            futures = {
+                executor.submit(job, file_path): file_path for file_path in pdf_list
+            }
+            results = (
+                (futures[future], future.result) for future in as_completed(futures)
+            )
+        else:
+            # Translate in this process, such that cProfile sees all stages
+            results = (
+                (
+                    file_path,
+                    partial(profiled, job, file_path, profile_path=profile_path),
+                )
+                for file_path in pdf_list
+            )
+
+        for done, (file_path, result) in enumerate(results, start=1):
+            try:
+                _, pages, seconds, skipped = result()
+            except Exception as error:
+                summary["failed"] += 1
+                print(f"[{done}/{len(pdf_list)}] {file_path}: failed ({error!r})")
+                continue
+
+            summary["skipped" if skipped else "translated"] += 1
+            summary["pages"] += pages
+
+            status = "skipped" if skipped else f"{pages} pages in {seconds:.1f}s"
+            print(f"[{done}/{len(pdf_list)}] {file_path}: {status}")
+
+    summary["seconds"] = time.perf_counter() - start
+    summary["pages_per_second"] = summary["pages"] / max(summary["seconds"], 1e-9)
+    print(
+        f"Translated {summary['translated']} files ({summary['skipped']} skipped,"
+        f" {summary['failed']} failed),"
+        f" {summary['pages']} pages in {summary['seconds']:.1f}s"
+        f" ({summary['pages_per_second']:.2f} pages/s)."
     )
 
+    if metrics_path is not None and Path(metrics_path).exists():
+        summary["stages"] = summarize(
+            read_metrics(metrics_path, batch=job.keywords["batch"])
+        )
+        print(format_summary(summary["stages"]))
+
+    return summary
 
-def main():
+
+def main(args=None):
     """Translate specified PDF reports."""
     # Set-up
     desired = [
@@ -79,14 +845,100 @@ def main():
     # TODO: would a change of working directory make things easier?
     dest_path = "C:/Users/Philipp/OneDrive/available_historical_documents"
 
+    parser = argparse.ArgumentParser(description="Translate a corpus of pdfs.")
+    parser.add_argument("desired", nargs="*", default=desired)
+    parser.add_argument("--dest-path", default=dest_path)
+    parser.add_argument("--ignore", default="English", help="folder name to skip")
+    parser.add_argument("--include", action="append", help="glob of pdfs to add")
+    parser.add_argument("--exclude", action="append", help="glob of pdfs to skip")
+    parser.add_argument(
+        "--changed-only", action="store_true", help="skip pdfs found before"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="google")
+    parser.add_argument("--pages-per-batch", type=int, default=20)
+    parser.add_argument("--journal", default=None)
+    parser.add_argument("--nltk-data", default=None)
+    parser.add_argument("--profile", default=None, help="profile a single pdf")
+    parser.add_argument("--pages", default=None, help='page ranges, e.g. "10-40"')
+    parser.add_argument("--keyword", action="append", help="select pages with it")
+    parser.add_argument("--max-table-ratio", type=float, default=None)
+    parser.add_argument("--memory-limit-mb", type=float, default=None)
+    parser.add_argument("--tables", action="store_true", help="translate tables")
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=None,
+        help="reuse translations of paragraphs at least this similar",
+    )
+    parser.add_argument(
+        "--targets", default=None, help='target languages, e.g. "en,fr,de"'
+    )
+    args = parser.parse_args(args)
+
     # Find all pdfs
-    pdf_list = auxiliary.find_pdfs(dest_path=dest_path, desired_path=desired)
+    if args.profile is not None:
+        pdf_list = [args.profile]
+        profile_path = args.dest_path + "/output/profile.pstats"
+    else:
+        os.makedirs(args.dest_path + "/output", exist_ok=True)
+        with Manifest(args.dest_path + "/output/manifest.sqlite") as manifest:
+            found = discover_pdfs(
+                args.desired,
+                args.dest_path,
+                include=args.include or ["*.pdf"],
+                exclude=(args.exclude or []) + ignore_patterns(args.ignore),
+                manifest=manifest,
+            )
+        print(
+            f"Found {len(found['new'])} new, {len(found['changed'])} changed and"
+            f" {len(found['unchanged'])} unchanged pdfs"
+            f" ({len(found['removed'])} removed)."
+        )
+        pdf_list = found["new"] + found["changed"]
+        if not args.changed_only:
+            pdf_list += found["unchanged"]
+        profile_path = None
+
+    # Select pages for partial runs
+    if args.pages or args.keyword or args.max_table_ratio is not None:
+        selection = PageSelection(
+            pages=args.pages,
+            keywords=args.keyword or (),
+            max_table_ratio=args.max_table_ratio,
+        )
+    else:
+        selection = None
 
-    _ = [auxiliary.create_destination_dir(dest_path, f) for f in pdf_list]
+    if args.targets and (selection is not None or args.tables):
+        parser.error("--targets cannot be combined with page selection or --tables")
 
-    for file in pdf_list:
-        print(file)
-        extract_and_translate_file(file_path=file, destination_path=dest_path)
+    # Reuse translations of similar paragraphs, if a threshold is given
+    if args.memory_threshold is not None:
+        memory_path = args.dest_path + "/output/translation_memory.sqlite"
+    else:
+        memory_path = None
+
+    # Re-use translations of previous runs
+    run_batch(
+        pdf_list,
+        args.dest_path,
+        workers=args.workers,
+        journal_path=args.journal,
+        cache_path=args.dest_path + "/output/translation_cache.sqlite",
+        backend_name=args.backend,
+        pages_per_batch=args.pages_per_batch,
+        nltk_data=args.nltk_data,
+        extraction_cache_path=args.dest_path + "/output/extraction_cache.sqlite",
+        metrics_path=args.dest_path + "/output/metrics.jsonl",
+        profile_path=profile_path,
+        selection=selection,
+        memory_limit_mb=args.memory_limit_mb,
+        tables=args.tables,
+        memory_path=memory_path,
+        memory_threshold=args.memory_threshold,
+        targets=args.targets.split(",") if args.targets else None,
+    )
 
 
 if __name__ == "__main__":
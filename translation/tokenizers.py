@@ -0,0 +1,138 @@
+"""This file contains the process-wide registry of nltk sentence tokenizers.
+
+Tokenizers are loaded lazily, once per language and process. The punkt
+resource is only downloaded if it is not found in any nltk data directory
+(including `NLTK_DATA` and directories added with `add_data_dir`), such that
+an installed or bundled copy works offline. Preloading the tokenizers before
+worker processes are forked shares them with all workers.
+"""
+import threading
+import time
+import warnings
+from pathlib import Path  # for Windows/Unix compatibility
+
+import nltk.data  # natural language processing
+from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+DOWNLOAD_DIR = "/tmp/"
+
+_tokenizers = {}
+_lock = threading.Lock()
+_load_seconds = {}
+
+
+def add_data_dir(data_dir):
+    """Search a directory (e.g. a bundled copy of nltk_data) for resources.
+
+    Args:
+        data_dir: string/Path with directory containing `tokenizers/punkt/`
+    """
+    data_dir = str(Path(data_dir))
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+
+
+def load_tokenizer(language="english", download=True):
+    """Load the punkt tokenizer of a language, bypassing the registry.
+
+    The resource is only downloaded if it cannot be found. If it is neither
+    found nor downloaded, e.g. without network, an untrained punkt tokenizer
+    is returned, which splits sentences at punctuation but does not know the
+    abbreviations of the language.
+    Args:
+        language: string with language of the tokenizer (as named by punkt)
+        download: bool, False never tries to download the resource
+    Returns: PunktSentenceTokenizer object
+    """
+    # Tell the NLTK data loader to look for resource files in /tmp/
+    if DOWNLOAD_DIR not in nltk.data.path:
+        nltk.data.path.append(DOWNLOAD_DIR)
+
+    resource = f"tokenizers/punkt/{language}.pickle"
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        if not download or not nltk.download(
+            "punkt", download_dir=DOWNLOAD_DIR, quiet=True
+        ):
+            warnings.warn(
+                f"The nltk resource {resource} is not available,"
+                " using untrained punkt tokenizer."
+            )
+            return PunktSentenceTokenizer()
+
+    return nltk.data.load(resource)
+
+
+def get_tokenizer(language="english", download=True):
+    """Return the tokenizer of a language, loading it on first use.
+
+    Args:
+        language: string with language of the tokenizer (as named by punkt)
+        download: bool, False never tries to download the resource
+    Returns: PunktSentenceTokenizer object, shared within the process
+    """
+    tokenizer = _tokenizers.get(language)
+    if tokenizer is None:
+        with _lock:
+            if language not in _tokenizers:
+                start = time.perf_counter()
+                _tokenizers[language] = load_tokenizer(language, download=download)
+                _load_seconds[language] = time.perf_counter() - start
+            tokenizer = _tokenizers[language]
+
+    return tokenizer
+
+
+def preload_tokenizers(languages=("english",), download=True):
+    """Load tokenizers, e.g. before worker processes are forked.
+
+    Returns: dictionary mapping language to seconds needed for loading, which
+        is saved by every later use of the tokenizer
+    """
+    for language in languages:
+        get_tokenizer(language, download=download)
+
+    return {language: _load_seconds.get(language, 0.0) for language in languages}
+
+
+def clear_tokenizers():
+    """Remove all tokenizers from the registry."""
+    with _lock:
+        _tokenizers.clear()
+        _load_seconds.clear()
+
+
+class SharedTokenizer:
+    """Sentence tokenizer remembering the sentences of every text it split.
+
+    Translating a document into several languages splits the same paragraphs
+    into sentences once for every language. Sharing this tokenizer between
+    the translations splits every paragraph only once. It can be used by
+    several threads at once.
+    Args:
+        tokenizer: nltk sentence tokenizer
+    """
+
+    def __init__(self, tokenizer):
+        """Wrap tokenizer without remembered texts."""
+        self.tokenizer = tokenizer
+        self.hits = 0
+        self._sentences = {}
+        self._lock = threading.Lock()
+
+    def tokenize(self, text):
+        """Split text into sentences, unless split before."""
+        with self._lock:
+            sentences = self._sentences.get(text)
+            self.hits += sentences is not None
+        if sentences is None:
+            sentences = self.tokenizer.tokenize(text)
+            with self._lock:
+                self._sentences[text] = sentences
+        # Return a copy, such that callers cannot change remembered sentences
+        return list(sentences)
+
+    def __len__(self):
+        """Return number of remembered texts."""
+        return len(self._sentences)